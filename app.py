@@ -1,9 +1,25 @@
 import streamlit as st
 import os
+import json
+import time
+import uuid
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from core.project_manager import ProjectManager
 from core.agent import GeminiAgent
-from ui.components import render_sidebar, render_chat_message, render_action_approval, render_file_explorer
+from core.action_scheduler import ActionScheduler
+from core.action_executor import run_tool, execute_actions as core_execute_actions
+from core.context_assembler import ContextAssembler, estimate_tokens
+from core.speculation import SpeculativeExecutor
+from core.tracing import get_tracer
+from core.history import HistoryManager
+from core.blob_store import get_blob_store
+from core.tool_registry import get_registry
+from core.config import WARM_TOOLS, PROMPT_CACHE_TTL
+from core.agent_loop import prepare_message, reply_message, record_results
+from core.prompt_cache import PromptPrefixCache, GeminiCacheProvider
+from ui.components import render_sidebar, render_chat_message, render_action_approval, render_file_explorer, render_command_stream, render_cache_stats, render_agent_stream, render_performance, render_tool_registry, render_prompt_cache
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +36,15 @@ if "agent" not in st.session_state:
     st.session_state.agent = None
 if "should_continue" not in st.session_state:
     st.session_state.should_continue = False
+if "background" not in st.session_state:
+    # Work started while a reply is still streaming
+    st.session_state.background = ThreadPoolExecutor(max_workers=4)
+
+tracer = get_tracer()
+
+# Heavy tool modules load lazily; the commonly used ones are preloaded off the script thread
+tools = get_registry()
+tools.warm_up(WARM_TOOLS)
 
 # --- Sidebar & Config ---
 model_name, working_dir, safe_mode = render_sidebar()
@@ -28,12 +53,31 @@ api_key = os.getenv("GEMINI_API_KEY")
 # --- Initialization ---
 if api_key and working_dir:
     if st.session_state.agent is None or st.session_state.agent.model_name != model_name:
-        pm = ProjectManager(working_dir)
+        if st.session_state.agent is not None:
+            # Stop the old watcher thread and shell sessions before replacing them
+            st.session_state.agent.project_manager.close()
+        pm = ProjectManager(working_dir, watch=True)
         st.session_state.agent = GeminiAgent(api_key, model_name, pm)
+        st.session_state.context_assembler = ContextAssembler(pm)
+        st.session_state.tools_sent = None # Hash of the tool catalogue this agent has seen
+        if hasattr(st.session_state.agent, "prompt_cache") and PROMPT_CACHE_TTL:
+            st.session_state.agent.prompt_cache = PromptPrefixCache(
+                GeminiCacheProvider(api_key, model_name), model_name, ttl=PROMPT_CACHE_TTL
+            )
+        get_blob_store().prune()
+        st.session_state.history = HistoryManager(os.path.join(pm.cache_dir, "history", uuid.uuid4().hex[:12]))
         st.success(f"Agent initialized in {working_dir}")
 
     # Render File Explorer
-    render_file_explorer(st.session_state.agent.project_manager, st.session_state.agent.pinned_files)
+    with tracer.span("ui.file_explorer"):
+        render_file_explorer(st.session_state.agent.project_manager, st.session_state.agent.pinned_files)
+    web_tools = tools.loaded_module("core.web_tools")
+    if web_tools is not None:
+        render_cache_stats(web_tools.cache)
+    render_performance(tracer)
+    render_tool_registry(tools)
+    if getattr(st.session_state.agent, "prompt_cache", None) is not None:
+        render_prompt_cache(st.session_state.agent.prompt_cache)
 
 else:
     st.warning("Please enter API Key and Working Directory to start.")
@@ -42,40 +86,90 @@ else:
 # --- Main Chat Interface ---
 st.title("🤖 Gemini AI Developer")
 
-# Display History
-for msg in st.session_state.messages:
-    if not msg.get("hidden"):
-        render_chat_message(msg["role"], msg["content"], msg.get("output"))
+# Large outputs are kept once on disk; messages only hold a handle and a preview
+blobs = get_blob_store()
+
+# Display History (old tool outputs summarized, old turns archived to disk)
+st.session_state.history.compact(st.session_state.messages)
+with tracer.span("ui.render_history", messages=len(st.session_state.messages)):
+    for i, msg in enumerate(st.session_state.messages):
+        if not msg.get("hidden"):
+            render_chat_message(msg["role"], msg["content"], msg.get("output"), msg.get("output_ref"), blobs, key=i)
+
+# --- Agent Messaging ---
+def send_to_agent(message):
+    """
+    Sends a message with the pinned files (full, as diffs, or shrunk to fit the budget) prepended.
+    Agents that implement send_message_stream (yielding raw JSON text deltas)
+    are rendered live. Without Safe Mode, read-only tools start speculatively
+    as soon as their action is complete in the stream (see run_actions); with
+    it, nothing runs before approval and write previews are warmed instead.
+    """
+    agent = st.session_state.agent
+    history = st.session_state.history
+    message, st.session_state.tools_sent = prepare_message(
+        agent, st.session_state.context_assembler, tools, message, st.session_state.tools_sent
+    )
+    if not hasattr(agent, "send_message_stream"):
+        with tracer.span("model.call", bytes_in=len(message), tokens_in=estimate_tokens(message)) as attrs:
+            response_data = agent.send_message(message)
+            reply = json.dumps(response_data, default=str)
+            attrs.update(bytes_out=len(reply), tokens_out=estimate_tokens(reply),
+                         actions=[a.get("type") for a in response_data.get("actions", [])])
+        return response_data
+
+    speculation = SpeculativeExecutor(partial(run_tool, agent, history), st.session_state.background)
+    def warm_previews(actions):
+        # Warms the diff cache so the Safe Mode approval preview is ready when the stream ends
+        writes = [a for a in actions if a.get("type") == "write" and "path" in a and "content" in a]
+        if writes:
+            st.session_state.background.submit(agent.project_manager.write_files, writes, dry_run=True)
+
+    def timed(deltas, attrs):
+        start = time.perf_counter()
+        received = 0
+        for delta in deltas:
+            if not received:
+                attrs["first_token_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            received += len(delta)
+            yield delta
+        attrs.update(bytes_out=received, tokens_out=(received + 3) // 4)
+
+    with tracer.span("model.call", bytes_in=len(message), tokens_in=estimate_tokens(message), streamed=True) as attrs:
+        response_data = render_agent_stream(timed(agent.send_message_stream(message), attrs),
+                                            on_action=None if safe_mode else speculation.offer,
+                                            on_actions=warm_previews if safe_mode else None)
+        attrs["actions"] = [a.get("type") for a in response_data.get("actions", [])]
+    speculation.confirm(response_data.get("actions", []))
+    response_data.update(speculation=speculation, streamed=True)
+    return response_data
+
+def run_actions(response_data, actions):
+    """Executes an auto-run batch, consuming tool results speculated during streaming."""
+    return execute_actions(actions, speculation=response_data.get("speculation"))
 
 # --- Action Handling ---
-def execute_actions(actions):
-    results = []
-    for action in actions:
-        if action["type"] == "command":
-            out = st.session_state.agent.project_manager.run_command(action["command"])
-            results.append(f"$ {action['command']}\n{out}")
-        elif action["type"] == "write":
-            res = st.session_state.agent.project_manager.write_file(action["path"], action["content"])
-            results.append(f"Writing {action['path']}: {res}")
-        elif action["type"] == "tool":
-            tool_name = action["tool_name"]
-            args = action.get("args", {})
-            
-            if tool_name == "get_weather":
-                out = st.session_state.agent.get_weather(**args)
-                results.append(f"Tool 'get_weather' output: {out}")
-            elif tool_name == "web_search":
-                out = st.session_state.agent.web_search(**args)
-                results.append(f"Tool 'web_search' output: {out}")
-            elif tool_name == "read_url":
-                out = st.session_state.agent.read_url(**args)
-                results.append(f"Tool 'read_url' output: {out}")
-            elif tool_name == "get_system_info":
-                out = st.session_state.agent.get_system_info()
-                results.append(f"Tool 'get_system_info' output: {out}")
-            else:
-                results.append(f"Unknown tool: {tool_name}")
-    return "\n".join(results)
+action_scheduler = ActionScheduler(max_workers=6)
+
+def preview_writes(actions):
+    """Attaches a diff to every write action, computed in one pass."""
+    writes = [a for a in actions if a["type"] == "write"]
+    if not writes:
+        return
+    res = st.session_state.agent.project_manager.write_files(writes, dry_run=True)
+    if res["success"]:
+        diffs = {r["path"]: r["diff"] for r in res["files"]}
+        for action in writes:
+            action["diff"] = diffs[action["path"]]
+
+def execute_actions(actions, agent=None, history=None, speculation=None):
+    # Session state is only reachable from the script thread, so resolve it
+    # here (or let the caller pass it) before handing work to the scheduler's pool.
+    agent = agent or st.session_state.agent
+    history = history or st.session_state.history
+    # Commands render live output, so they run on the script thread
+    return core_execute_actions(actions, agent, history, action_scheduler, speculation,
+                                on_command=render_command_stream)
 
 # Pending Actions (Safe Mode)
 if st.session_state.pending_actions:
@@ -84,16 +178,9 @@ if st.session_state.pending_actions:
     if approval is True: # Approved
         with st.spinner("Executing actions..."):
             output = execute_actions(st.session_state.pending_actions)
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": "✅ Actions executed successfully.",
-                "output": output
-            })
-            # Feed output back to agent
-            st.session_state.messages.append({
-                "role": "user",
-                "content": f"System Execution Result:\n{output}\n\nProceed with the next step."
-            })
+            # Show the result and feed the output back to the agent
+            record_results(st.session_state.messages, output, st.session_state.history,
+                           content="✅ Actions executed successfully.", hidden=False, blobs=blobs)
             st.session_state.pending_actions = []
             st.session_state.should_continue = True # Trigger loop
             st.rerun()
@@ -112,46 +199,25 @@ if st.session_state.should_continue and not st.session_state.pending_actions:
     with st.spinner("🤖 AI is thinking..."):
         # Get last message (System Result)
         last_msg = st.session_state.messages[-1]["content"]
-        response_data = st.session_state.agent.send_message(last_msg)
+        response_data = send_to_agent(last_msg)
         
-        thought = response_data.get("thought", "")
-        response_text = response_data.get("response", "")
         actions = response_data.get("actions", [])
-        
-        print(f"DEBUG: Thought: {thought}")
-        print(f"DEBUG: Response: {response_text}")
-        print(f"DEBUG: Actions: {actions}")
-        
-        full_response = f"_{thought}_\n\n{response_text}"
-        st.session_state.messages.append({"role": "assistant", "content": full_response})
+        st.session_state.messages.append(reply_message(response_data))
         
         if actions:
             # Check if all actions are tools
             all_tools = all(action["type"] == "tool" for action in actions)
 
             if safe_mode and not all_tools:
-                for action in actions:
-                    if action["type"] == "write":
-                        res = st.session_state.agent.project_manager.write_file(action["path"], action["content"], dry_run=True)
-                        if res["success"]:
-                            action["diff"] = res["diff"]
+                preview_writes(actions)
                 st.session_state.pending_actions = actions
                 st.session_state.should_continue = False # Pause for approval
                 st.rerun()
             else:
-                output = execute_actions(actions)
+                output = run_actions(response_data, actions)
                 
                 # Show output directly
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": output, # Show output directly
-                    "output": None
-                })
-                st.session_state.messages.append({
-                    "role": "user",
-                    "content": f"System Execution Result:\n{output}\n\nProceed with the next step.",
-                    "hidden": True
-                })
+                record_results(st.session_state.messages, output, st.session_state.history, blobs=blobs)
                 st.session_state.should_continue = True # Continue loop
                 st.rerun()
         else:
@@ -167,17 +233,16 @@ if prompt := st.chat_input("How can I help you?"):
 
     # Get Agent Response
     with st.spinner("Thinking..."):
-        response_data = st.session_state.agent.send_message(prompt)
+        response_data = send_to_agent(prompt)
     
-    thought = response_data.get("thought", "")
-    response_text = response_data.get("response", "")
     actions = response_data.get("actions", [])
 
     # Display Agent Response
-    full_response = f"_{thought}_\n\n{response_text}"
-    st.session_state.messages.append({"role": "assistant", "content": full_response})
-    with st.chat_message("assistant"):
-        st.markdown(full_response)
+    reply = reply_message(response_data)
+    st.session_state.messages.append(reply)
+    if not response_data.get("streamed"):
+        with st.chat_message("assistant"):
+            st.markdown(reply["content"])
 
     # Handle Actions
     if actions:
@@ -186,29 +251,16 @@ if prompt := st.chat_input("How can I help you?"):
         
         if safe_mode and not all_tools:
             # Calculate diffs for write actions
-            for action in actions:
-                if action["type"] == "write":
-                    res = st.session_state.agent.project_manager.write_file(action["path"], action["content"], dry_run=True)
-                    if res["success"]:
-                        action["diff"] = res["diff"]
+            preview_writes(actions)
             
             st.session_state.pending_actions = actions
             st.session_state.should_continue = False # Wait for approval
             st.rerun()
         else:
             # Auto-execute (Safe Mode OFF OR All Actions are Tools)
-            output = execute_actions(actions)
+            output = run_actions(response_data, actions)
             
             # Show output directly
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": output, # Show output directly
-                "output": None
-            })
-            st.session_state.messages.append({
-                "role": "user",
-                "content": f"System Execution Result:\n{output}\n\nProceed with the next step.",
-                "hidden": True
-            })
+            record_results(st.session_state.messages, output, st.session_state.history, blobs=blobs)
             st.session_state.should_continue = True # Start loop
             st.rerun()
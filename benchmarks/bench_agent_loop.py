@@ -0,0 +1,210 @@
+"""
+Headless, offline benchmark of the autonomous agent loop.
+
+Scripted sessions are replayed by the local mock model server
+(benchmarks/mock_model.py) and driven through the same components app.py
+uses: pinned-file context assembly, streamed reply parsing with speculative
+tools, the action executor, history compaction, the blob store and
+(with --prompt-cache) the provider-side prompt-prefix cache. Reports
+throughput (turns/sec, actions/sec, tool actions/sec), turn latency, memory
+growth and prompt tokens sent vs served from the cache.
+
+Usage:
+    python benchmarks/bench_agent_loop.py --sessions 4 --concurrency 2 --turns 20 --stream --latency 0.05
+    python benchmarks/bench_agent_loop.py --session recorded.json --output loop.json
+    python benchmarks/bench_agent_loop.py --prefill-tokens-per-sec 20000 --prompt-cache
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+# Keep caches, blobs and traces of the benchmark out of the user's cache
+os.environ.setdefault("AGENT_CACHE_DIR", tempfile.mkdtemp(prefix="bench_loop_cache_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.project_manager import ProjectManager
+from core.action_scheduler import ActionScheduler
+from core.action_executor import run_tool, execute_actions
+from core.context_assembler import ContextAssembler
+from core.history import HistoryManager
+from core.response_stream import ResponseStreamParser
+from core.speculation import SpeculativeExecutor
+from core.tool_registry import get_registry
+from core.agent_loop import prepare_message, reply_message, record_results
+from core.prompt_cache import PromptPrefixCache
+from mock_model import MockModelServer, MockAgent, MockCacheProvider, load_session
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+def synthetic_session(turns: int) -> list:
+    """A scripted session mixing writes, reads, commands and tools, ending with a reply without actions."""
+    script = []
+    for i in range(turns):
+        body = "".join(f"def f{i}_{n}():\n    return {n}\n" for n in range(50))
+        script.append({
+            "thought": f"Step {i}: write a module, inspect it and run a command.",
+            "response": f"Writing module_{i}.py and checking the workspace.",
+            "actions": [
+                {"type": "write", "path": f"src/module_{i}.py", "content": body},
+                {"type": "tool", "tool_name": "read_file", "args": {"path": f"src/module_{max(0, i - 1)}.py"}},
+                {"type": "tool", "tool_name": "tail_file", "args": {"path": f"src/module_{i}.py", "lines": 5}},
+                {"type": "tool", "tool_name": "get_system_info", "args": {}},
+                {"type": "command", "command": f"wc -l src/module_{i}.py && ls src | head -n 5"},
+            ],
+        })
+    script.append({"thought": "All steps done.", "response": "Finished.", "actions": []})
+    return script
+
+def run_session(url: str, workdir: str, name: str, stream: bool, max_turns: int, pool, cache_ttl: int = 0) -> dict:
+    pm = ProjectManager(os.path.join(workdir, name), persistent_shell=True)
+    prompt_cache = PromptPrefixCache(MockCacheProvider(url), "mock", ttl=cache_ttl) if cache_ttl else None
+    agent = MockAgent(url, pm, session=name, prompt_cache=prompt_cache)
+    agent.pinned_files = ["src/module_0.py"]
+    history = HistoryManager(os.path.join(workdir, "history", name))
+    assembler = ContextAssembler(pm)
+    scheduler = ActionScheduler()
+    tools = get_registry()
+    messages = []
+    latencies = []
+    actions_run = tools_run = 0
+
+    message = "Build the project step by step."
+    for _ in range(max_turns):
+        start = time.perf_counter()
+        outgoing, _ = prepare_message(agent, assembler, tools, message)
+
+        speculation = None
+        if stream:
+            parser = ResponseStreamParser()
+            speculation = SpeculativeExecutor(partial(run_tool, agent, history), pool)
+            for delta in agent.send_message_stream(outgoing):
+                for event in parser.feed(delta):
+                    if event[0] == "action":
+                        speculation.offer(event[2])
+            reply = parser.close()
+            speculation.confirm(reply.get("actions", []))
+        else:
+            reply = agent.send_message(outgoing)
+
+        messages.append(reply_message(reply))
+        actions = reply.get("actions", [])
+        if not actions:
+            latencies.append(time.perf_counter() - start)
+            break
+
+        output = execute_actions(actions, agent, history, scheduler, speculation)
+        actions_run += len(actions)
+        tools_run += sum(1 for a in actions if a["type"] == "tool")
+
+        message = record_results(messages, output, history)
+        history.compact(messages)
+        latencies.append(time.perf_counter() - start)
+
+    pm.close()
+    return {
+        "turns": len(latencies),
+        "actions": actions_run,
+        "tool_actions": tools_run,
+        "latencies": latencies,
+        "messages_retained": len(messages),
+        "message_bytes": len(json.dumps(messages)),
+        "prompt_cache": prompt_cache.usage if prompt_cache else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--session", default=None, help="Recorded session JSON (default: a synthetic script)")
+    parser.add_argument("--turns", type=int, default=20, help="Turns in the synthetic script")
+    parser.add_argument("--max-turns", type=int, default=200, help="Safety cap per session")
+    parser.add_argument("--sessions", type=int, default=2, help="Sessions to run")
+    parser.add_argument("--concurrency", type=int, default=1, help="Sessions run at the same time")
+    parser.add_argument("--stream", action="store_true", help="Use streamed replies (and speculative tools)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock model time to first byte (s)")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Mock streaming rate (0 = unthrottled)")
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=0.0,
+                        help="Mock cost of uncached prompt tokens (0 = free)")
+    parser.add_argument("--prompt-cache", action="store_true", help="Reference the system prompt by a cached handle")
+    parser.add_argument("--cache-ttl", type=int, default=3600, help="Prompt cache TTL in seconds")
+    parser.add_argument("--url", default=None, help="Use an already running mock server")
+    parser.add_argument("--dir", default=None, help="Directory for the session workspaces")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    turns = load_session(args.session) if args.session else synthetic_session(args.turns)
+    server = None
+    url = args.url
+    if url is None:
+        server = MockModelServer(turns, latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                                 prefill_tokens_per_sec=args.prefill_tokens_per_sec).start()
+        url = server.url
+    workdir = args.dir or tempfile.mkdtemp(prefix="bench_loop_")
+
+    tracemalloc.start()
+    mem_start = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as pool, ThreadPoolExecutor(max_workers=args.concurrency) as sessions:
+        futures = [
+            sessions.submit(run_session, url, workdir, f"session{i}", args.stream, args.max_turns, pool,
+                            args.cache_ttl if args.prompt_cache else 0)
+            for i in range(args.sessions)
+        ]
+        runs = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+    mem_end, mem_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if server is not None:
+        server.stop()
+
+    latencies = sorted(l for r in runs for l in r["latencies"])
+    total_turns = sum(r["turns"] for r in runs)
+    results = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "stream": args.stream,
+        "model_latency": args.latency,
+        "elapsed_s": elapsed,
+        "turns": total_turns,
+        "turns_per_sec": total_turns / elapsed,
+        "actions_per_sec": sum(r["actions"] for r in runs) / elapsed,
+        "tool_actions_per_sec": sum(r["tool_actions"] for r in runs) / elapsed,
+        "turn_p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "turn_p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0,
+        "memory_growth_kb": (mem_end - mem_start) / 1024,
+        "memory_peak_kb": mem_peak / 1024,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        "messages_retained": [r["messages_retained"] for r in runs],
+        "message_bytes": [r["message_bytes"] for r in runs],
+        "prompt_cache": args.prompt_cache,
+    }
+    caches = [r["prompt_cache"] for r in runs if r["prompt_cache"]]
+    if caches:
+        prompt_tokens = sum(c["prompt_tokens"] for c in caches)
+        cached_tokens = sum(c["cached_tokens"] for c in caches)
+        results.update(
+            prompt_tokens=prompt_tokens,
+            cached_tokens=cached_tokens,
+            uncached_tokens_per_turn=(prompt_tokens - cached_tokens) / max(total_turns, 1),
+            cache_uploads=sum(c["uploads"] for c in caches),
+            cache_hits=sum(c["hits"] for c in caches),
+        )
+    elif server is not None:
+        results.update(prompt_tokens=server.usage["prompt_tokens"], cached_tokens=0,
+                       uncached_tokens_per_turn=server.usage["prompt_tokens"] / max(total_turns, 1))
+    for key, value in results.items():
+        print(f"{key:<26} {value:.3f}" if isinstance(value, float) else f"{key:<26} {value}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares core.html_extract (streaming, early stop) against the old
+BeautifulSoup path used by read_url / fetch_page_meta, on a directory of
+saved pages. Without --corpus, a synthetic corpus is generated.
+
+Usage:
+    python benchmarks/bench_html_extract.py --corpus ~/saved_pages --repeat 5
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.html_extract import extract
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+CHUNK_SIZE = 16 * 1024
+
+def make_corpus(workdir: str, pages: int, size: int):
+    nav = "<nav>" + "".join(f"<a href='/p{i}'>Link {i}</a>" for i in range(200)) + "</nav>"
+    script = "<script>" + "var x = 1;" * 2000 + "</script>"
+    paragraph = "<p>" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20 + "</p>"
+    for n in range(pages):
+        body = [f"<html><head><title>Page {n}</title><meta name='description' content='Saved page {n}'>",
+                "<style>body { color: red; }</style></head><body>", nav, script]
+        while sum(len(part) for part in body) < size:
+            body.append(paragraph)
+        body.append("<footer>Copyright</footer></body></html>")
+        with open(os.path.join(workdir, f"page_{n}.html"), "w", encoding="utf-8") as f:
+            f.write("".join(body))
+
+def chunks(data: bytes):
+    for i in range(0, len(data), CHUNK_SIZE):
+        yield data[i:i + CHUNK_SIZE]
+
+def bs4_text(data: bytes, max_chars: int):
+    soup = BeautifulSoup(data.decode("utf-8", errors="replace"), "html.parser")
+    for tag in soup(["script", "style", "nav", "header", "footer", "noscript"]):
+        tag.decompose()
+    return " ".join(soup.get_text(separator=" ").split())[:max_chars]
+
+def bs4_meta(data: bytes):
+    soup = BeautifulSoup(data.decode("utf-8", errors="replace"), "html.parser")
+    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    desc_tag = soup.find("meta", attrs={"name": "description"})
+    return title, desc_tag.get("content") if desc_tag else None
+
+def measure(fn, pages: list, repeat: int):
+    """Returns (seconds per page, peak traced bytes) for fn over the corpus."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in pages:
+            fn(data)
+    elapsed = (time.perf_counter() - start) / (repeat * len(pages))
+    tracemalloc.start()
+    for data in pages:
+        fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=None, help="Directory of saved .html pages")
+    parser.add_argument("--pages", type=int, default=20, help="Synthetic pages to generate without --corpus")
+    parser.add_argument("--page-size", type=int, default=512 * 1024, help="Synthetic page size in bytes")
+    parser.add_argument("--max-chars", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = args.corpus
+    if corpus is None:
+        corpus = tempfile.mkdtemp(prefix="bench_html_extract_")
+        make_corpus(corpus, args.pages, args.page_size)
+    pages = []
+    for name in sorted(os.listdir(corpus)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(corpus, name), "rb") as f:
+                pages.append(f.read())
+    if not pages:
+        sys.exit(f"No .html pages found in {corpus}")
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.0f} KB average\n")
+
+    cases = [
+        ("stream text", lambda d: extract(chunks(d), want=("text",), max_chars=args.max_chars)),
+        ("stream meta", lambda d: extract(chunks(d), want=("title", "description"))),
+    ]
+    if BeautifulSoup is not None:
+        cases += [
+            ("bs4 text", lambda d: bs4_text(d, args.max_chars)),
+            ("bs4 meta", bs4_meta),
+        ]
+    else:
+        print("beautifulsoup4 not installed; skipping the baseline\n")
+
+    print(f"{'case':<14} {'per page':>12} {'peak memory':>14} {'bytes parsed':>14}")
+    for name, fn in cases:
+        elapsed, peak = measure(fn, pages, args.repeat)
+        if name.startswith("stream"):
+            parsed = sum(fn(d)["bytes_read"] for d in pages) / len(pages)
+        else:
+            parsed = sum(map(len, pages)) / len(pages)
+        print(f"{name:<14} {elapsed * 1000:>10.2f}ms {peak / 1024:>12.0f}KB {parsed / 1024:>12.0f}KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares tailing / line-range reads through core.line_index against the
+naive readlines() approach used by the old tail_file tool.
+
+Usage:
+    python benchmarks/bench_line_index.py --sizes 100M,1G,5G --lines 20
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.line_index import LineIndex
+from core.file_reader import tail_lines
+
+LINE = b"2024-01-01T00:00:00Z INFO worker-17 processed request id=0123456789abcdef status=200\n"
+
+def parse_size(text: str) -> int:
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def make_file(path: str, size: int):
+    block = LINE * (1024 * 1024 // len(LINE))
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            f.write(block)
+            written += len(block)
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def readlines_tail(path: str, lines: int):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        data = f.readlines()
+    return "".join(data[-lines:])
+
+def run(size: int, lines: int, workdir: str, skip_readlines: bool) -> dict:
+    path = os.path.join(workdir, f"bench_{size}.log")
+    make_file(path, size)
+    row = {"size": size}
+
+    if not skip_readlines:
+        row["readlines_tail"], _ = timed(lambda: readlines_tail(path, lines))
+    row["backward_tail"], _ = timed(lambda: tail_lines(path, lines))
+
+    index = LineIndex(path)
+    index._sidecar_path = lambda: os.path.join(workdir, "bench.idx") # keep the user's cache clean
+    row["index_build"], _ = timed(index.refresh)
+    row["index_tail"], _ = timed(lambda: index.tail(lines))
+    middle = index.line_count // 2
+    row["index_range"], _ = timed(lambda: index.read_lines(middle, middle + lines))
+
+    with open(path, 'ab') as f:
+        f.write(LINE * 1000)
+    row["index_append_refresh"], _ = timed(index.refresh)
+
+    warm = LineIndex(path)
+    warm._sidecar_path = index._sidecar_path
+    row["sidecar_warm_start"], _ = timed(warm.refresh)
+
+    os.remove(path)
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100M", help="Comma-separated file sizes (e.g. 100M,1G,5G)")
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--dir", default=None, help="Directory for the generated files")
+    parser.add_argument("--skip-readlines", action="store_true", help="Skip the readlines baseline (memory heavy)")
+    args = parser.parse_args()
+
+    workdir = args.dir or tempfile.mkdtemp(prefix="bench_line_index_")
+    columns = ["readlines_tail", "backward_tail", "index_build", "index_tail",
+               "index_range", "index_append_refresh", "sidecar_warm_start"]
+    print(f"{'size':>8} " + " ".join(f"{c:>20}" for c in columns))
+    for text in args.sizes.split(","):
+        row = run(parse_size(text), args.lines, workdir, args.skip_readlines)
+        cells = [f"{row[c] * 1000:>18.2f}ms" if c in row else f"{'-':>20}" for c in columns]
+        print(f"{text:>8} " + " ".join(cells))
+
+if __name__ == "__main__":
+    main()
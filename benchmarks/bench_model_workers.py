@@ -0,0 +1,135 @@
+"""
+Benchmarks the model worker pool (core/model_workers.py) against running
+the model inside the calling process, for 1 vs N concurrent sessions.
+
+Each session sends `--requests` texts one after another, as an agent
+calling the sentiment tool would. Modes:
+  inline   model loaded in this process, one text per call (the old tools)
+  pool     worker processes with micro-batching
+  nobatch  worker processes, one text per batch
+
+Uses a real transformers pipeline by default. --synthetic replaces it with
+a CPU-bound stand-in whose cost is a fixed per-call overhead plus a
+per-text cost, which is the shape that batching amortizes.
+
+Usage:
+    python benchmarks/bench_model_workers.py --sessions 1,4,16 --requests 20
+    python benchmarks/bench_model_workers.py --synthetic --call-ms 40 --item-ms 4 --workers 2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("AGENT_CACHE_DIR", tempfile.mkdtemp(prefix="bench_models_cache_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.model_workers import ModelWorkerPool, load_pipeline
+
+TEXTS = [
+    "The build finished quickly and every test passed.",
+    "This error message is confusing and the docs do not help at all.",
+    "Deployment went fine, although the rollback script is still slow.",
+    "I love how simple the new configuration format is.",
+]
+
+def _spin(ms: float):
+    # CPU time of this thread, so threads sharing the GIL cannot overlap their "compute"
+    end = time.thread_time() + ms / 1000
+    while time.thread_time() < end:
+        pass
+
+def load_synthetic(task: str):
+    """Stand-in model; costs are read from the environment so spawned workers see them."""
+    time.sleep(float(os.environ.get("BENCH_LOAD_S", "0")))
+    call_ms = float(os.environ.get("BENCH_CALL_MS", "30"))
+    item_ms = float(os.environ.get("BENCH_ITEM_MS", "3"))
+
+    def run(texts, **kwargs):
+        _spin(call_ms + item_ms * len(texts))
+        return [{"label": "POSITIVE" if len(t) % 2 else "NEGATIVE", "score": 0.9} for t in texts]
+    return run
+
+def run_sessions(call, sessions: int, requests: int) -> dict:
+    latencies = []
+
+    def session(n):
+        own = []
+        for i in range(requests):
+            start = time.perf_counter()
+            call(TEXTS[(n + i) % len(TEXTS)])
+            own.append(time.perf_counter() - start)
+        return own
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for own in pool.map(session, range(sessions)):
+            latencies.extend(own)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1,4,16", help="Comma-separated concurrent session counts")
+    parser.add_argument("--requests", type=int, default=20, help="Texts sent by each session")
+    parser.add_argument("--modes", default="inline,pool,nobatch")
+    parser.add_argument("--task", default="sentiment", choices=["sentiment", "summarize"])
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=0.0)
+    parser.add_argument("--synthetic", action="store_true", help="Use the CPU-bound stand-in model")
+    parser.add_argument("--call-ms", type=float, default=30.0, help="Synthetic fixed cost per forward pass")
+    parser.add_argument("--item-ms", type=float, default=3.0, help="Synthetic cost per text")
+    parser.add_argument("--load-s", type=float, default=1.0, help="Synthetic model load time")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    os.environ.update(BENCH_CALL_MS=str(args.call_ms), BENCH_ITEM_MS=str(args.item_ms), BENCH_LOAD_S=str(args.load_s))
+    loader = "bench_model_workers:load_synthetic" if args.synthetic else "core.model_workers:load_pipeline"
+    factory = load_synthetic if args.synthetic else load_pipeline
+    counts = [int(c) for c in args.sessions.split(",")]
+    results = {"task": args.task, "workers": args.workers, "synthetic": args.synthetic, "runs": {}}
+
+    for mode in args.modes.split(","):
+        start = time.perf_counter()
+        if mode == "inline":
+            model = factory(args.task)
+            call = lambda text: model([text])[0]
+            pool = None
+        else:
+            pool = ModelWorkerPool(workers=args.workers, max_batch=args.max_batch if mode == "pool" else 1,
+                                   max_wait=args.max_wait_ms / 1000, loader=loader, preload=(args.task,)).start()
+            call = lambda text: pool.submit(args.task, text).result()
+        call(TEXTS[0]) # Load the model outside the measurement (workers preload it at start)
+        cold = time.perf_counter() - start
+        print(f"== {mode} (ready in {cold:.2f}s)")
+
+        runs = results["runs"][mode] = {"ready_s": cold}
+        for sessions in counts:
+            if pool is not None:
+                pool.stats.update(requests=0, batches=0)
+            run = run_sessions(call, sessions, args.requests)
+            if pool is not None:
+                run["mean_batch"] = pool.mean_batch()
+            runs[sessions] = run
+            print(f"  {sessions:>3} sessions  {run['requests_per_sec']:>8.1f} req/s  p50 {run['p50_ms']:>8.1f} ms  "
+                  f"p95 {run['p95_ms']:>8.1f} ms" + (f"  batch {run['mean_batch']:.1f}" if pool else ""))
+        if pool is not None:
+            pool.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
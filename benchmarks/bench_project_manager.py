@@ -0,0 +1,201 @@
+"""
+Benchmarks ProjectManager operations on synthetic workspaces and checks
+the results against a stored baseline.
+
+For each workspace size it measures list_files (cold and warm index),
+find_files, read_file (small, large/truncated, line range), write_file
+(plain and dry-run diff of a large file), run_command spawn overhead
+(persistent shell vs fresh process) and zipping the workspace (shutil
+baseline, parallel archiver cold and with its compressed-entry cache warm).
+
+Usage:
+    python benchmarks/bench_project_manager.py --files 10k,100k --output results.json
+
+Generated workspaces can be reused across runs (--dir); writes made by the
+benchmark go to a scratch directory that is removed before the next step,
+so every run measures the same tree.
+
+Timings depend on the machine, so no baseline is committed. Record one on
+the machine that will run the checks (e.g. before a change, on the same
+CI runner), then compare later runs with the same --files and parameters:
+
+    python benchmarks/bench_project_manager.py --files 10k --save-baseline bench_baseline.json
+    python benchmarks/bench_project_manager.py --files 10k --baseline bench_baseline.json --tolerance 0.25
+
+Exits with status 1 if any metric is slower than baseline * (1 + tolerance)
+and by more than --min-delta milliseconds (to ignore noise on tiny timings).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+# Keep indexes and caches of the synthetic workspaces out of the user's cache
+os.environ.setdefault("AGENT_CACHE_DIR", tempfile.mkdtemp(prefix="bench_pm_cache_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.project_manager import ProjectManager
+
+FILES_PER_DIR = 100
+SMALL_FILE = "print('hello world')\n" * 20
+
+def parse_count(text: str) -> int:
+    units = {"K": 1000, "M": 1000 ** 2}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def make_workspace(root: str, files: int, depth: int, large_size: int):
+    """Creates `files` small files in a fan-out tree, one deep chain and one large file."""
+    marker = f"{root}.params" # Kept next to the workspace so it is not measured
+    params = f"{files}:{depth}:{large_size}"
+    if os.path.exists(marker) and open(marker).read() == params:
+        return # Reuse a workspace generated with the same parameters
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root)
+
+    dirs = (files + FILES_PER_DIR - 1) // FILES_PER_DIR
+    written = 0
+    for d in range(dirs):
+        folder = os.path.join(root, f"pkg{d // 100:03d}", f"mod{d % 100:02d}")
+        os.makedirs(folder, exist_ok=True)
+        for n in range(min(FILES_PER_DIR, files - written)):
+            with open(os.path.join(folder, f"file{n:03d}.py"), 'w') as f:
+                f.write(SMALL_FILE)
+        written += FILES_PER_DIR
+
+    deep = os.path.join(root, *[f"level{i}" for i in range(depth)])
+    os.makedirs(deep, exist_ok=True)
+    with open(os.path.join(deep, "leaf.txt"), 'w') as f:
+        f.write("leaf\n")
+
+    line = "x = 'some reasonably long line of python source code for diffing'\n"
+    with open(os.path.join(root, "large.py"), 'w') as f:
+        f.write(line * (large_size // len(line)))
+
+    with open(marker, 'w') as f:
+        f.write(params)
+
+def timed(fn, repeat: int = 1) -> float:
+    """Median wall time of fn over `repeat` runs, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def run(root: str, repeat: int, commands: int) -> dict:
+    metrics = {}
+
+    pm = ProjectManager(root, persistent_shell=True)
+    pm.index.invalidate()
+    metrics["list_files_cold"] = timed(pm.list_files)
+    metrics["list_files_warm"] = timed(pm.list_files, repeat)
+    metrics["list_files_deep"] = timed(lambda: pm.list_files(max_depth=64), repeat)
+    metrics["find_files"] = timed(lambda: pm.find_files("file00*.py"), repeat)
+
+    small = os.path.relpath(next(
+        os.path.join(dirpath, names[0]) for dirpath, _, names in os.walk(root) if names and dirpath != root
+    ), root)
+    metrics["read_file_small"] = timed(lambda: pm.read_file(small), repeat)
+    metrics["read_file_large"] = timed(lambda: pm.read_file("large.py"), repeat)
+    metrics["read_file_range"] = timed(lambda: pm.read_file("large.py", start_line=5000, end_line=5100), repeat)
+
+    large = open(os.path.join(root, "large.py")).read()
+    edited = large.replace("x = ", "y = ", 1)
+    scratch = f"_bench_scratch_{os.getpid()}"
+    try:
+        metrics["write_file_small"] = timed(lambda: pm.write_file(f"{scratch}/small.py", SMALL_FILE), repeat)
+    finally:
+        shutil.rmtree(os.path.join(root, scratch), ignore_errors=True)
+    metrics["write_file_dry_run_large"] = timed(lambda: pm.write_file("large.py", edited, dry_run=True))
+    metrics["write_file_dry_run_cached"] = timed(lambda: pm.write_file("large.py", edited, dry_run=True), repeat)
+
+    pm.run_command("true") # Start the session outside the measurement
+    metrics["run_command_persistent"] = timed(lambda: [pm.run_command("true") for _ in range(commands)]) / commands
+    runner = pm.command_runner
+    metrics["run_command_fresh"] = timed(lambda: [runner.run("true") for _ in range(commands)]) / commands
+    metrics["run_commands_parallel"] = timed(lambda: pm.run_commands(["true"] * commands)) / commands
+
+    archive_dir = tempfile.mkdtemp(prefix="bench_pm_zip_")
+    dest = os.path.join(archive_dir, "ws.zip")
+    metrics["zip_make_archive"] = timed(lambda: shutil.make_archive(os.path.join(archive_dir, "ref"), "zip", root))
+    metrics["zip_workspace"] = timed(lambda: pm.archive_workspace(dest))
+    metrics["zip_workspace_cached"] = timed(lambda: pm.archive_workspace(dest), repeat)
+    shutil.rmtree(archive_dir, ignore_errors=True)
+
+    pm.close()
+    return metrics
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """Returns (size, metric, baseline ms, current ms) for every regression."""
+    regressions = []
+    for size, metrics in results["runs"].items():
+        for name, value in metrics.items():
+            base = baseline.get("runs", {}).get(size, {}).get(name)
+            if base is not None and value > base * (1 + tolerance) and value - base > min_delta:
+                regressions.append((size, name, base, value))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", default="10k", help="Comma-separated workspace sizes in files (e.g. 10k,100k,1M)")
+    parser.add_argument("--depth", type=int, default=50, help="Depth of the deep directory chain")
+    parser.add_argument("--large-file", type=int, default=20 * 1024 * 1024, help="Size of the large file in bytes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--commands", type=int, default=50, help="Commands per spawn-overhead measurement")
+    parser.add_argument("--dir", default=None, help="Directory for (reusable) generated workspaces")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--save-baseline", default=None, help="Write results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="Ignore slowdowns smaller than this many ms")
+    args = parser.parse_args()
+    if args.baseline and not os.path.exists(args.baseline):
+        sys.exit(f"No baseline at {args.baseline}; record one with --save-baseline {args.baseline}")
+
+    workdir = args.dir or tempfile.mkdtemp(prefix="bench_pm_")
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"depth": args.depth, "large_file": args.large_file, "repeat": args.repeat},
+        "runs": {},
+    }
+    for text in args.files.split(","):
+        count = parse_count(text)
+        root = os.path.join(workdir, f"ws_{count}")
+        start = time.perf_counter()
+        make_workspace(root, count, args.depth, args.large_file)
+        print(f"== {text} files (generated in {time.perf_counter() - start:.1f}s)")
+        metrics = run(root, args.repeat, args.commands)
+        results["runs"][text] = metrics
+        for name, value in metrics.items():
+            print(f"  {name:<28} {value:>12.3f} ms")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key in ("params", "platform", "python"):
+            if baseline.get(key) != results[key]:
+                print(f"WARNING: baseline {key} differs ({baseline.get(key)} vs {results[key]}); timings may not compare")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        for size, name, base, value in regressions:
+            print(f"REGRESSION {size} {name}: {base:.3f} ms -> {value:.3f} ms ({value / base - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Local stand-in for the model API.
+
+MockModelServer replays recorded agent replies ({"thought", "response",
+"actions"}) over HTTP with configurable latency, either whole
+(POST /v1/send) or streamed as JSON text deltas (POST /v1/stream).
+MockAgent is a client with the agent interface app.py uses (send_message,
+send_message_stream, pinned_files, project_manager, ...), and
+RecordingAgent wraps a real agent to capture a session for replay.
+
+The server also stands in for provider-side prompt caching: prefixes
+uploaded with MockCacheProvider (POST /v1/caches) can be referenced by
+handle instead of being sent with each request, and expire after their
+TTL. Uncached prompt tokens cost `prefill_tokens_per_sec` of extra latency.
+
+Usage:
+    python benchmarks/mock_model.py --session session.json --port 8765 --latency 0.3 --tokens-per-sec 80
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import uuid
+import threading
+import http.client
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def load_session(path: str) -> list:
+    """A session file is {"turns": [reply, ...]} or a bare list of replies."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data["turns"] if isinstance(data, dict) else data
+
+class MockModelServer:
+    """
+    Replays `turns` in order (per client session id), after `latency`
+    seconds to first byte. Streamed replies are sent in chunks of
+    `chunk_chars` characters at roughly `tokens_per_sec` (4 chars a token).
+    """
+
+    def __init__(self, turns: list, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 tokens_per_sec: float = 0.0, chunk_chars: int = 16, prefill_tokens_per_sec: float = 0.0):
+        self.turns = turns
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.chunk_chars = chunk_chars
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        self._positions = {} # session id -> next turn
+        self._caches = {} # handle -> (content, expires_at)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.usage = {"prompt_tokens": 0, "cached_tokens": 0, "cache_uploads": 0}
+
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, payload, headers=()):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.startswith("/v1/caches"):
+                    status, payload = server.cache_request(self.path, body)
+                    self.send_json(status, payload)
+                    return
+                if self.path not in ("/v1/send", "/v1/stream"):
+                    self.send_error(404)
+                    return
+
+                cached = server.cached_content(body.get("cached_content"))
+                if cached is None:
+                    self.send_json(404, {"error": "cached content not found or expired"})
+                    return
+                cached_tokens = len(cached) // 4
+                prompt_tokens = cached_tokens + (len(body.get("system", "")) + len(body.get("message", ""))) // 4
+                with server._lock:
+                    server.usage["prompt_tokens"] += prompt_tokens
+                    server.usage["cached_tokens"] += cached_tokens
+                usage = (("X-Prompt-Tokens", str(prompt_tokens)), ("X-Cached-Tokens", str(cached_tokens)))
+
+                reply = server.next_turn(body.get("session", "default"))
+                prefill = (prompt_tokens - cached_tokens) / server.prefill_tokens_per_sec if server.prefill_tokens_per_sec else 0
+                time.sleep(server.latency + prefill)
+                if self.path == "/v1/send":
+                    self.send_json(200, reply, usage)
+                else:
+                    reply = json.dumps(reply)
+                    self.send_response(200)
+                    for name, value in usage:
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "text/plain; charset=utf-8")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    delay = server.chunk_chars / 4 / server.tokens_per_sec if server.tokens_per_sec else 0
+                    for i in range(0, len(reply), server.chunk_chars):
+                        data = reply[i:i + server.chunk_chars].encode("utf-8")
+                        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                        self.wfile.flush()
+                        if delay:
+                            time.sleep(delay)
+                    self.wfile.write(b"0\r\n\r\n")
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_turn(self, session: str) -> dict:
+        with self._lock:
+            self.requests += 1
+            position = self._positions.get(session, 0)
+            self._positions[session] = position + 1
+        if position < len(self.turns):
+            return self.turns[position]
+        return {"thought": "Session script finished.", "response": "Done.", "actions": []}
+
+    def cached_content(self, handle: str):
+        """The cached prefix for a handle ("" for none), or None if it is unknown or expired."""
+        if not handle:
+            return ""
+        with self._lock:
+            content, expires = self._caches.get(handle, (None, 0))
+        return content if time.time() < expires else None
+
+    def cache_request(self, path: str, body: dict):
+        now = time.time()
+        with self._lock:
+            if path == "/v1/caches":
+                handle = f"cachedContents/{uuid.uuid4().hex[:12]}"
+                self._caches[handle] = (body.get("content", ""), now + body.get("ttl", 3600))
+                self.usage["cache_uploads"] += 1
+                return 200, {"name": handle, "expires_at": self._caches[handle][1]}
+            content, expires = self._caches.get(body.get("name"), (None, 0))
+            if content is None or now >= expires:
+                return 404, {"error": "cached content not found or expired"}
+            if path == "/v1/caches/extend":
+                self._caches[body["name"]] = (content, now + body.get("ttl", 3600))
+                return 200, {"expires_at": now + body.get("ttl", 3600)}
+            if path == "/v1/caches/delete":
+                del self._caches[body["name"]]
+                return 200, {}
+        return 404, {"error": f"unknown endpoint {path}"}
+
+    def reset(self, session: str = None):
+        with self._lock:
+            if session is None:
+                self._positions.clear()
+            else:
+                self._positions.pop(session, None)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def _post_json(url: str, path: str, payload: dict):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+    conn.request("POST", path, body=json.dumps(payload), headers={"Content-Type": "application/json"})
+    return conn, conn.getresponse()
+
+class MockCacheProvider:
+    """Prompt-cache provider (see core/prompt_cache.py) backed by a MockModelServer."""
+
+    min_tokens = 0
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def _call(self, path: str, payload: dict) -> dict:
+        conn, response = _post_json(self.url, path, payload)
+        try:
+            data = json.loads(response.read() or b"{}")
+        finally:
+            conn.close()
+        if response.status != 200:
+            raise KeyError(data.get("error", response.status))
+        return data
+
+    def create(self, model: str, content: str, ttl: int):
+        data = self._call("/v1/caches", {"model": model, "content": content, "ttl": ttl})
+        return data["name"], data["expires_at"]
+
+    def extend(self, name: str, ttl: int) -> float:
+        return self._call("/v1/caches/extend", {"name": name, "ttl": ttl})["expires_at"]
+
+    def delete(self, name: str):
+        self._call("/v1/caches/delete", {"name": name})
+
+class MockAgent:
+    """
+    Agent backed by a MockModelServer; drop-in for the app's agent in benchmarks.
+    The system_prompt is sent with every request, or referenced by handle
+    when a prompt_cache (core.prompt_cache.PromptPrefixCache) is set.
+    """
+
+    def __init__(self, url: str, project_manager, model_name: str = "mock", session: str = "default",
+                 system_prompt: str = None, prompt_cache=None):
+        self.url = url
+        self.project_manager = project_manager
+        self.model_name = model_name
+        self.session = session
+        self.pinned_files = []
+        self.system_prompt = system_prompt
+        self.prompt_cache = prompt_cache
+
+    def _post(self, path: str, message: str):
+        for attempt in range(2):
+            body = {"message": message, "session": self.session}
+            handle = None
+            if self.system_prompt and self.prompt_cache is not None:
+                handle = self.prompt_cache.handle(self.system_prompt)
+            if handle:
+                body["cached_content"] = handle
+            elif self.system_prompt:
+                body["system"] = self.system_prompt
+            conn, response = _post_json(self.url, path, body)
+            if response.status == 404 and handle and attempt == 0:
+                # The server dropped the prefix (e.g. restarted); upload it again
+                response.read()
+                conn.close()
+                self.prompt_cache.invalidate()
+                continue
+            if self.prompt_cache is not None:
+                self.prompt_cache.record(int(response.getheader("X-Prompt-Tokens", 0)),
+                                         int(response.getheader("X-Cached-Tokens", 0)))
+            return conn, response
+
+    def send_message(self, message: str) -> dict:
+        conn, response = self._post("/v1/send", message)
+        try:
+            return json.loads(response.read())
+        finally:
+            conn.close()
+
+    def send_message_stream(self, message: str):
+        """Yields the reply as raw JSON text deltas."""
+        conn, response = self._post("/v1/stream", message)
+        try:
+            while True:
+                data = response.read1(8192)
+                if not data:
+                    break
+                yield data.decode("utf-8", errors="replace")
+        finally:
+            conn.close()
+
+    def get_system_info(self) -> str:
+        return f"{platform.system()} {platform.release()} (Python {platform.python_version()})"
+
+class RecordingAgent:
+    """Wraps a real agent and appends each send_message reply to a session file for replay."""
+
+    def __init__(self, agent, path: str):
+        self.agent = agent
+        self.path = path
+        self.turns = load_session(path) if os.path.exists(path) else []
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+    def send_message(self, message: str) -> dict:
+        reply = self.agent.send_message(message)
+        self.turns.append({k: reply.get(k) for k in ("thought", "response", "actions")})
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"turns": self.turns}, f, indent=2)
+        return reply
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--session", required=True, help="Recorded session JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the first byte")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Streaming rate (0 = as fast as possible)")
+    parser.add_argument("--chunk-chars", type=int, default=16)
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=0.0,
+                        help="Cost of uncached prompt tokens (0 = free)")
+    args = parser.parse_args()
+
+    server = MockModelServer(load_session(args.session), args.host, args.port, args.latency,
+                             args.tokens_per_sec, args.chunk_chars, args.prefill_tokens_per_sec)
+    print(f"Serving {len(server.turns)} turns on {server.url}", file=sys.stderr)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from core.command_runner import format_result
+from core.action_scheduler import ActionScheduler, group_writes
+from core.tracing import get_tracer
+from core.tool_registry import get_registry, ToolArgumentError
+
+def write_batch(project_manager, writes):
+    """Writes consecutive write actions as one atomic transaction."""
+    res = project_manager.write_files(writes)
+    if not res["success"]:
+        return [f"Writing {w['path']}: failed, whole batch rolled back ({res['error']})" for w in writes]
+    return [f"Writing {r['path']}: {r}" for r in res["files"]]
+
+def run_tool(agent, history, action):
+    """Validates the action's arguments against the tool's schema and runs it."""
+    tool_name = action["tool_name"]
+    registry = get_registry()
+    if tool_name not in registry:
+        return f"Unknown tool: {tool_name}"
+    try:
+        out = registry.invoke(tool_name, action.get("args"), agent, history)
+    except ToolArgumentError as e:
+        out = f"Error: {e}"
+    return f"Tool '{tool_name}' output: {out}"
+
+def _consume(command, stream):
+    for _ in stream:
+        pass
+
+def execute_actions(actions, agent, history, scheduler: ActionScheduler = None, speculation=None, on_command=None):
+    """
+    Runs a batch of agent actions and returns their combined output.
+    Independent actions run in parallel on the scheduler; consecutive writes
+    are committed as one transaction, and consecutive "parallel" commands run
+    concurrently in fresh shells. Commands run on the calling thread and
+    their live output is handed to on_command(command, stream) (the UI
+    renders it; by default it is just drained). Tool results speculated
+    during streaming are taken from `speculation` when available.
+    """
+    scheduler = scheduler or ActionScheduler()
+    on_command = on_command or _consume
+    project_manager = agent.project_manager
+    tracer = get_tracer()
+
+    def run_unit(unit):
+        name = f"action.{unit['type']}" + (f".{unit['tool_name']}" if unit["type"] == "tool" else "")
+        with tracer.span(name) as attrs:
+            results = run_action(unit)
+            attrs["bytes_out"] = sum(len(r) for r in results)
+            return results
+
+    def run_action(unit):
+        if unit["type"] == "write_batch":
+            return write_batch(project_manager, unit["actions"])
+        if unit["type"] == "command":
+            stream = project_manager.stream_command(unit["command"], unit.get("timeout"))
+            on_command(unit["command"], stream)
+            out = format_result(stream.wait())
+            return [f"$ {unit['command']}\n{out}"]
+        if unit["type"] == "command_group":
+            commands = [a["command"] for a in unit["actions"]]
+            timeout = max(a.get("timeout") or 0 for a in unit["actions"]) or None
+            outs = project_manager.run_commands(commands, timeout, on_command=on_command)
+            return [f"$ {command}\n{out}" for command, out in zip(commands, outs)]
+        if unit["type"] == "tool":
+            future = speculation.take(unit) if speculation is not None else None
+            return [future.result() if future is not None else run_tool(agent, history, unit)]
+        return []
+
+    units = group_writes(actions)
+    unit_results = scheduler.run(units, run_unit, inline=lambda unit: unit["type"] in ("command", "command_group"))
+
+    results = []
+    for unit, res in zip(units, unit_results):
+        if isinstance(res, Exception):
+            res = [f"Action {unit['type']} failed: {res}"]
+        results.extend(res)
+    return "\n".join(results)
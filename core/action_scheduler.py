@@ -0,0 +1,130 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from core.tool_registry import get_registry
+
+# Footprint wildcard: the action may touch anything in the workspace.
+ANY_PATH = "*"
+
+# Tools with no workspace side effects; they never conflict with other actions.
+READ_ONLY_TOOLS = get_registry().read_only()
+
+def _norm(path: str) -> str:
+    return os.path.normpath(path).replace(os.sep, "/")
+
+def footprint(action: dict):
+    """
+    Returns (reads, writes) path sets for an action (or a grouped write batch).
+    ANY_PATH means the whole workspace, e.g. for shell commands.
+    """
+    kind = action["type"]
+    if kind == "write":
+        return set(), {_norm(action["path"])}
+    if kind == "write_batch":
+        return set(), {_norm(a["path"]) for a in action["actions"]}
+    if kind in ("command", "command_group"):
+        return {ANY_PATH}, {ANY_PATH}
+    if kind == "tool":
+        if action.get("tool_name") in READ_ONLY_TOOLS:
+            return set(), set()
+        args = action.get("args")
+        path = args.get("path") if isinstance(args, dict) else None
+        if action.get("tool_name") in ("read_file", "tail_file") and path:
+            return {_norm(path)}, set()
+        # Unknown tools are treated like commands
+        return {ANY_PATH}, {ANY_PATH}
+    return {ANY_PATH}, {ANY_PATH}
+
+def _overlap(a: set, b: set) -> bool:
+    if not a or not b:
+        return False
+    return ANY_PATH in a or ANY_PATH in b or not a.isdisjoint(b)
+
+def conflicts(first: dict, second: dict) -> bool:
+    """True if second must wait for first (write/write or read/write overlap)."""
+    reads_a, writes_a = footprint(first)
+    reads_b, writes_b = footprint(second)
+    return _overlap(writes_a, writes_b) or _overlap(writes_a, reads_b) or _overlap(reads_a, writes_b)
+
+def group_writes(actions: list) -> list:
+    """
+    Merges runs of consecutive write actions into single 'write_batch' units
+    and runs of consecutive commands marked "parallel" (no shell state, so
+    they can run side by side in fresh shells) into 'command_group' units.
+    """
+    units = []
+    for action in actions:
+        if action["type"] == "write":
+            kind = "write_batch"
+        elif action["type"] == "command" and action.get("parallel"):
+            kind = "command_group"
+        else:
+            units.append(action)
+            continue
+        if units and units[-1]["type"] == kind:
+            units[-1]["actions"].append(action)
+        else:
+            units.append({"type": kind, "actions": [action]})
+    return units
+
+class ActionScheduler:
+    """
+    Runs agent actions as a dependency graph.
+
+    An action depends on every earlier action whose footprint conflicts with
+    it, so writes to one path (and anything after a shell command) stay
+    ordered while independent actions, like several network tools, run in
+    parallel on a bounded thread pool. Results always come back in action
+    order regardless of completion order.
+    """
+
+    def __init__(self, max_workers: int = 6):
+        self.max_workers = max_workers
+
+    def plan(self, actions: list) -> list:
+        """Returns, for each action, the set of indices it must wait for."""
+        return [
+            {i for i in range(j) if conflicts(actions[i], actions[j])}
+            for j in range(len(actions))
+        ]
+
+    def run(self, actions: list, execute, inline=None) -> list:
+        """
+        Executes every action with execute(action) and returns their results in order.
+        Actions for which inline(action) is true run on the calling thread
+        (e.g. ones that render UI), while the pool keeps working on others.
+        If an action raises, the exception object is returned as its result.
+        """
+        deps = self.plan(actions)
+        results = [None] * len(actions)
+        done, started = set(), set()
+        running = {}
+
+        def call(i):
+            try:
+                return execute(actions[i])
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while len(done) < len(actions):
+                ready = [i for i in range(len(actions)) if i not in started and deps[i] <= done]
+                inline_ready = []
+                for i in ready:
+                    started.add(i)
+                    if inline is not None and inline(actions[i]):
+                        inline_ready.append(i)
+                    else:
+                        running[pool.submit(call, i)] = i
+
+                for i in inline_ready:
+                    results[i] = call(i)
+                    done.add(i)
+                if inline_ready:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    results[i] = future.result()
+                    done.add(i)
+        return results
@@ -0,0 +1,52 @@
+from core.blob_store import get_blob_store, preview, INLINE_LIMIT
+from core.prompts import system_prompt
+
+# Shared steps of one autonomous-loop turn. app.py and the headless driver in
+# benchmarks/bench_agent_loop.py both call these, so the benchmark measures
+# the same bookkeeping the UI does.
+
+def prepare_message(agent, assembler, registry, message: str, tools_sent: str = None):
+    """
+    Prepends the pinned-file context (full, as diffs, or shrunk to fit the
+    budget) to a message. Agents with a system_prompt attribute get the
+    instructions + tool catalogue there (a prompt_cache may reference it by
+    handle); others get the catalogue inline whenever its hash differs from
+    tools_sent. Returns (message, hash of the catalogue the agent has seen).
+    """
+    context = assembler.assemble(agent.pinned_files)
+    message = f"{context}\n\n{message}" if context else message
+    if hasattr(agent, "system_prompt"):
+        agent.system_prompt = system_prompt(registry)
+    elif tools_sent != registry.prompt_hash():
+        # The agent keeps the conversation, so the catalogue is only re-sent when it changes
+        message = f"## Available tools\n\n{registry.prompt_block()}\n\n{message}"
+        tools_sent = registry.prompt_hash()
+    return message, tools_sent
+
+def reply_message(reply: dict) -> dict:
+    """The chat message shown for an agent reply."""
+    return {"role": "assistant", "content": f"_{reply.get('thought', '')}_\n\n{reply.get('response', '')}"}
+
+def result_message(output: str, content: str = None, blobs=None) -> dict:
+    """Visible message for an execution result (content defaults to the output itself)."""
+    msg = {"role": "assistant", "content": content or output, "output": output if content else None, "kind": "result"}
+    if len(output) >= INLINE_LIMIT:
+        # Large outputs are kept once on disk; the message only holds a handle and a preview
+        msg["output"] = None
+        msg["output_ref"] = (blobs or get_blob_store()).put(output)
+        if not content:
+            msg["content"] = f"{preview(output)}\n\n_[... {len(output)} chars in total, see View Output]_"
+    return msg
+
+def record_results(messages: list, output: str, history, content: str = None, hidden: bool = True, blobs=None) -> str:
+    """
+    Appends the visible result and the (bounded) feedback for the agent to
+    messages. Returns the feedback text, i.e. the next message to send.
+    """
+    messages.append(result_message(output, content, blobs))
+    feedback = f"System Execution Result:\n{history.inline(output)}\n\nProceed with the next step."
+    msg = {"role": "user", "content": feedback, "kind": "result"}
+    if hidden:
+        msg["hidden"] = True
+    messages.append(msg)
+    return feedback
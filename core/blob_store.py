@@ -0,0 +1,107 @@
+import os
+import time
+import zlib
+import uuid
+import hashlib
+import threading
+from core.config import CACHE_DIR
+
+BLOB_DIR = os.path.join(CACHE_DIR, "blobs")
+# Outputs at least this large are stored as blobs instead of inline in messages.
+INLINE_LIMIT = 4 * 1024
+MAX_BYTES = 512 * 1024 * 1024
+PREVIEW_CHARS = 600
+
+class BlobStore:
+    """
+    Content-addressed store for large outputs: sha256(content) -> zlib-compressed
+    bytes under root/<2-char prefix>/<hash>. Identical outputs are stored once,
+    writes are atomic, and the oldest blobs are pruned past max_bytes.
+    """
+
+    def __init__(self, root: str = BLOB_DIR, max_bytes: int = MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, handle: str) -> str:
+        return os.path.join(self.root, handle[:2], handle)
+
+    def put(self, content) -> str:
+        """Stores content (str or bytes) and returns its handle."""
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        handle = hashlib.sha256(data).hexdigest()
+        path = self._path(handle)
+        if os.path.exists(path):
+            os.utime(path) # Keep recently used blobs out of pruning
+            return handle
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(zlib.compress(data, 6))
+        os.replace(tmp, path)
+        return handle
+
+    def get_bytes(self, handle: str):
+        """Returns the stored bytes, or None if the handle is unknown."""
+        try:
+            with open(self._path(handle), 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def get(self, handle: str):
+        data = self.get_bytes(handle)
+        return None if data is None else data.decode("utf-8", errors="replace")
+
+    def exists(self, handle: str) -> bool:
+        return os.path.exists(self._path(handle))
+
+    def prune(self, min_age: float = 0) -> int:
+        """
+        Deletes least recently used blobs until the store fits max_bytes. Blobs
+        used within the last min_age seconds are kept even past the limit (a
+        concurrent reader may be about to open them). Returns the number removed.
+        """
+        cutoff = time.time() - min_age
+        blobs = []
+        for prefix in os.listdir(self.root):
+            folder = os.path.join(self.root, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                try:
+                    st = os.stat(os.path.join(folder, name))
+                except OSError:
+                    continue
+                blobs.append((st.st_mtime, st.st_size, os.path.join(folder, name)))
+        total = sum(size for _, size, _ in blobs)
+        removed = 0
+        for mtime, size, path in sorted(blobs):
+            if total <= self.max_bytes or mtime > cutoff:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+def preview(content: str, limit: int = PREVIEW_CHARS) -> str:
+    """First part of an output, cut at a line boundary where possible."""
+    if len(content) <= limit:
+        return content
+    cut = content.rfind("\n", 0, limit)
+    return content[:cut if cut > limit // 2 else limit]
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_blob_store() -> BlobStore:
+    """Returns the process-wide BlobStore (shared by every session)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
@@ -0,0 +1,206 @@
+import os
+import queue
+import signal
+import asyncio
+import threading
+from collections import deque
+
+DEFAULT_TIMEOUT = 30
+# Only the most recent lines of each stream are retained.
+MAX_RETAINED_LINES = 2000
+MAX_LINE_BYTES = 16 * 1024
+READ_CHUNK = 64 * 1024
+
+class _RingBuffer:
+    """Keeps the last max_lines lines and counts the ones it had to drop."""
+
+    def __init__(self, max_lines: int):
+        self.lines = deque(maxlen=max_lines)
+        self.dropped = 0
+
+    def append(self, line: str):
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append(line)
+
+    def text(self) -> str:
+        body = "".join(self.lines)
+        if self.dropped:
+            return f"[... {self.dropped} earlier lines dropped ...]\n{body}"
+        return body
+
+def format_result(result: dict) -> str:
+    """Formats a runner result the way ProjectManager.run_command always has."""
+    output = result["stdout"]
+    if result["stderr"]:
+        output += f"\n[STDERR]\n{result['stderr']}"
+    if result["timed_out"]:
+        output += f"\n[TIMEOUT] Command killed after {result['timeout']}s"
+    elif result["cancelled"]:
+        output += "\n[CANCELLED] Command was cancelled"
+    elif result["returncode"]:
+        output += f"\n[EXIT {result['returncode']}]"
+    return output
+
+class CommandRunner:
+    """
+    asyncio-based shell command runner.
+
+    Output is delivered line by line to an optional callback while only a
+    bounded tail is retained. Commands get per-call timeouts, can be
+    cancelled, and independent commands can run concurrently.
+    """
+
+    def __init__(self, cwd: str, default_timeout: float = DEFAULT_TIMEOUT, max_lines: int = MAX_RETAINED_LINES):
+        self.cwd = cwd
+        self.default_timeout = default_timeout
+        self.max_lines = max_lines
+
+    async def _pump(self, stream, name: str, buffer: _RingBuffer, on_line):
+        partial = b""
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            partial += chunk
+            *lines, partial = partial.split(b"\n")
+            # Very long lines without a newline are flushed in pieces
+            while len(partial) > MAX_LINE_BYTES:
+                lines.append(partial[:MAX_LINE_BYTES])
+                partial = partial[MAX_LINE_BYTES:]
+            for raw in lines:
+                line = raw.decode('utf-8', errors='replace') + "\n"
+                buffer.append(line)
+                if on_line:
+                    on_line(name, line)
+        if partial:
+            line = partial.decode('utf-8', errors='replace')
+            buffer.append(line)
+            if on_line:
+                on_line(name, line)
+
+    @staticmethod
+    def _kill(proc):
+        if proc.returncode is not None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except ProcessLookupError:
+            pass
+
+    async def _watch_cancel(self, cancel_event: threading.Event):
+        while not cancel_event.is_set():
+            await asyncio.sleep(0.1)
+
+    async def run_async(self, command: str, timeout: float = None, on_line=None,
+                        cancel_event: threading.Event = None) -> dict:
+        """Runs one command. on_line(stream_name, line) is called for each output line."""
+        timeout = timeout or self.default_timeout
+        proc = await asyncio.create_subprocess_shell(
+            command,
+            cwd=self.cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=hasattr(os, "killpg"), # own process group, so timeouts kill children too
+        )
+        stdout, stderr = _RingBuffer(self.max_lines), _RingBuffer(self.max_lines)
+        work = asyncio.gather(
+            self._pump(proc.stdout, "stdout", stdout, on_line),
+            self._pump(proc.stderr, "stderr", stderr, on_line),
+            proc.wait(),
+        )
+        waiters = [work]
+        if cancel_event is not None:
+            waiters.append(asyncio.ensure_future(self._watch_cancel(cancel_event)))
+
+        timed_out = cancelled = False
+        done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if work not in done:
+            timed_out = not done
+            cancelled = bool(done)
+            self._kill(proc)
+            try:
+                await asyncio.wait_for(work, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+        for waiter in waiters[1:]:
+            waiter.cancel()
+
+        return {
+            "command": command,
+            "returncode": proc.returncode,
+            "stdout": stdout.text(),
+            "stderr": stderr.text(),
+            "timed_out": timed_out,
+            "cancelled": cancelled,
+            "timeout": timeout,
+        }
+
+    def run(self, command: str, timeout: float = None) -> dict:
+        """Blocking wrapper around run_async."""
+        return asyncio.run(self.run_async(command, timeout))
+
+    def run_many(self, commands: list, timeout: float = None) -> list:
+        """Runs independent commands concurrently. Results are in the same order as commands."""
+        async def _all():
+            return await asyncio.gather(*(self.run_async(c, timeout) for c in commands))
+        return asyncio.run(_all())
+
+    def stream(self, command: str, timeout: float = None) -> "CommandStream":
+        """Starts a command in the background and returns an iterator over its output lines."""
+        return CommandStream(
+            lambda on_line, cancel: asyncio.run(self.run_async(command, timeout, on_line, cancel)),
+            command, timeout)
+
+class CommandStream:
+    """
+    Iterable over a running command's output lines (stderr lines are prefixed).
+    `target(on_line, cancel_event)` runs the command on a background thread
+    and returns the result dict, which is available as `result` afterwards.
+    """
+
+    _DONE = object()
+
+    def __init__(self, target, command: str, timeout: float = None):
+        self.command = command
+        self.timeout = timeout
+        self.result = None
+        self._finished = False
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(target,), daemon=True)
+        self._thread.start()
+
+    def _on_line(self, name: str, line: str):
+        self._queue.put(line if name == "stdout" else f"[STDERR] {line}")
+
+    def _run(self, target):
+        try:
+            self.result = target(self._on_line, self._cancel)
+        except Exception as e:
+            self.result = {
+                "command": self.command, "returncode": None, "stdout": "",
+                "stderr": f"Execution Error: {e}", "timed_out": False, "cancelled": False, "timeout": self.timeout,
+            }
+        finally:
+            self._queue.put(self._DONE)
+
+    def __iter__(self):
+        while not self._finished:
+            item = self._queue.get()
+            if item is self._DONE:
+                self._finished = True
+                return
+            yield item
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self) -> dict:
+        for _ in self:
+            pass
+        self._thread.join()
+        return self.result
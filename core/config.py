@@ -0,0 +1,33 @@
+import os
+import hashlib
+
+# Root for everything the app persists between sessions (indexes, caches, blobs).
+CACHE_DIR = os.path.abspath(
+    os.getenv("AGENT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-developer-agent"))
+)
+
+# Token budget for the pinned-file context sent with each message.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("AGENT_CONTEXT_TOKENS", "24000"))
+
+# Tools preloaded on a background thread at startup (all others load on first call).
+WARM_TOOLS = [t.strip() for t in os.getenv("AGENT_WARM_TOOLS", "get_weather,web_search,read_url").split(",") if t.strip()]
+
+# Lifetime of the provider-side cached prompt prefix in seconds (0 disables prompt caching).
+PROMPT_CACHE_TTL = int(os.getenv("AGENT_PROMPT_CACHE_TTL", "3600"))
+# Smallest prefix (in tokens) uploaded to the prompt cache; 0 uses the provider's per-model minimum.
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("AGENT_PROMPT_CACHE_MIN_TOKENS", "0"))
+
+# Worker processes serving the transformers tools (0 runs them inside the app process).
+MODEL_WORKERS = int(os.getenv("AGENT_MODEL_WORKERS", "1"))
+
+# Workspace downloads skip files above this size (0 = no limit), and archives
+# above the download limit are left on disk instead of being served by the UI.
+ARCHIVE_MAX_FILE_MB = int(os.getenv("AGENT_ARCHIVE_MAX_FILE_MB", "0"))
+ARCHIVE_DOWNLOAD_MAX_MB = int(os.getenv("AGENT_ARCHIVE_DOWNLOAD_MAX_MB", "1024"))
+
+def workspace_cache_dir(working_dir: str) -> str:
+    """Returns (and creates) the cache directory dedicated to one workspace."""
+    key = hashlib.sha1(os.path.abspath(working_dir).encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(CACHE_DIR, "workspaces", key)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,159 @@
+import os
+import re
+from core.config import CONTEXT_TOKEN_BUDGET
+
+CHARS_PER_TOKEN = 4 # Rough estimate; good enough for budgeting
+HEAD_LINES = 40
+
+# Lines kept when a file is reduced to an outline.
+OUTLINE_RE = re.compile(
+    r"^\s*(?:async\s+def|def|class|function|export|interface|struct|enum|impl|fn|func|type|module|import|from\s+\S+\s+import)\b"
+    r"|^\s*#{1,6}\s"
+)
+
+# Shrink levels, most to least detailed.
+LEVELS = ("full", "outline", "head", "omitted")
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def outline(content: str) -> str:
+    """Signature-level summary of a file (definitions, imports, headings)."""
+    lines = [f"{n}: {line.rstrip()}" for n, line in enumerate(content.splitlines(), 1) if OUTLINE_RE.match(line)]
+    return "\n".join(lines) if lines else head(content)
+
+def head(content: str, lines: int = HEAD_LINES) -> str:
+    all_lines = content.splitlines()
+    text = "\n".join(all_lines[:lines])
+    if len(all_lines) > lines:
+        text += f"\n[... {len(all_lines) - lines} more lines ...]"
+    return text
+
+class ContextAssembler:
+    """
+    Builds the pinned-file context block sent with each message.
+
+    File contents and token counts are cached by (path, mtime, size), so
+    unchanged files are never re-read; when the project manager runs a
+    watcher, files it has not reported changed are not even re-statted. After a file has been sent in full,
+    later turns only mention it (if unchanged) or send a unified diff (if
+    smaller than the new content). When the block exceeds the token budget,
+    the lowest-priority files (the last pinned, by default) are shrunk first:
+    to an outline, then to their first lines, then omitted.
+    """
+
+    def __init__(self, project_manager, budget_tokens: int = CONTEXT_TOKEN_BUDGET):
+        self.project_manager = project_manager
+        self.budget_tokens = budget_tokens
+        self._files = {} # path -> {"sig", "content", "tokens"}
+        self._sent = {} # path -> content the model has seen in full
+        self._version = 0 # Project manager change version the cache reflects
+        self.last_stats = {}
+
+    def reset(self):
+        """Forgets what the model has seen, so the next turn resends every file in full."""
+        self._sent.clear()
+
+    def _changed(self):
+        """Paths changed since the last turn, or None if every pinned file must be re-statted."""
+        pm = self.project_manager
+        if getattr(pm, "watcher", None) is None:
+            return None
+        self._version, changed = pm.changes_since(self._version)
+        return changed
+
+    def _load(self, path: str, changed=None):
+        if changed is not None and path in self._files and os.path.normpath(path).replace(os.sep, "/") not in changed:
+            return self._files[path]
+        full_path = os.path.join(self.project_manager.working_dir, path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            self._files.pop(path, None)
+            return None
+        sig = (st.st_mtime_ns, st.st_size)
+        entry = self._files.get(path)
+        if entry is None or entry["sig"] != sig:
+            content = self.project_manager.read_file(path)
+            entry = self._files[path] = {"sig": sig, "content": content, "tokens": estimate_tokens(content)}
+        return entry
+
+    def _section(self, path: str, level: str, body: str) -> str:
+        if level == "omitted":
+            return f"### {path} (omitted to fit the context budget)"
+        if level == "unchanged":
+            return f"### {path} (unchanged since last sent)"
+        if level == "missing":
+            return f"### {path} (file no longer exists)"
+        lang = "diff" if level == "diff" else ""
+        label = "" if level == "full" else f" ({level})"
+        return f"### {path}{label}\n```{lang}\n{body}\n```"
+
+    def _render(self, path: str, content: str, level: str) -> str:
+        if level == "outline":
+            return self._section(path, level, outline(content))
+        if level == "head":
+            return self._section(path, level, head(content))
+        return self._section(path, level, content)
+
+    def assemble(self, pinned_files: list, priorities: dict = None) -> str:
+        """
+        Returns the context block for this turn ("" if nothing is pinned).
+        priorities maps path -> number (higher is kept longer); by default
+        earlier pinned files have higher priority.
+        """
+        pinned = list(dict.fromkeys(pinned_files or []))
+        if not pinned:
+            return ""
+        priorities = priorities or {}
+        rank = {p: priorities.get(p, -i) for i, p in enumerate(pinned)}
+
+        changed = self._changed()
+        entries = {}
+        for path in pinned:
+            entry = self._load(path, changed)
+            if entry is None:
+                entries[path] = {"level": "missing", "text": self._section(path, "missing", "")}
+                continue
+            content = entry["content"]
+            previous = self._sent.get(path)
+            if previous == content:
+                entries[path] = {"level": "unchanged", "text": self._section(path, "unchanged", "")}
+                continue
+            text = self._render(path, content, "full")
+            level = "full"
+            if previous is not None:
+                diff = self.project_manager.diff_engine.unified_diff(previous, content, fromfile=path, tofile=path)
+                if estimate_tokens(diff) < entry["tokens"]:
+                    text, level = self._section(path, "diff", diff.rstrip("\n")), "diff"
+            entries[path] = {"level": level, "text": text, "content": content}
+
+        # Shrink the lowest-priority files first until the block fits
+        total = sum(estimate_tokens(e["text"]) for e in entries.values())
+        for path in sorted(pinned, key=lambda p: rank[p]):
+            e = entries[path]
+            if e["level"] not in ("full", "diff"):
+                continue
+            for level in LEVELS[1:]:
+                if total <= self.budget_tokens:
+                    break
+                text = self._render(path, e["content"], level)
+                total += estimate_tokens(text) - estimate_tokens(e["text"])
+                e["level"], e["text"] = level, text
+            if total <= self.budget_tokens:
+                break
+
+        # Only content the model received whole (or as a diff on top of it) counts as seen
+        for path, e in entries.items():
+            if e["level"] in ("full", "diff"):
+                self._sent[path] = e["content"]
+            elif e["level"] in ("outline", "head", "omitted", "missing"):
+                self._sent.pop(path, None)
+        for path in list(self._sent):
+            if path not in entries:
+                del self._sent[path]
+
+        self.last_stats = {"tokens": total, "budget": self.budget_tokens}
+        for e in entries.values():
+            self.last_stats[e["level"]] = self.last_stats.get(e["level"], 0) + 1
+        return "## Pinned files\n\n" + "\n\n".join(entries[p]["text"] for p in pinned)
@@ -0,0 +1,65 @@
+# Math, finance and geo tools. Heavy dependencies are imported on first
+# use, so loading this module is cheap; see core/tool_registry.py.
+
+_geocoder = None
+
+def solve_equation(equation: str, var: str = "x"):
+    """Solve a simple equation like '2*x + 3 = 7'."""
+    try:
+        import sympy as sp
+    except ImportError:
+        return "Error: 'sympy' library not installed."
+    try:
+        x = sp.symbols(var)
+        left, right = equation.split("=")
+        sol = sp.solve(sp.Eq(sp.sympify(left), sp.sympify(right)), x)
+        return f"Solutions for {var}: {sol}"
+    except Exception as e:
+        return f"Error solving equation: {e}"
+
+def get_ticker_price(symbol: str):
+    """Get current price for a stock/crypto ticker."""
+    try:
+        import yfinance as yf
+    except ImportError:
+        return "Error: 'yfinance' library not installed."
+    try:
+        hist = yf.Ticker(symbol).history(period="1d")
+        if hist.empty:
+            return f"No data for {symbol}."
+        return f"{symbol} current price: {hist['Close'].iloc[-1]}"
+    except Exception as e:
+        return f"Error fetching price: {e}"
+
+def _get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        from geopy.geocoders import Nominatim
+        _geocoder = Nominatim(user_agent="agent_tools")
+    return _geocoder
+
+def geocode_address(address: str):
+    """Address -> coordinates (lat, lon)."""
+    try:
+        geocoder = _get_geocoder()
+    except ImportError:
+        return "Error: 'geopy' library not installed."
+    try:
+        loc = geocoder.geocode(address)
+        if not loc:
+            return "Address not found."
+        return f"{loc.address}\nLat: {loc.latitude}, Lon: {loc.longitude}"
+    except Exception as e:
+        return f"Error geocoding address: {e}"
+
+def reverse_geocode(lat: float, lon: float):
+    """Coordinates -> address."""
+    try:
+        geocoder = _get_geocoder()
+    except ImportError:
+        return "Error: 'geopy' library not installed."
+    try:
+        loc = geocoder.reverse((lat, lon))
+        return loc.address if loc else "Location not found."
+    except Exception as e:
+        return f"Error in reverse geocoding: {e}"
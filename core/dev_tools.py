@@ -0,0 +1,32 @@
+# Python code tools. Heavy dependencies are imported on first use, so
+# loading this module is cheap; see core/tool_registry.py.
+import os
+import tempfile
+
+def format_python(code: str):
+    """Format Python code with black."""
+    try:
+        import black
+    except ImportError:
+        return "Error: 'black' library not installed."
+    try:
+        return black.format_str(code, mode=black.FileMode())
+    except Exception as e:
+        return f"Error formatting code: {e}"
+
+def lint_python(code: str, filename: str = "temp_code.py"):
+    """Lint Python code with flake8."""
+    try:
+        from flake8.api import legacy as flake8_legacy
+    except ImportError:
+        return "Error: 'flake8' library not installed."
+    try:
+        # Lint a private temp copy so concurrent calls never share a file
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, os.path.basename(filename))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(code)
+            report = flake8_legacy.get_style_guide().check_files([path])
+        return f"Issues found: {report.total_errors}"
+    except Exception as e:
+        return f"Error linting code: {e}"
@@ -0,0 +1,299 @@
+import difflib
+import hashlib
+import threading
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+
+# Inputs longer than this are never matched line by line.
+MAX_DIFF_LINES = 200000
+# Diffs touching more lines than this are shown as a summary instead.
+MAX_CHANGED_LINES = 20000
+# Myers gives up past this edit distance and treats the gap as a full replacement.
+MAX_EDIT_COST = 2000
+
+# ---------- Matching backends ----------
+# A backend takes two lists of line ids plus a window (alo, ahi, blo, bhi)
+# and returns the matched (i, j) index pairs inside it, in ascending order.
+
+def myers_matches(a: list, b: list, alo: int, ahi: int, blo: int, bhi: int) -> list:
+    """Myers' O(ND) greedy diff. Returns [] if the edit distance exceeds MAX_EDIT_COST."""
+    n, m = ahi - alo, bhi - blo
+    if n == 0 or m == 0 or set(a[alo:ahi]).isdisjoint(b[blo:bhi]):
+        return []
+    max_d = min(n + m, MAX_EDIT_COST)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+    for d in range(max_d + 1):
+        trace.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, offset, n, m, alo, blo)
+    return []
+
+def _myers_backtrack(trace: list, offset: int, x: int, y: int, alo: int, blo: int) -> list:
+    pairs = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[offset + prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            pairs.append((alo + x, blo + y))
+        if d > 0:
+            x, y = prev_x, prev_y
+    pairs.reverse()
+    return pairs
+
+def patience_matches(a: list, b: list, alo: int, ahi: int, blo: int, bhi: int) -> list:
+    """Patience diff: anchors on lines unique to both sides, Myers for the gaps in between."""
+    pairs = []
+    # Work items are windows (alo, ahi, blo, bhi) or ("pairs", [...]) markers
+    # holding matches to emit once everything to their left is done.
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        item = stack.pop()
+        if item[0] == "pairs":
+            pairs.extend(item[1])
+            continue
+        alo, ahi, blo, bhi = item
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        tail = []
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            tail.append((ahi, bhi))
+        tail.reverse()
+
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if not anchors:
+            if alo < ahi and blo < bhi:
+                pairs.extend(myers_matches(a, b, alo, ahi, blo, bhi))
+            pairs.extend(tail)
+            continue
+
+        work = []
+        prev_a, prev_b = alo, blo
+        for i, j in anchors:
+            work.append((prev_a, i, prev_b, j))
+            work.append(("pairs", [(i, j)]))
+            prev_a, prev_b = i + 1, j + 1
+        work.append((prev_a, ahi, prev_b, bhi))
+        work.append(("pairs", tail))
+        # Pushed in reverse so items pop left to right
+        stack.extend(reversed(work))
+    return pairs
+
+def _unique_anchors(a: list, b: list, alo: int, ahi: int, blo: int, bhi: int) -> list:
+    """Longest increasing run of lines that occur exactly once on each side."""
+    count_a = Counter(a[alo:ahi])
+    count_b = Counter(b[blo:bhi])
+    pos_b = {}
+    for j in range(blo, bhi):
+        if count_b[b[j]] == 1:
+            pos_b[b[j]] = j
+    candidates = [(i, pos_b[a[i]]) for i in range(alo, ahi) if count_a[a[i]] == 1 and a[i] in pos_b]
+    if not candidates:
+        return []
+
+    # Longest increasing subsequence on the b indices (patience sorting)
+    tails, tail_idx, prev = [], [], [None] * len(candidates)
+    for idx, (_, j) in enumerate(candidates):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+        prev[idx] = tail_idx[pos - 1] if pos > 0 else None
+    result = []
+    idx = tail_idx[-1]
+    while idx is not None:
+        result.append(candidates[idx])
+        idx = prev[idx]
+    result.reverse()
+    return result
+
+def difflib_matches(a: list, b: list, alo: int, ahi: int, blo: int, bhi: int) -> list:
+    """difflib.SequenceMatcher on the hashed lines (the original behaviour)."""
+    matcher = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+    pairs = []
+    for i, j, size in matcher.get_matching_blocks():
+        pairs.extend((alo + i + t, blo + j + t) for t in range(size))
+    return pairs
+
+DIFF_BACKENDS = {
+    "patience": patience_matches,
+    "myers": myers_matches,
+    "difflib": difflib_matches,
+}
+
+def register_backend(name: str, matcher):
+    """Registers a custom matching backend (see the signature of myers_matches)."""
+    DIFF_BACKENDS[name] = matcher
+
+# ---------- Unified diff formatting ----------
+
+def _opcodes(pairs: list, n: int, m: int) -> list:
+    codes = []
+    i = j = 0
+    for pi, pj in pairs + [(n, m)]:
+        if pi > i and pj > j:
+            codes.append(("replace", i, pi, j, pj))
+        elif pi > i:
+            codes.append(("delete", i, pi, j, j))
+        elif pj > j:
+            codes.append(("insert", i, i, j, pj))
+        if pi < n and pj < m:
+            if codes and codes[-1][0] == "equal" and codes[-1][2] == pi:
+                tag, i1, _i2, j1, _j2 = codes[-1]
+                codes[-1] = (tag, i1, pi + 1, j1, pj + 1)
+            else:
+                codes.append(("equal", pi, pi + 1, pj, pj + 1))
+        i, j = pi + 1, pj + 1
+    return codes
+
+def _grouped(codes: list, context: int):
+    """Same grouping rules as difflib.SequenceMatcher.get_grouped_opcodes."""
+    if not codes:
+        return
+    codes = list(codes)
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * context:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+def _format_range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+def _line(prefix: str, text: str) -> str:
+    if text.endswith("\n"):
+        return prefix + text
+    return f"{prefix}{text}\n\\ No newline at end of file\n"
+
+def _format_hunks(old_lines: list, new_lines: list, codes: list, context: int) -> str:
+    out = []
+    for group in _grouped(codes, context):
+        first, last = group[0], group[-1]
+        out.append(f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@\n")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                out.extend(_line(" ", line) for line in old_lines[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                out.extend(_line("-", line) for line in old_lines[i1:i2])
+            if tag in ("replace", "insert"):
+                out.extend(_line("+", line) for line in new_lines[j1:j2])
+    return "".join(out)
+
+# ---------- Engine ----------
+
+class DiffEngine:
+    """
+    Unified-diff generator with a pluggable matching backend.
+
+    Lines are hashed to integer ids and the common prefix/suffix is trimmed
+    before the backend runs. Oversized changes fall back to a summary, and
+    results are cached by (old content hash, new content hash).
+    """
+
+    def __init__(self, backend: str = "patience", context: int = 3, max_lines: int = MAX_DIFF_LINES,
+                 max_changed_lines: int = MAX_CHANGED_LINES, cache_size: int = 128):
+        if backend not in DIFF_BACKENDS:
+            raise ValueError(f"Unknown diff backend: {backend}")
+        self.backend = backend
+        self.context = context
+        self.max_lines = max_lines
+        self.max_changed_lines = max_changed_lines
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def unified_diff(self, old: str, new: str, fromfile: str = "a", tofile: str = "b") -> str:
+        """Returns a unified diff between two texts ('' if they are identical)."""
+        if old == new:
+            return ""
+        key = (hashlib.sha1(old.encode("utf-8", "surrogatepass")).hexdigest(),
+               hashlib.sha1(new.encode("utf-8", "surrogatepass")).hexdigest(),
+               self.backend, self.context)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+        if body is None:
+            body = self._diff_body(old.splitlines(keepends=True), new.splitlines(keepends=True))
+            with self._lock:
+                self._cache[key] = body
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return f"--- {fromfile}\n+++ {tofile}\n{body}"
+
+    def _diff_body(self, old_lines: list, new_lines: list) -> str:
+        ids = {}
+        a = [ids.setdefault(line, len(ids)) for line in old_lines]
+        b = [ids.setdefault(line, len(ids)) for line in new_lines]
+        n, m = len(a), len(b)
+
+        prefix = 0
+        while prefix < n and prefix < m and a[prefix] == b[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < n - prefix and suffix < m - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+            suffix += 1
+        ahi, bhi = n - suffix, m - suffix
+
+        if ahi - prefix > self.max_lines or bhi - prefix > self.max_lines:
+            return self._summary(a[prefix:ahi], b[prefix:bhi], prefix, n, m)
+
+        pairs = [(i, i) for i in range(prefix)]
+        pairs.extend(DIFF_BACKENDS[self.backend](a, b, prefix, ahi, prefix, bhi))
+        pairs.extend((ahi + t, bhi + t) for t in range(suffix))
+        if (n - len(pairs)) + (m - len(pairs)) > self.max_changed_lines:
+            return self._summary(a[prefix:ahi], b[prefix:bhi], prefix, n, m)
+        return _format_hunks(old_lines, new_lines, _opcodes(pairs, n, m), self.context)
+
+    def _summary(self, a_mid: list, b_mid: list, prefix: int, n: int, m: int) -> str:
+        old_counts, new_counts = Counter(a_mid), Counter(b_mid)
+        removed = sum((old_counts - new_counts).values())
+        added = sum((new_counts - old_counts).values())
+        return (f"@@ -{_format_range(prefix, prefix + len(a_mid))} +{_format_range(prefix, prefix + len(b_mid))} @@\n"
+                f"# Summary diff: change too large to display ({n} -> {m} lines).\n"
+                f"# Approximately {removed} lines removed and {added} lines added "
+                f"after line {prefix}.\n")
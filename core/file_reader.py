@@ -0,0 +1,75 @@
+import os
+import mmap
+from core.line_index import get_line_index
+
+# Files at least this large are read through mmap instead of buffered reads.
+MMAP_THRESHOLD = 4 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+def _decode(data: bytes) -> str:
+    return data.decode('utf-8', errors='replace')
+
+def _clamp(size: int, offset: int, length):
+    offset = max(0, min(offset, size))
+    end = size if length is None else min(size, offset + max(0, length))
+    return offset, end
+
+def read_bytes(path: str, offset: int = 0, length: int = None) -> bytes:
+    """Reads length bytes starting at offset (to EOF if length is None)."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        start, end = _clamp(size, offset, length)
+        if end <= start:
+            return b""
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[start:end]
+        f.seek(start)
+        return f.read(end - start)
+
+def iter_chunks(path: str, offset: int = 0, length: int = None, chunk_size: int = CHUNK_SIZE):
+    """Yields the requested byte range in chunks of at most chunk_size bytes."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        start, end = _clamp(size, offset, length)
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def read_lines(path: str, start_line: int = 1, end_line: int = None) -> str:
+    """Returns lines start_line..end_line (1-based, inclusive) using the cached line index."""
+    return _decode(get_line_index(path).read_lines(start_line, end_line))
+
+def tail_lines(path: str, lines: int = 20, block_size: int = 8192) -> str:
+    """
+    Returns the last `lines` lines. A file that is already indexed (in memory
+    or as a sidecar) is served by its line index, which only scans what was
+    appended since; a cold file is scanned backwards from EOF in fixed-size
+    blocks, so it never needs a full scan.
+    """
+    if lines <= 0:
+        return ""
+    index = get_line_index(path, build=False)
+    if index is not None:
+        return _decode(index.tail(lines))
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        pos = end
+        data = b""
+        # A trailing newline terminates the last line rather than starting a new one
+        wanted = lines + 1
+        while pos > 0 and data.count(b"\n") < wanted:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+        if data.endswith(b"\n"):
+            body = data[:-1]
+            parts = body.split(b"\n")
+            return _decode(b"\n".join(parts[-lines:]) + b"\n")
+        return _decode(b"\n".join(data.split(b"\n")[-lines:]))
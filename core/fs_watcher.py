@@ -0,0 +1,218 @@
+import os
+import sys
+import queue
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+
+# inotify constants (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+def _event(kind: str, path: str, is_dir: bool = False) -> dict:
+    return {"type": kind, "path": path, "is_dir": is_dir}
+
+class _BaseWatcher:
+    """
+    Background watcher that pushes change events into a queue.
+
+    Events are dicts: {"type": "created" | "modified" | "deleted" | "overflow",
+    "path": <workspace-relative path>, "is_dir": bool}. An "overflow" event
+    means events were lost and consumers should rescan.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.events = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rel(self, path: str) -> str:
+        rel = os.path.relpath(path, self.root)
+        return rel.replace(os.sep, "/")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def drain(self) -> list:
+        """Returns all queued events without blocking."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _run(self):
+        raise NotImplementedError
+
+class InotifyWatcher(_BaseWatcher):
+    """Linux inotify watcher bound through ctypes (no third-party dependency)."""
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wd_to_path = {}
+        self._add_tree(self.root)
+
+    def _add_watch(self, path: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self._wd_to_path[wd] = path
+
+    def _rekey(self, old: str, new: str):
+        """Points the watches of a directory moved within the tree at its new path."""
+        prefix = old + os.sep
+        for wd, path in list(self._wd_to_path.items()):
+            if path == old:
+                self._wd_to_path[wd] = new
+            elif path.startswith(prefix):
+                self._wd_to_path[wd] = new + path[len(old):]
+
+    def _drop_tree(self, path: str):
+        """Removes the watches of a directory moved out of the tree."""
+        prefix = path + os.sep
+        for wd, watched in list(self._wd_to_path.items()):
+            if watched == path or watched.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._wd_to_path[wd]
+
+    def _add_tree(self, path: str, emit: bool = False):
+        for root, dirs, files in os.walk(path):
+            self._add_watch(root)
+            if emit and root != path:
+                self.events.put(_event("created", self._rel(root), True))
+            if emit:
+                # Files may have been created before the watch was in place
+                for f in files:
+                    self.events.put(_event("created", self._rel(os.path.join(root, f))))
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([self._fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._parse(data)
+        finally:
+            os.close(self._fd)
+
+    def _parse(self, data: bytes):
+        moved = {} # cookie -> old path of directories moved away in this read
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self.events.put(_event("overflow", "."))
+                continue
+            base = self._wd_to_path.get(wd)
+            if base is None:
+                continue
+            if mask & IN_IGNORED:
+                self._wd_to_path.pop(wd, None)
+                continue
+
+            path = os.path.join(base, os.fsdecode(name)) if name else base
+            is_dir = bool(mask & IN_ISDIR)
+            if mask & IN_MOVED_TO and is_dir and cookie in moved:
+                # Renamed within the tree: its watches stay valid under the new path
+                self._rekey(moved.pop(cookie), path)
+                self.events.put(_event("created", self._rel(path), True))
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self.events.put(_event("created", self._rel(path), is_dir))
+                if is_dir:
+                    self._add_tree(path, emit=True)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.events.put(_event("deleted", self._rel(path), is_dir))
+                if mask & IN_MOVED_FROM and is_dir:
+                    moved[cookie] = path
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if path == self.root:
+                    self.events.put(_event("overflow", "."))
+            elif mask & (IN_MODIFY | IN_CLOSE_WRITE):
+                self.events.put(_event("modified", self._rel(path), is_dir))
+
+        # No matching IN_MOVED_TO: the directory left the tree
+        for path in moved.values():
+            self._drop_tree(path)
+
+class PollingWatcher(_BaseWatcher):
+    """Portable fallback that diffs periodic (mtime, size) snapshots of the tree."""
+
+    def __init__(self, root: str, interval: float = 1.0):
+        super().__init__(root)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for root, dirs, files in os.walk(self.root):
+            for d in dirs:
+                snapshot[self._rel(os.path.join(root, d))] = (None, True)
+            for f in files:
+                full = os.path.join(root, f)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                snapshot[self._rel(full)] = ((st.st_mtime_ns, st.st_size), False)
+        return snapshot
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = self._scan()
+            previous = self._snapshot
+            for path, (sig, is_dir) in current.items():
+                if path not in previous:
+                    self.events.put(_event("created", path, is_dir))
+                elif previous[path][0] != sig:
+                    self.events.put(_event("modified", path, is_dir))
+            for path, (_sig, is_dir) in previous.items():
+                if path not in current:
+                    self.events.put(_event("deleted", path, is_dir))
+            self._snapshot = current
+
+def create_watcher(root: str, poll_interval: float = 1.0):
+    """Returns an inotify watcher on Linux, falling back to polling elsewhere or on failure."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, interval=poll_interval)
@@ -0,0 +1,98 @@
+import os
+import json
+import threading
+from core.blob_store import get_blob_store
+
+WINDOW = 40 # Messages kept in memory
+VERBATIM = 8 # Most recent messages never compacted
+MAX_INLINE_CHARS = 8000 # Larger tool outputs are sent as head + tail + reference
+PREVIEW_LINES = 5
+
+class HistoryManager:
+    """
+    Keeps a chat session's message list bounded.
+
+    The most recent messages stay verbatim. Older tool outputs (messages
+    tagged kind="result") are replaced by a short summary plus a
+    content-addressed reference, and messages that fall out of the rolling
+    window are evicted to an append-only JSONL archive on disk. Full outputs
+    live in the blob store and can be re-expanded from their reference at
+    any time, e.g. by the agent through the expand_output tool.
+    """
+
+    def __init__(self, archive_dir: str, blobs=None, window: int = WINDOW, verbatim: int = VERBATIM,
+                 max_inline_chars: int = MAX_INLINE_CHARS):
+        os.makedirs(archive_dir, exist_ok=True)
+        self.archive_path = os.path.join(archive_dir, "history.jsonl")
+        self.blobs = blobs or get_blob_store()
+        self.window = window
+        self.verbatim = verbatim
+        self.max_inline_chars = max_inline_chars
+        self._lock = threading.Lock()
+
+    # ---------- Archive ----------
+
+    def store(self, content: str) -> str:
+        """Stores a tool output (once per distinct content) and returns its reference."""
+        return self.blobs.put(content)
+
+    def expand(self, ref: str):
+        """Returns the full output for a reference, or None if unknown."""
+        return self.blobs.get(ref) if ref else None
+
+    def archived_messages(self) -> list:
+        """Returns every message evicted from the window, oldest first."""
+        if not os.path.exists(self.archive_path):
+            return []
+        with open(self.archive_path, 'r', encoding='utf-8') as f:
+            return [r["message"] for r in map(json.loads, f) if r.get("kind") == "message"]
+
+    # ---------- Compaction ----------
+
+    def summarize(self, content: str) -> str:
+        """Short stand-in for an archived output: its first lines, size and reference."""
+        ref = self.store(content)
+        lines = content.splitlines()
+        preview = "\n".join(line[:200] for line in lines[:PREVIEW_LINES])
+        more = f"\n[... {len(lines) - PREVIEW_LINES} more lines]" if len(lines) > PREVIEW_LINES else ""
+        return (f"{preview}{more}\n[Compacted output: {len(lines)} lines, {len(content)} chars. "
+                f"Full text: tool expand_output with ref={ref}]")
+
+    def inline(self, content: str) -> str:
+        """Bounds an output sent to the model: head and tail inline, the rest by reference."""
+        if len(content) <= self.max_inline_chars:
+            return content
+        ref = self.store(content)
+        half = self.max_inline_chars // 2
+        return (f"{content[:half]}\n[... {len(content) - 2 * half} chars omitted. "
+                f"Full text: tool expand_output with ref={ref} ...]\n{content[-half:]}")
+
+    def compact(self, messages: list):
+        """Compacts the message list in place."""
+        # Summarize tool outputs older than the verbatim tail
+        for msg in messages[:max(0, len(messages) - self.verbatim)]:
+            if msg.get("kind") != "result" or msg.get("compacted"):
+                continue
+            if msg.get("output"):
+                msg["output"] = self.summarize(msg["output"])
+            elif len(msg["content"]) > self.max_inline_chars // 4:
+                msg["content"] = self.summarize(msg["content"])
+            msg["compacted"] = True
+
+        # Evict everything before the rolling window to disk
+        marker = messages[0] if messages and messages[0].get("kind") == "archived" else None
+        live = messages[1:] if marker else messages
+        excess = len(live) - self.window
+        if excess <= 0:
+            return
+        lines = "".join(json.dumps({"kind": "message", "message": msg}, ensure_ascii=False) + "\n" for msg in live[:excess])
+        with self._lock, open(self.archive_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+        archived = (marker["archived"] if marker else 0) + excess
+        marker = {
+            "role": "assistant",
+            "kind": "archived",
+            "archived": archived,
+            "content": f"_{archived} earlier messages archived to `{self.archive_path}`._",
+        }
+        messages[:] = [marker] + live[excess:]
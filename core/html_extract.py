@@ -0,0 +1,166 @@
+import codecs
+from html.parser import HTMLParser
+
+# Elements whose content is never part of the readable text. Forms are kept
+# (some sites wrap the whole page in one); only their controls are skipped.
+SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "svg", "template", "iframe",
+             "input", "select", "button", "textarea"}
+# Elements that end a run of text (so words from adjacent blocks don't merge).
+BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+              "tr", "td", "th", "table", "section", "article", "main", "blockquote", "pre"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_MAX_CHARS = 5000
+
+class StreamingExtractor(HTMLParser):
+    """
+    Incremental HTML-to-text extractor.
+
+    Fed chunk by chunk, it collects the title, the meta description and the
+    visible text (skipping boilerplate such as script/style/nav) in a single
+    pass, and reports `done` as soon as every requested field is complete so
+    the caller can stop downloading.
+    """
+
+    def __init__(self, want=("title", "description", "text"), max_chars: int = DEFAULT_MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.want = set(want)
+        self.max_chars = max_chars
+        self.title = None
+        self.description = None
+        self._title_parts = None
+        self._text = []
+        self._text_len = 0
+        self._pending = [] # raw data of the current text run (may arrive in pieces)
+        self._pending_len = 0
+        self._skip_depth = 0
+        self._in_body = False
+        self.done = False
+
+    # ---------- Parser callbacks ----------
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag == "title" and self.title is None:
+            self._title_parts = []
+        elif tag == "meta" and self.description is None:
+            attrs = dict(attrs)
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            if name in ("description", "og:description") and attrs.get("content"):
+                self.description = attrs["content"].strip()
+        elif tag == "body":
+            self._in_body = True
+
+        if tag in SKIP_TAGS and tag not in VOID_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._break()
+        self._check_done()
+
+    def handle_startendtag(self, tag, attrs):
+        # <tag/> never opens a skipped region
+        if tag in SKIP_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag == "title" and self._title_parts is not None:
+            self.title = " ".join("".join(self._title_parts).split())
+            self._title_parts = None
+        elif tag == "head":
+            self._in_body = True
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self._break()
+        self._check_done()
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+            return
+        if self._skip_depth or "text" not in self.want or self._text_len >= self.max_chars:
+            return
+        self._pending.append(data)
+        self._pending_len += len(data)
+        if self._pending_len >= self.max_chars:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        words = "".join(self._pending).split()
+        self._pending = []
+        self._pending_len = 0
+        if not words:
+            return
+        chunk = " ".join(words)
+        if self._text and not self._text[-1].endswith("\n"):
+            chunk = " " + chunk
+        self._text.append(chunk)
+        self._text_len += len(chunk)
+        self._check_done()
+
+    def _break(self):
+        self._flush()
+        if self._text and not self._text[-1].endswith("\n"):
+            self._text.append("\n")
+
+    def _check_done(self):
+        title_ok = "title" not in self.want or self.title is not None or self._in_body
+        desc_ok = "description" not in self.want or self.description is not None or self._in_body
+        text_ok = "text" not in self.want or self._text_len >= self.max_chars
+        if title_ok and desc_ok and text_ok:
+            self.done = True
+
+    # ---------- Results ----------
+
+    @property
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self._text).split("\n"))
+        return "\n".join(line for line in lines if line)[:self.max_chars].rstrip()
+
+    def result(self) -> dict:
+        self._flush()
+        return {"title": self.title, "description": self.description, "text": self.text}
+
+def extract(chunks, want=("title", "description", "text"), max_chars: int = DEFAULT_MAX_CHARS,
+            max_bytes: int = DEFAULT_MAX_BYTES, encoding: str = None) -> dict:
+    """
+    Extracts fields from an iterable of HTML byte (or str) chunks, stopping as
+    soon as the requested fields are complete or max_bytes have been read.
+    The result also reports how many bytes were consumed.
+    """
+    parser = StreamingExtractor(want, max_chars)
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    consumed = 0
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            consumed += len(chunk)
+            chunk = decoder.decode(chunk)
+        else:
+            consumed += len(chunk)
+        parser.feed(chunk)
+        if parser.done or consumed >= max_bytes:
+            break
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    if parser._title_parts is not None and parser.title is None:
+        parser.title = " ".join("".join(parser._title_parts).split())
+    result = parser.result()
+    result["bytes_read"] = consumed
+    return result
+
+def extract_url(client, url: str, want=("title", "description", "text"), max_chars: int = DEFAULT_MAX_CHARS,
+                max_bytes: int = DEFAULT_MAX_BYTES, chunk_size: int = 16 * 1024) -> dict:
+    """Streams url through an HttpClient and extracts fields, closing the connection early when done."""
+    response = client.get(url, stream=True)
+    try:
+        response.raise_for_status()
+        return extract(response.iter_content(chunk_size=chunk_size), want, max_chars, max_bytes,
+                       encoding=response.encoding)
+    finally:
+        response.close()
@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from core.config import CACHE_DIR
+from core.http_client import get_client
+
+CACHE_PATH = os.path.join(CACHE_DIR, "http_cache.sqlite")
+
+# Seconds a cached response stays fresh, per tool.
+TOOL_TTLS = {
+    "web_search": 60 * 60,
+    "read_url": 30 * 60,
+    "get_weather": 10 * 60,
+    "fetch_page_title": 24 * 60 * 60,
+    "fetch_page_meta": 24 * 60 * 60,
+}
+DEFAULT_TTL = 5 * 60
+MEMORY_LIMIT = 32 * 1024 * 1024
+DISK_LIMIT = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    tool TEXT,
+    status INTEGER,
+    headers TEXT,
+    body BLOB,
+    encoding TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL,
+    size INTEGER,
+    last_access REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER
+);
+INSERT OR IGNORE INTO meta SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries;
+"""
+
+class CachedResponse:
+    """Minimal, requests-like view of a cached response."""
+
+    def __init__(self, url: str, status_code: int, headers: dict, content: bytes, encoding: str = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self.from_cache = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 64 * 1024):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+class ResponseCache:
+    """
+    Two-level cache for web tools: an in-process LRU bounded by bytes in
+    front of a SQLite store shared by every Streamlit session.
+
+    Entries expire after a per-tool TTL. Expired entries that carry an ETag
+    or Last-Modified are revalidated with a conditional GET instead of being
+    refetched. Tool results that are not plain HTTP responses (e.g.
+    web_search) can be memoized with cached_call().
+    """
+
+    def __init__(self, path: str = CACHE_PATH, memory_limit: int = MEMORY_LIMIT, disk_limit: int = DISK_LIMIT):
+        self.path = path
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory = OrderedDict() # key -> entry dict
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db().executescript(_SCHEMA)
+
+    # ---------- Storage ----------
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            self.stats[stat] += n
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old["size"]
+            if entry["size"] > self.memory_limit:
+                return
+            self._memory[key] = entry
+            self._memory_bytes += entry["size"]
+            while self._memory_bytes > self.memory_limit:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted["size"]
+                self.stats["evictions"] += 1
+
+    def _load(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+        row = self._db().execute(
+            "SELECT tool, status, headers, body, encoding, etag, last_modified, expires_at, size "
+            "FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        entry = {
+            "tool": row[0], "status": row[1], "headers": json.loads(row[2]), "body": row[3],
+            "encoding": row[4], "etag": row[5], "last_modified": row[6], "expires_at": row[7], "size": row[8],
+        }
+        self._db().execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._remember(key, entry)
+        return entry
+
+    def _store(self, key: str, entry: dict):
+        self._remember(key, entry)
+        db = self._db()
+        # The running total lives in the meta table and is updated in the same
+        # transaction, so other processes sharing the file keep it consistent.
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            old = db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, entry["tool"], entry["status"], json.dumps(entry["headers"]), entry["body"],
+                 entry["encoding"], entry["etag"], entry["last_modified"], entry["expires_at"],
+                 entry["size"], time.time()))
+            db.execute("UPDATE meta SET value = value + ? WHERE name = 'total_size'",
+                       (entry["size"] - (old[0] if old else 0),))
+            total = db.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+            if total > self.disk_limit:
+                self._evict_disk(db, total - self.disk_limit)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self._count("stores")
+
+    def _evict_disk(self, db: sqlite3.Connection, excess: int):
+        freed = evicted = 0
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            if freed >= excess:
+                break
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            freed += size
+            evicted += 1
+        db.execute("UPDATE meta SET value = value - ? WHERE name = 'total_size'", (freed,))
+        self._count("evictions", evicted)
+
+    # ---------- HTTP ----------
+
+    def get(self, url: str, tool: str = None, ttl: float = None, **kwargs):
+        """
+        GET through the cache. Returns a CachedResponse (with .from_cache set)
+        for 200 responses and the live response for anything else.
+        """
+        ttl = TOOL_TTLS.get(tool, DEFAULT_TTL) if ttl is None else ttl
+        key = self.make_key("GET", url, kwargs.get("params"))
+        entry = self._load(key)
+        now = time.time()
+
+        if entry is not None and entry["expires_at"] > now:
+            self._count("hits")
+            return self._response(url, entry, from_cache=True)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = get_client().get(url, headers=headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            entry = dict(entry, expires_at=now + ttl)
+            self._store(key, entry)
+            return self._response(url, entry, from_cache=True)
+
+        self._count("misses")
+        if response.status_code != 200:
+            return response
+        entry = {
+            "tool": tool,
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "etag", "last-modified")},
+            "body": response.content,
+            "encoding": response.encoding,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "expires_at": now + ttl,
+            "size": len(response.content),
+        }
+        self._store(key, entry)
+        return self._response(url, entry, from_cache=False)
+
+    @staticmethod
+    def _response(url: str, entry: dict, from_cache: bool) -> CachedResponse:
+        response = CachedResponse(url, entry["status"], entry["headers"], entry["body"], entry["encoding"])
+        response.from_cache = from_cache
+        return response
+
+    # ---------- Tool results ----------
+
+    def cached_call(self, tool: str, fn, *args, ttl: float = None, **kwargs):
+        """Memoizes a tool's string result by (tool, arguments) for the tool's TTL."""
+        ttl = TOOL_TTLS.get(tool, DEFAULT_TTL) if ttl is None else ttl
+        key = self.make_key("CALL", tool, args, kwargs)
+        entry = self._load(key)
+        if entry is not None and entry["expires_at"] > time.time():
+            self._count("hits")
+            return entry["body"].decode("utf-8")
+        self._count("misses")
+        result = fn(*args, **kwargs)
+        if isinstance(result, str) and not result.startswith("Error"):
+            body = result.encode("utf-8")
+            self._store(key, {
+                "tool": tool, "status": 200, "headers": {}, "body": body, "encoding": "utf-8",
+                "etag": None, "last_modified": None, "expires_at": time.time() + ttl, "size": len(body),
+            })
+        return result
+
+    # ---------- Maintenance ----------
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            served = self.stats["hits"] + self.stats["revalidated"]
+            lookups = served + self.stats["misses"]
+        return served / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        db.execute("DELETE FROM entries")
+        db.execute("UPDATE meta SET value = 0 WHERE name = 'total_size'")
+        db.execute("COMMIT")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> ResponseCache:
+    """Returns the process-wide ResponseCache (its SQLite store is shared across processes)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,124 @@
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeout applied to every request unless overridden.
+DEFAULT_TIMEOUT = (3.05, 10)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+USER_AGENT = "ai-developer-agent/1.0"
+
+class HttpClient:
+    """
+    Shared HTTP layer for all network tools.
+
+    A single requests.Session keeps per-host connection pools alive
+    (keep-alive, no repeated TCP/TLS handshakes), a semaphore per host bounds
+    concurrency, idempotent requests are retried with jittered exponential
+    backoff, and every call gets the same timeout policy.
+    """
+
+    def __init__(self, pool_size: int = 16, max_per_host: int = 6, retries: int = 3,
+                 backoff: float = 0.3, max_backoff: float = 8.0, timeout=DEFAULT_TIMEOUT):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max_per_host, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._host_limits.get(host)
+            if sem is None:
+                sem = self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return sem
+
+    def _delay(self, attempt: int, response=None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.max_backoff)
+                except ValueError:
+                    try:
+                        wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                        return min(max(wait, 0), self.max_backoff)
+                    except (TypeError, ValueError):
+                        pass
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends a request through the shared session, retrying transient failures."""
+        kwargs.setdefault("timeout", self.timeout)
+        method = method.upper()
+        attempts = self.retries + 1 if method in IDEMPOTENT_METHODS else 1
+        sem = self._host_semaphore(url)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                with sem:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUSES and not last:
+                delay = self._delay(attempt, response)
+                response.close()
+                time.sleep(delay)
+                continue
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def get_json(self, url: str, **kwargs):
+        response = self.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_all(self, urls: list, parse=None, max_workers: int = 8) -> list:
+        """
+        GETs many URLs concurrently. Returns parse(response) (or the response)
+        for each URL, in input order; a failed fetch yields its exception.
+        """
+        def fetch(url):
+            try:
+                response = self.get(url)
+                return parse(response) if parse else response
+            except Exception as e:
+                return e
+
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as pool:
+            return list(pool.map(fetch, urls))
+
+    def close(self):
+        self.session.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> HttpClient:
+    """Returns the process-wide HttpClient, shared by every tool and session."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
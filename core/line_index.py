@@ -0,0 +1,294 @@
+import os
+import sys
+import mmap
+import struct
+import hashlib
+import bisect
+import threading
+from array import array
+from collections import OrderedDict
+from core.config import CACHE_DIR
+
+SIDECAR_DIR = os.path.join(CACHE_DIR, "line_index")
+# Smaller files are cheap to re-index, so their index is kept in memory only.
+SIDECAR_MIN_SIZE = 1024 * 1024
+SCAN_CHUNK = 4 * 1024 * 1024
+FINGERPRINT_SIZE = 64
+# Offsets kept in memory across all files; least recently used indexes are dropped first.
+# A single index larger than this is never held in memory: its offsets are
+# read through an mmap of its sidecar instead.
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# magic, byteorder flag, size, mtime_ns, inode, fingerprint length, offset count.
+# The fingerprint field is padded to FINGERPRINT_SIZE so offsets start at a
+# fixed position and new ones can be appended in place.
+_HEADER = struct.Struct("<8sBQQQHQ")
+_MAGIC = b"LIDX0002"
+_OFFSETS_START = _HEADER.size + FINGERPRINT_SIZE
+
+class LineIndex:
+    """
+    Newline-offset index for one file, stored as a compact array('Q').
+
+    offsets[i] is the byte offset where line i (0-based) starts. The index is
+    keyed by (size, mtime, inode): a changed file is re-indexed, while a file
+    that only grew (an append-only log) is extended from where the last scan
+    stopped. Indexes of large files are persisted as sidecars in the cache dir;
+    when a file grows only the new offsets are appended to its sidecar. An
+    index over CACHE_MAX_BYTES is served from an mmap of its sidecar (offsets
+    is then a memoryview), so it costs no heap memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.offsets = array('Q', [0])
+        self.size = 0
+        self.mtime_ns = None
+        self.inode = None
+        self.fingerprint = b""
+        self._persisted = 0 # Offsets already in the sidecar (0: rewrite it)
+        self._map = None # mmap of the sidecar while offsets are read from it
+        self._lock = threading.Lock()
+
+    # ---------- Building ----------
+
+    def _sidecar_path(self) -> str:
+        key = hashlib.sha1(self.path.encode("utf-8")).hexdigest()
+        return os.path.join(SIDECAR_DIR, f"{key}.idx")
+
+    def _scan(self, f, start: int, end: int, offsets: array):
+        """Appends to offsets the start offset of every line found in [start, end)."""
+        f.seek(start)
+        base = start
+        append = offsets.append
+        while base < end:
+            chunk = f.read(min(SCAN_CHUNK, end - base))
+            if not chunk:
+                break
+            pos = chunk.find(b"\n")
+            while pos != -1:
+                append(base + pos + 1)
+                pos = chunk.find(b"\n", pos + 1)
+            base += len(chunk)
+
+    def _read_fingerprint(self, f, size: int) -> bytes:
+        start = max(0, size - FINGERPRINT_SIZE)
+        f.seek(start)
+        return f.read(size - start)
+
+    def refresh(self) -> "LineIndex":
+        """Brings the index up to date with the file on disk."""
+        with self._lock:
+            st = os.stat(self.path)
+            if st.st_size == self.size and st.st_mtime_ns == self.mtime_ns and st.st_ino == self.inode:
+                return self
+            if self.mtime_ns is None:
+                self._load_sidecar()
+                if st.st_size == self.size and st.st_mtime_ns == self.mtime_ns and st.st_ino == self.inode:
+                    return self
+
+            with open(self.path, 'rb') as f:
+                appended = (
+                    self.mtime_ns is not None
+                    and st.st_ino == self.inode
+                    and st.st_size > self.size
+                    and self._read_fingerprint(f, self.size) == self.fingerprint
+                )
+                if not appended:
+                    self._unmap()
+                    self.offsets = array('Q', [0])
+                    self.size = 0
+                    self._persisted = 0
+                new = self.offsets if self._map is None else array('Q')
+                self._scan(f, self.size, st.st_size, new)
+                self.size = st.st_size
+                self.mtime_ns = st.st_mtime_ns
+                self.inode = st.st_ino
+                self.fingerprint = self._read_fingerprint(f, self.size)
+
+            if self._map is not None:
+                self._extend_mapped(new)
+            elif self.size >= SIDECAR_MIN_SIZE:
+                self._save_sidecar()
+                if self.nbytes > CACHE_MAX_BYTES and self._persisted == len(self.offsets):
+                    try:
+                        self._map_sidecar(len(self.offsets))
+                    except (OSError, ValueError):
+                        pass # Stays in memory (and is evicted from the cache first)
+            return self
+
+    # ---------- Sidecar persistence ----------
+
+    def _header(self, count: int = None) -> bytes:
+        count = len(self.offsets) if count is None else count
+        return _HEADER.pack(_MAGIC, sys.byteorder == "little", self.size, self.mtime_ns,
+                            self.inode, len(self.fingerprint), count) + \
+            self.fingerprint.ljust(FINGERPRINT_SIZE, b"\0")
+
+    def _save_sidecar(self):
+        try:
+            path = self._sidecar_path()
+            if self._persisted and os.path.exists(path):
+                # Append the new offsets, then publish them by rewriting the
+                # header; a crash in between leaves the old, still valid count.
+                with open(path, 'r+b') as f:
+                    f.seek(_OFFSETS_START + self._persisted * self.offsets.itemsize)
+                    self.offsets[self._persisted:].tofile(f)
+                    f.flush()
+                    f.seek(0)
+                    f.write(self._header())
+            else:
+                os.makedirs(SIDECAR_DIR, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(self._header())
+                    self.offsets.tofile(f)
+                os.replace(tmp_path, path)
+            self._persisted = len(self.offsets)
+        except OSError:
+            self._persisted = 0 # The sidecar is only a cache; rewrite it next time
+
+    def _load_sidecar(self):
+        try:
+            with open(self._sidecar_path(), 'rb') as f:
+                magic, little, size, mtime_ns, inode, fp_len, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or bool(little) != (sys.byteorder == "little"):
+                    return
+                fingerprint = f.read(FINGERPRINT_SIZE)[:fp_len]
+                offsets = array('Q')
+                if count * offsets.itemsize <= CACHE_MAX_BYTES:
+                    offsets.fromfile(f, count)
+            if count * offsets.itemsize > CACHE_MAX_BYTES:
+                self._map_sidecar(count)
+            else:
+                self.offsets = offsets
+        except (OSError, EOFError, ValueError, struct.error):
+            return
+        self.size, self.mtime_ns, self.inode, self.fingerprint = size, mtime_ns, inode, fingerprint
+        self._persisted = count
+
+    def _map_sidecar(self, count: int):
+        """Points offsets at the first `count` offsets of the sidecar, mapped read-only."""
+        with open(self._sidecar_path(), 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        end = _OFFSETS_START + count * 8
+        if len(mapped) < end:
+            mapped.close()
+            raise ValueError("truncated line index sidecar")
+        self._unmap()
+        self.offsets = memoryview(mapped)[_OFFSETS_START:end].cast('Q')
+        self._map = mapped
+
+    def _unmap(self, keep: bool = False):
+        """Closes the sidecar mapping; with keep, the offsets are first copied into memory."""
+        if self._map is None:
+            return
+        offsets = array('Q')
+        if keep:
+            offsets.frombytes(self.offsets.tobytes())
+        self.offsets.release()
+        self._map.close()
+        self.offsets, self._map = offsets, None
+
+    def _extend_mapped(self, new: array):
+        """Appends new offsets to the mapped sidecar and maps it again."""
+        count = len(self.offsets) + len(new)
+        try:
+            with open(self._sidecar_path(), 'r+b') as f:
+                f.seek(_OFFSETS_START + len(self.offsets) * new.itemsize)
+                new.tofile(f)
+                f.flush()
+                f.seek(0)
+                f.write(self._header(count))
+            self._map_sidecar(count)
+            self._persisted = count
+        except (OSError, ValueError):
+            self._unmap(keep=True)
+            self.offsets.extend(new)
+            self._persisted = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of offsets held in memory (0 while they are read from the mapped sidecar)."""
+        return 0 if self._map is not None else len(self.offsets) * self.offsets.itemsize
+
+    # ---------- Queries ----------
+
+    # Queries take the lock too: refresh() may be extending or remapping the offsets.
+
+    @property
+    def line_count(self) -> int:
+        with self._lock:
+            return self._line_count()
+
+    def _line_count(self) -> int:
+        if self.size == 0:
+            return 0
+        # A trailing newline ends the last line rather than starting a new one
+        return len(self.offsets) - 1 if self.offsets[-1] == self.size else len(self.offsets)
+
+    def byte_range(self, start_line: int, end_line: int = None):
+        """Returns (start, end) byte offsets for lines start_line..end_line (1-based, inclusive)."""
+        with self._lock:
+            return self._byte_range(start_line, end_line)
+
+    def _byte_range(self, start_line: int, end_line: int = None):
+        count = self._line_count()
+        first = max(1, start_line) - 1
+        if first >= count:
+            return self.size, self.size
+        last = count if end_line is None else min(end_line, count)
+        if last <= first:
+            return self.offsets[first], self.offsets[first]
+        end = self.offsets[last] if last < len(self.offsets) else self.size
+        return self.offsets[first], end
+
+    def line_at(self, offset: int) -> int:
+        """Returns the 1-based number of the line containing byte `offset`."""
+        with self._lock:
+            return bisect.bisect_right(self.offsets, offset)
+
+    def read_lines(self, start_line: int, end_line: int = None) -> bytes:
+        """Reads lines start_line..end_line with a single seek and bounded read."""
+        return self._read(*self.byte_range(start_line, end_line))
+
+    def _read(self, start: int, end: int) -> bytes:
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def tail(self, lines: int) -> bytes:
+        """Reads the last `lines` lines."""
+        if lines <= 0:
+            return b""
+        with self._lock:
+            count = self._line_count()
+            start, end = self._byte_range(max(1, count - lines + 1), count)
+        return self._read(start, end)
+
+_indexes = OrderedDict() # path -> LineIndex, least recently used first
+_indexes_lock = threading.Lock()
+
+def get_line_index(path: str, build: bool = True) -> LineIndex:
+    """
+    Returns the shared, refreshed LineIndex for path. With build=False, returns
+    None instead of scanning a file that has no index in memory or on disk.
+    """
+    path = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = LineIndex(path)
+            if not build and not os.path.exists(index._sidecar_path()):
+                return None
+            _indexes[path] = index
+        _indexes.move_to_end(path)
+    index.refresh()
+    with _indexes_lock:
+        # Evicted indexes of large files reload from their sidecar; one still over
+        # the cap on its own (its sidecar could not be mapped) is not kept either
+        total = sum(i.nbytes for i in _indexes.values())
+        while total > CACHE_MAX_BYTES and _indexes:
+            _, evicted = _indexes.popitem(last=False)
+            total -= evicted.nbytes
+    return index
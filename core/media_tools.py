@@ -0,0 +1,35 @@
+# Image and audio tools. Heavy dependencies are imported on first use, so
+# loading this module is cheap; see core/tool_registry.py.
+import os
+
+_tts_engine = None
+
+def image_info(path: str):
+    """Get basic image info."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return "Error: 'Pillow' library not installed."
+    try:
+        if not os.path.exists(path):
+            return f"File '{path}' not found."
+        with Image.open(path) as img:
+            return f"Format: {img.format}, Size: {img.size}, Mode: {img.mode}"
+    except Exception as e:
+        return f"Error reading image: {e}"
+
+def text_to_speech(text: str, out_file: str = "output.wav"):
+    """Text to speech (saves audio to a file)."""
+    global _tts_engine
+    try:
+        import pyttsx3
+    except ImportError:
+        return "Error: 'pyttsx3' library not installed."
+    try:
+        if _tts_engine is None:
+            _tts_engine = pyttsx3.init()
+        _tts_engine.save_to_file(text, out_file)
+        _tts_engine.runAndWait()
+        return f"Saved speech to {out_file}"
+    except Exception as e:
+        return f"Error in TTS: {e}"
@@ -0,0 +1,299 @@
+import time
+import queue
+import threading
+import importlib
+import itertools
+import multiprocessing
+from multiprocessing.connection import wait
+from concurrent.futures import Future
+from core.config import MODEL_WORKERS
+
+# Seconds a caller waits for a result (the first request may include loading the model).
+MODEL_TIMEOUT = 600
+
+_PIPELINE_TASKS = {"sentiment": "sentiment-analysis", "summarize": "summarization"}
+
+def load_pipeline(task: str):
+    """Default loader: a transformers pipeline that takes a list of texts in one forward pass."""
+    from transformers import pipeline
+    pipe = pipeline(_PIPELINE_TASKS[task])
+
+    def run(texts, **kwargs):
+        return pipe(texts, batch_size=len(texts), truncation=True, **kwargs)
+    return run
+
+def _resolve(target: str):
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+def _worker_main(loader: str, preload, conn):
+    """
+    Worker process: loads each model once, then serves batches from its pipe
+    until it gets None. Every worker has a pipe of its own, so one that dies
+    (e.g. killed mid-batch) cannot leave a lock shared with the others held.
+    """
+    factory = _resolve(loader)
+    models = {}
+
+    def model(task):
+        if task not in models:
+            start = time.perf_counter()
+            models[task] = factory(task)
+            conn.send(("loaded", task, time.perf_counter() - start))
+        return models[task]
+
+    for task in preload:
+        try:
+            model(task)
+        except Exception as e:
+            conn.send(("load_error", task, f"{type(e).__name__}: {e}"))
+
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+        batch_id, task, texts, kwargs = item
+        try:
+            out = list(model(task)(texts, **kwargs))
+            conn.send(("result", batch_id, out, None))
+        except Exception as e:
+            conn.send(("result", batch_id, None, f"{type(e).__name__}: {e}"))
+
+class ModelWorkerPool:
+    """
+    Long-lived worker processes for heavy ML models.
+
+    Each worker loads a model the first time it serves that task and keeps
+    it for the life of the process, so sessions and Streamlit reruns never
+    pay for loading again. submit() returns a Future immediately. Requests
+    for the same task and options that queue up while all workers are busy
+    are sent to the next free worker as one batch of up to `max_batch`
+    texts, so concurrent sessions share a single forward pass; `max_wait`
+    optionally holds a batch open a little longer even when a worker is free.
+    A worker that dies fails the futures of the batch it was running
+    (instead of leaving them pending) and is replaced when work arrives.
+
+    `loader` is a "module:function" taking a task name and returning
+    fn(texts, **kwargs) -> one result per text; it is resolved inside the
+    workers, which are started with the spawn method.
+    """
+
+    def __init__(self, workers: int = 1, max_batch: int = 16, max_wait: float = 0.0,
+                 loader: str = "core.model_workers:load_pipeline", preload=()):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.loader = loader
+        self.preload = tuple(preload)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers = {} # pipe -> worker process
+        self._busy = {} # pipe -> id of the batch that worker is running
+        self._wakeup = None # (reader, writer) interrupting the collector's wait
+        self._inbox = queue.Queue()
+        self._pending = {} # batch id -> futures
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock) # Notified when a worker becomes free
+        self._closing = False
+        self._threads = []
+        self.stats = {"requests": 0, "batches": 0, "max_batch": 0, "errors": 0, "load_seconds": {}}
+
+    def start(self):
+        with self._lock:
+            if self._wakeup is None:
+                self._wakeup = multiprocessing.Pipe(duplex=False)
+                self._threads = [
+                    threading.Thread(target=self._batch_loop, name="model-batcher", daemon=True),
+                    threading.Thread(target=self._collect_loop, name="model-results", daemon=True),
+                ]
+                for thread in self._threads:
+                    thread.start()
+            self._spawn()
+        return self
+
+    def _spawn(self):
+        """Starts workers that are missing or died; called with the lock held."""
+        if len(self._workers) >= self.workers:
+            return
+        while len(self._workers) < self.workers:
+            conn, child = self._ctx.Pipe()
+            proc = self._ctx.Process(
+                target=_worker_main, args=(self.loader, self.preload, child), name="model-worker", daemon=True,
+            )
+            proc.start()
+            child.close() # Only the worker holds its end, so its death reads as EOF here
+            self._workers[conn] = proc
+        self._wakeup[1].send_bytes(b"") # The collector starts waiting on the new pipes
+
+    def submit(self, task: str, text: str, **kwargs) -> Future:
+        """Queues one text; the Future resolves to the model's result for it."""
+        if self._wakeup is None:
+            self.start()
+        future = Future()
+        key = (task, tuple(sorted(kwargs.items())))
+        self._inbox.put((key, text, future))
+        return future
+
+    def map(self, task: str, texts, timeout: float = MODEL_TIMEOUT, **kwargs) -> list:
+        futures = [self.submit(task, text, **kwargs) for text in texts]
+        return [f.result(timeout) for f in futures]
+
+    def _free_worker(self):
+        """Waits for an idle worker, replacing dead ones; called with the lock held. None when closing."""
+        while not self._closing:
+            self._spawn()
+            for conn, proc in self._workers.items():
+                if conn not in self._busy and proc.is_alive(): # The collector may not have seen it die yet
+                    return conn
+            self._idle.wait(timeout=1.0)
+        return None
+
+    def _batch_loop(self):
+        while True:
+            first = self._inbox.get()
+            if first is None:
+                return
+            items = [first]
+            # Requests that arrive while every worker is busy join the next batch
+            with self._idle:
+                self._free_worker()
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch * 4:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._inbox.get(timeout=remaining) if remaining > 0 else self._inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._inbox.put(None)
+                    break
+                items.append(item)
+
+            groups = {}
+            for key, text, future in items:
+                groups.setdefault(key, []).append((text, future))
+            for (task, options), group in groups.items():
+                for i in range(0, len(group), self.max_batch):
+                    self._dispatch(task, options, group[i:i + self.max_batch])
+
+    def _dispatch(self, task: str, options, chunk):
+        futures = [future for _, future in chunk]
+        batch_id = next(self._ids)
+        with self._idle:
+            conn = self._free_worker()
+            if conn is not None:
+                self._busy[conn] = batch_id
+                self._pending[batch_id] = futures
+                self.stats["requests"] += len(chunk)
+                self.stats["batches"] += 1
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(chunk))
+        if conn is None:
+            for future in futures:
+                future.set_exception(RuntimeError("model worker pool closed"))
+            return
+        try:
+            conn.send((batch_id, task, [text for text, _ in chunk], dict(options)))
+        except (OSError, ValueError):
+            pass # The worker died; the collector fails the batch when its pipe closes
+
+    def _collect_loop(self):
+        wakeup = self._wakeup[0]
+        while True:
+            with self._lock:
+                if self._closing and not self._workers:
+                    return
+                conns = list(self._workers)
+            for conn in wait(conns + [wakeup]):
+                if conn is wakeup:
+                    wakeup.recv_bytes()
+                    continue
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self._lost(conn)
+                    continue
+                self._handle(conn, message)
+
+    def _lost(self, conn):
+        """A worker's pipe closed: fails the batch it was running (it is replaced when work arrives)."""
+        with self._idle:
+            proc = self._workers.pop(conn)
+            futures = self._pending.pop(self._busy.pop(conn, None), [])
+            self._idle.notify()
+        if not futures:
+            return # Exited while idle (e.g. on close)
+        proc.join(timeout=5)
+        self.stats["errors"] += 1
+        exc = RuntimeError(f"model worker {proc.pid} died while running the batch (exit code {proc.exitcode})")
+        for future in futures:
+            future.set_exception(exc)
+
+    def _handle(self, conn, message):
+        kind = message[0]
+        if kind == "loaded":
+            self.stats["load_seconds"][message[1]] = message[2]
+            return
+        if kind == "load_error":
+            self.stats["errors"] += 1
+            return
+        _, batch_id, out, error = message
+        with self._idle:
+            futures = self._pending.pop(batch_id, [])
+            self._busy.pop(conn, None)
+            self._idle.notify()
+        if error is not None or out is None or len(out) != len(futures):
+            self.stats["errors"] += 1
+            exc = RuntimeError(error or "model returned a wrong number of results")
+            for future in futures:
+                future.set_exception(exc)
+        else:
+            for future, result in zip(futures, out):
+                future.set_result(result)
+
+    def mean_batch(self) -> float:
+        return self.stats["requests"] / self.stats["batches"] if self.stats["batches"] else 0.0
+
+    def close(self):
+        if self._wakeup is None:
+            return
+        with self._idle:
+            self._closing = True # Dead workers are no longer replaced
+            self._idle.notify_all()
+        self._inbox.put(None)
+        self._threads[0].join(timeout=5) # The batcher: nothing is sent to the workers once it stopped
+        with self._lock:
+            workers = dict(self._workers)
+        for conn in workers:
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for proc in workers.values():
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._wakeup[1].send_bytes(b"")
+        self._threads[1].join(timeout=5)
+        with self._lock:
+            for futures in self._pending.values():
+                for future in futures:
+                    future.set_exception(RuntimeError("model worker pool closed"))
+            self._pending.clear()
+            self._busy.clear()
+            self._workers.clear()
+            self._closing = False
+        self._wakeup = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_model_pool() -> ModelWorkerPool:
+    """Process-wide worker pool for the NLP tools (AGENT_MODEL_WORKERS processes)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ModelWorkerPool(workers=max(1, MODEL_WORKERS))
+        return _pool
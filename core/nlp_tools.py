@@ -0,0 +1,72 @@
+# Language tools. Heavy dependencies are imported on first use, so loading
+# this module is cheap; see core/tool_registry.py. The transformers models
+# run in long-lived worker processes unless AGENT_MODEL_WORKERS=0.
+import importlib.util
+from core.config import MODEL_WORKERS
+from core.model_workers import get_model_pool, MODEL_TIMEOUT
+
+_sentiment_pipe = None
+_summarizer = None
+
+def translate_text(text: str, target_lang: str = "en"):
+    """Translate text using GoogleTranslator (deep-translator)."""
+    try:
+        from deep_translator import GoogleTranslator
+    except ImportError:
+        return "Error: 'deep-translator' library not installed."
+    try:
+        return GoogleTranslator(source="auto", target=target_lang).translate(text)
+    except Exception as e:
+        return f"Error translating text: {e}"
+
+def detect_language(text: str):
+    """Detect language of text."""
+    try:
+        from langdetect import detect
+    except ImportError:
+        return "Error: 'langdetect' library not installed."
+    try:
+        return f"Detected language: {detect(text)}"
+    except Exception as e:
+        return f"Error detecting language: {e}"
+
+def _run_model(task: str, text: str, **kwargs):
+    """Runs one text through a model in the shared worker processes (see core/model_workers.py)."""
+    if importlib.util.find_spec("transformers") is None:
+        raise ImportError("transformers")
+    return get_model_pool().submit(task, text, **kwargs).result(MODEL_TIMEOUT)
+
+def sentiment(text: str):
+    """Sentiment analysis using transformers."""
+    global _sentiment_pipe
+    try:
+        if MODEL_WORKERS:
+            result = _run_model("sentiment", text)
+        else:
+            if _sentiment_pipe is None:
+                from transformers import pipeline
+                _sentiment_pipe = pipeline("sentiment-analysis")
+            result = _sentiment_pipe(text)[0]
+        return f"Label: {result['label']}, score: {result['score']:.3f}"
+    except ImportError:
+        return "Error: 'transformers' library not installed."
+    except Exception as e:
+        return f"Error in sentiment analysis: {e}"
+
+def summarize_text(text: str, max_tokens: int = 130):
+    """Summarize text using transformers."""
+    global _summarizer
+    options = {"max_length": max_tokens, "min_length": min(30, max_tokens), "do_sample": False}
+    try:
+        if MODEL_WORKERS:
+            result = _run_model("summarize", text, **options)
+        else:
+            if _summarizer is None:
+                from transformers import pipeline
+                _summarizer = pipeline("summarization")
+            result = _summarizer(text, **options)[0]
+        return result["summary_text"]
+    except ImportError:
+        return "Error: 'transformers' library not installed."
+    except Exception as e:
+        return f"Error summarizing: {e}"
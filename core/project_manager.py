@@ -1,111 +1,368 @@
 import os
-import subprocess
 import platform
-import difflib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core import file_reader
+from core.diff_engine import DiffEngine
+from core.write_batch import WriteBatch
+from core.command_runner import CommandRunner, format_result
+from core.shell_pool import ShellPool
+from core.config import workspace_cache_dir
+from core.workspace_index import WorkspaceIndex
+from core.workspace_archive import WorkspaceArchiver
+from core.fs_watcher import create_watcher
+from core.tracing import traced
 
 class ProjectManager:
-    def __init__(self, working_dir: str):
+    def __init__(self, working_dir: str, watch: bool = False, diff_backend: str = "patience",
+                 persistent_shell: bool = True):
         self.working_dir = os.path.abspath(working_dir)
         if not os.path.exists(self.working_dir):
             os.makedirs(self.working_dir)
 
+        # Tree index, warm-started from the previous session if available
+        self.cache_dir = workspace_cache_dir(self.working_dir)
+        self.index_path = os.path.join(self.cache_dir, "tree_index.json")
+        self.index = WorkspaceIndex(self.working_dir)
+        self.index.load(self.index_path)
+
+        # Shared so repeated dry runs of the same proposal hit its cache
+        self.diff_engine = DiffEngine(backend=diff_backend)
+        self.write_batch = WriteBatch()
+        self.command_runner = CommandRunner(self.working_dir)
+        # Long-lived shells keep cd/exports/venvs between commands (POSIX only)
+        self.shell_pool = ShellPool(self.working_dir) if persistent_shell and hasattr(os, "killpg") else None
+
+        # Optional background watcher; when running, the index is only
+        # updated from its events instead of re-statting the tree.
+        self.watcher = None
+        self.change_version = 0 # Bumped whenever a real change is observed
+        self._changes = {} # path -> change_version at which it last changed
+        self._changes_floor = 0 # Versions older than this have lost their paths
+        # Guards the version and change log, also updated from write-batch threads
+        self._changes_lock = threading.Lock()
+        if watch:
+            self.start_watcher()
+
+    # Paths remembered for changes_since(); beyond this consumers are told to rescan.
+    CHANGE_LOG_LIMIT = 10000
+
+    def start_watcher(self, poll_interval: float = 1.0):
+        """Starts the background filesystem watcher (inotify on Linux, polling elsewhere)."""
+        if self.watcher is None:
+            self.index.refresh()
+            self.watcher = create_watcher(self.working_dir, poll_interval=poll_interval)
+            self.watcher.start()
+
+    def stop_watcher(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def poll_changes(self) -> list:
+        """Drains pending watcher events into the index. Returns the events applied."""
+        if self.watcher is None:
+            return []
+        events = self.watcher.drain()
+        if not events:
+            return events
+        with self._changes_lock:
+            self.change_version += 1
+            for event in events:
+                if event["type"] == "overflow":
+                    self.index.refresh()
+                    self._forget_changes()
+                else:
+                    self.index.mark_changed(event["path"])
+                    self._note_change(event["path"])
+        self.index.refresh_pending()
+        return events
+
+    def changes_since(self, version: int):
+        """
+        Returns (current version, paths changed after `version`). The paths are
+        None when they are unknown (events were lost or the log was trimmed),
+        in which case the caller should treat everything as changed.
+        """
+        self.poll_changes()
+        with self._changes_lock:
+            if version < self._changes_floor:
+                return self.change_version, None
+            return self.change_version, {path for path, v in self._changes.items() if v > version}
+
+    def _note_change(self, rel: str):
+        """Called with _changes_lock held."""
+        if len(self._changes) >= self.CHANGE_LOG_LIMIT:
+            self._forget_changes()
+        self._changes[rel] = self.change_version
+
+    def _forget_changes(self):
+        self._changes.clear()
+        self._changes_floor = self.change_version
+
+    def _record_write(self, filepath: str):
+        """Makes our own writes visible immediately, without waiting for the watcher."""
+        rel = self._rel_dir(filepath)
+        if rel is None:
+            return
+        # The nearest indexed ancestor covers any directories write_file had to create
+        path = rel
+        while True:
+            parent = path.rsplit("/", 1)[0] if "/" in path else "."
+            if parent == "." or parent in self.index.nodes:
+                break
+            path = parent
+        if self.watcher is not None:
+            self.index.mark_changed(path) # Drained by poll_changes()
+        else:
+            self.index.invalidate(parent) # Re-listed by the next refresh
+        with self._changes_lock:
+            self.change_version += 1
+            self._note_change(rel)
+
+    def _rel_dir(self, subdir: str):
+        """Returns subdir as a workspace-relative index key, or None if it lies outside the workspace."""
+        start = os.path.normpath(os.path.join(self.working_dir, subdir))
+        rel = os.path.relpath(start, self.working_dir)
+        if rel == ".." or rel.startswith(".." + os.sep):
+            return None
+        return rel.replace(os.sep, "/")
+
+    def _sync_index(self, rel: str):
+        if self.watcher is not None:
+            self.poll_changes()
+            self.index.refresh_pending()
+            if rel not in self.index.nodes:
+                self.index.refresh(rel)
+        else:
+            self.index.refresh(rel)
+
+    def _save_index(self):
+        try:
+            self.index.save(self.index_path)
+        except OSError:
+            pass # The index is only a cache
+
+    @traced("pm.list_files")
     def list_files(self, subdir: str = ".", max_depth: int = 2) -> str:
         """Generates a tree view of the project directory."""
-        tree = []
         try:
             start = os.path.normpath(os.path.join(self.working_dir, subdir))
-            if not os.path.exists(start):
+            if not os.path.isdir(start):
                 return "Error: Directory does not exist."
-            
-            num_sep_start = start.count(os.sep)
-            for root, dirs, files in os.walk(start):
-                num_sep = root.count(os.sep)
-                if num_sep - num_sep_start >= max_depth:
-                    del dirs[:]
-                    continue
-                
-                indent = "  " * (num_sep - num_sep_start)
-                tree.append(f"{indent}{os.path.basename(root)}/")
-                sub_indent = "  " * (num_sep - num_sep_start + 1)
-                for f in files:
-                    if not f.startswith('.'): # Ignore hidden files
-                        tree.append(f"{sub_indent}{f}")
-            return "\n".join(tree)
+
+            rel = self._rel_dir(subdir)
+            if rel is not None:
+                self._sync_index(rel)
+                self._save_index()
+                return self.index.render_tree(rel, max_depth)
+            return self._walk_tree(start, max_depth)
         except Exception as e:
             return f"Error reading directory: {str(e)}"
 
-    def read_file(self, filepath: str) -> str:
-        """Reads content from a file."""
+    @traced("pm.find_files")
+    def find_files(self, pattern: str = "*", subdir: str = ".") -> list:
+        """Returns workspace-relative files under subdir matching a glob, served from the index."""
+        rel = self._rel_dir(subdir)
+        if rel is None:
+            return []
+        self._sync_index(rel)
+        self._save_index()
+        return self.index.find(rel, pattern)
+
+    def _walk_tree(self, start: str, max_depth: int) -> str:
+        """Tree view via a plain os.walk, used for directories outside the workspace."""
+        tree = []
+        num_sep_start = start.count(os.sep)
+        for root, dirs, files in os.walk(start):
+            num_sep = root.count(os.sep)
+            if num_sep - num_sep_start >= max_depth:
+                del dirs[:]
+                continue
+
+            indent = "  " * (num_sep - num_sep_start)
+            tree.append(f"{indent}{os.path.basename(root)}/")
+            sub_indent = "  " * (num_sep - num_sep_start + 1)
+            for f in files:
+                if not f.startswith('.'): # Ignore hidden files
+                    tree.append(f"{sub_indent}{f}")
+        return "\n".join(tree)
+
+    # Whole-file reads are truncated past this size; use a byte or line range instead.
+    READ_LIMIT = 1024 * 1024
+
+    @traced("pm.read_file")
+    def read_file(self, filepath: str, offset: int = None, length: int = None,
+                  start_line: int = None, end_line: int = None) -> str:
+        """
+        Reads content from a file.
+        Either a byte range (offset/length) or a 1-based, inclusive line range
+        (start_line/end_line) may be given. Whole-file reads and ranges without
+        an end (no length / end_line) stop at READ_LIMIT bytes.
+        """
         try:
             full_path = os.path.join(self.working_dir, filepath)
             if not os.path.exists(full_path):
                 return f"Error: File not found: {filepath}"
-            with open(full_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            if start_line is not None or end_line is not None:
+                return self._read_line_range(full_path, start_line or 1, end_line)
+            if offset is not None or length is not None:
+                offset = offset or 0
+                size = os.path.getsize(full_path)
+                if length is None and size - offset > self.READ_LIMIT:
+                    content = file_reader.read_bytes(full_path, offset, self.READ_LIMIT).decode('utf-8', errors='replace')
+                    return content + (f"\n[... truncated: showing bytes {offset}-{offset + self.READ_LIMIT} of {size}. "
+                                      "Pass length to read further ...]")
+                return file_reader.read_bytes(full_path, offset, length).decode('utf-8', errors='replace')
+
+            size = os.path.getsize(full_path)
+            content = file_reader.read_bytes(full_path, 0, self.READ_LIMIT).decode('utf-8', errors='replace')
+            if size > self.READ_LIMIT:
+                content += (f"\n[... truncated: showing {self.READ_LIMIT} of {size} bytes. "
+                            "Use offset/length or start_line/end_line to read more ...]")
+            return content
         except Exception as e:
             return f"Error reading file: {str(e)}"
 
+    def _read_line_range(self, full_path: str, start_line: int, end_line: int = None) -> str:
+        """Reads a line range; an open-ended one stops at the last whole line within READ_LIMIT."""
+        if end_line is not None:
+            return file_reader.read_lines(full_path, start_line, end_line)
+        index = file_reader.get_line_index(full_path)
+        start, end = index.byte_range(start_line)
+        if end - start <= self.READ_LIMIT:
+            return file_reader.read_lines(full_path, start_line)
+        last = index.line_at(start + self.READ_LIMIT) - 1
+        if last < start_line: # A single line longer than the limit
+            content = file_reader.read_bytes(full_path, start, self.READ_LIMIT).decode('utf-8', errors='replace')
+            return content + f"\n[... truncated: line {start_line} is longer than {self.READ_LIMIT} bytes ...]"
+        content = file_reader.read_lines(full_path, start_line, last)
+        return content + (f"\n[... truncated: showing lines {start_line}-{last} of {index.line_count}. "
+                          "Pass end_line to read further ...]")
+
+    def iter_file(self, filepath: str, offset: int = 0, length: int = None, chunk_size: int = file_reader.CHUNK_SIZE):
+        """Yields a file's bytes in bounded chunks without loading it into memory."""
+        full_path = os.path.join(self.working_dir, filepath)
+        yield from file_reader.iter_chunks(full_path, offset, length, chunk_size)
+
+    @traced("pm.tail_file")
+    def tail_file(self, filepath: str, lines: int = 20) -> str:
+        """Returns the last N lines of a file (from its line index if it has one, else a backward scan)."""
+        try:
+            full_path = os.path.join(self.working_dir, filepath)
+            if not os.path.exists(full_path):
+                return f"Error: File not found: {filepath}"
+            return file_reader.tail_lines(full_path, lines)
+        except Exception as e:
+            return f"Error tailing file: {str(e)}"
+
     def write_file(self, filepath: str, content: str, dry_run: bool = False) -> dict:
         """
-        Writes content to a file. 
+        Writes content to a file (atomically).
         If dry_run is True, returns the diff instead of writing.
         """
+        result = self.write_files([{"path": filepath, "content": content}], dry_run=dry_run)
+        if not result["success"]:
+            return {"success": False, "error": result["error"]}
+        return result["files"][0]
+
+    def _read_for_diff(self, filepath: str) -> str:
+        full_path = os.path.join(self.working_dir, filepath)
+        if not os.path.exists(full_path):
+            return ""
+        with open(full_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    @traced("pm.write_files")
+    def write_files(self, files: list, dry_run: bool = False) -> dict:
+        """
+        Writes several files as one transaction: [{"path": ..., "content": ...}, ...].
+        Either every file is written or, on any failure, none are.
+        If dry_run is True, only the diffs are computed.
+        """
         try:
-            full_path = os.path.join(self.working_dir, filepath)
-            
-            # Calculate Diff
-            if os.path.exists(full_path):
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    old_content = f.readlines()
-            else:
-                old_content = []
-            
-            new_content = content.splitlines(keepends=True)
-            diff = difflib.unified_diff(
-                old_content, 
-                new_content, 
-                fromfile=filepath, 
-                tofile=filepath, 
-                lineterm=''
-            )
-            diff_text = ''.join(diff)
-
-            if dry_run:
-                return {
-                    "success": True,
-                    "diff": diff_text,
-                    "action": "would_write",
-                    "path": filepath
-                }
-
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            return {
-                "success": True,
-                "diff": diff_text,
-                "action": "wrote",
-                "path": filepath
-            }
+            # Last write to a path wins, as with sequential write_file calls
+            latest = {}
+            for f in files:
+                latest[f["path"]] = f["content"]
+            paths = list(latest)
+
+            with ThreadPoolExecutor(max_workers=max(1, min(8, len(paths)))) as pool:
+                old_contents = list(pool.map(self._read_for_diff, paths))
+            diffs = [
+                self.diff_engine.unified_diff(old, latest[path], fromfile=path, tofile=path)
+                for path, old in zip(paths, old_contents)
+            ]
+            action = "would_write" if dry_run else "wrote"
+            results = [
+                {"success": True, "diff": diff, "action": action, "path": path}
+                for path, diff in zip(paths, diffs)
+            ]
+
+            if not dry_run:
+                self.write_batch.commit([(os.path.join(self.working_dir, path), latest[path]) for path in paths])
+                for path in paths:
+                    self._record_write(path)
+
+            return {"success": True, "action": action, "files": results}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def run_command(self, command: str) -> str:
+    @traced("pm.run_command")
+    def run_command(self, command: str, timeout: float = None) -> str:
         """Executes a shell command and returns output."""
         try:
-            result = subprocess.run(
-                command,
-                cwd=self.working_dir,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                timeout=30
-            )
-            output = result.stdout
-            if result.stderr:
-                output += f"\n[STDERR]\n{result.stderr}"
-            return output
+            if self.shell_pool is not None:
+                result = self.shell_pool.run(command, timeout)
+            else:
+                result = self.command_runner.run(command, timeout)
+            self.poll_changes()
+            return format_result(result)
         except Exception as e:
             return f"Execution Error: {str(e)}"
+
+    @traced("pm.run_commands")
+    def run_commands(self, commands: list, timeout: float = None, on_command=None) -> list:
+        """
+        Executes independent commands concurrently. Outputs are returned in command order.
+        Each runs in a fresh shell at the workspace root, not in the persistent session.
+        With on_command(command, stream), every command's live output is handed
+        over in order while the others keep running.
+        """
+        try:
+            if on_command is None:
+                results = self.command_runner.run_many(commands, timeout)
+            else:
+                streams = [self.command_runner.stream(command, timeout) for command in commands]
+                for command, stream in zip(commands, streams):
+                    on_command(command, stream)
+                results = [stream.wait() for stream in streams]
+            self.poll_changes()
+            return [format_result(r) for r in results]
+        except Exception as e:
+            return [f"Execution Error: {str(e)}"] * len(commands)
+
+    @traced("pm.stream_command")
+    def stream_command(self, command: str, timeout: float = None):
+        """
+        Starts a command and returns a CommandStream that yields output lines live.
+        Call .wait() (or finish iterating) and use format_result(stream.result) for the final output.
+        """
+        if self.shell_pool is not None:
+            return self.shell_pool.stream(command, timeout)
+        return self.command_runner.stream(command, timeout)
+
+    @traced("pm.archive_workspace")
+    def archive_workspace(self, dest: str, max_file_size: int = None, exclude=()) -> dict:
+        """
+        Zips the workspace to dest (honouring .gitignore, skipping files over
+        max_file_size bytes). Returns the archiver stats.
+        """
+        archiver = WorkspaceArchiver(self.working_dir, self.cache_dir, max_file_size=max_file_size, exclude=exclude)
+        return archiver.write(dest)
+
+    def close(self):
+        """Stops background resources (watcher, shell sessions)."""
+        self.stop_watcher()
+        if self.shell_pool is not None:
+            self.shell_pool.close()
@@ -0,0 +1,152 @@
+import time
+import hashlib
+import threading
+from datetime import timedelta
+from core.context_assembler import estimate_tokens
+from core.tracing import get_tracer
+from core.config import PROMPT_CACHE_MIN_TOKENS
+
+# Smallest cached content the Gemini API accepts, by model name prefix (the
+# longest matching prefix wins); other models get GEMINI_DEFAULT_MIN_TOKENS.
+GEMINI_MIN_TOKENS = {
+    "gemini-2.5-flash": 1024,
+    "gemini-2.5-pro": 4096,
+    "gemini-2.0-flash": 4096,
+    "gemini-1.5": 4096,
+}
+GEMINI_DEFAULT_MIN_TOKENS = 4096
+
+def gemini_min_tokens(model: str) -> int:
+    name = (model or "").lower().rsplit("/", 1)[-1] # Accepts "models/gemini-..."
+    matches = [prefix for prefix in GEMINI_MIN_TOKENS if name.startswith(prefix)]
+    return GEMINI_MIN_TOKENS[max(matches, key=len)] if matches else GEMINI_DEFAULT_MIN_TOKENS
+
+class GeminiCacheProvider:
+    """
+    Gemini context caching (google-generativeai is imported on first use).
+    min_tokens is the model's minimum unless AGENT_PROMPT_CACHE_MIN_TOKENS
+    (or the min_tokens argument) overrides it.
+    """
+
+    def __init__(self, api_key: str = None, model: str = None, min_tokens: int = PROMPT_CACHE_MIN_TOKENS):
+        self.api_key = api_key
+        self.min_tokens = min_tokens or gemini_min_tokens(model)
+        self._module = None
+
+    def _caching(self):
+        if self._module is None:
+            import google.generativeai as genai
+            from google.generativeai import caching
+            if self.api_key:
+                genai.configure(api_key=self.api_key)
+            self._module = caching
+        return self._module
+
+    def create(self, model: str, content: str, ttl: int):
+        """Uploads content; returns (handle, expiry as a unix timestamp)."""
+        cache = self._caching().CachedContent.create(
+            model=model, system_instruction=content, ttl=timedelta(seconds=ttl)
+        )
+        return cache.name, cache.expire_time.timestamp()
+
+    def extend(self, name: str, ttl: int) -> float:
+        cache = self._caching().CachedContent.get(name)
+        cache.update(ttl=timedelta(seconds=ttl))
+        return cache.expire_time.timestamp()
+
+    def delete(self, name: str):
+        self._caching().CachedContent.get(name).delete()
+
+class PromptPrefixCache:
+    """
+    Keeps the stable prompt prefix (instructions + tool catalogue) cached on
+    the provider and hands out its handle, so each turn only sends the new
+    message. The prefix is re-uploaded when its hash changes or the handle
+    expired, and extended shortly before expiry while still in use.
+
+    The provider needs create(model, content, ttl) -> (handle, expires_at)
+    and delete(handle); extend(handle, ttl) -> expires_at and a min_tokens
+    attribute are optional. benchmarks/mock_model.py has a local one.
+
+    Prefixes shorter than the provider's min_tokens are sent inline (counted
+    in usage["inline"]). With Gemini (1024-4096 depending on the model) that
+    is currently always the case: the instructions + tool catalogue are ~600
+    tokens.
+    """
+
+    def __init__(self, provider, model: str, ttl: int = 3600, refresh_margin: int = 120, clock=time.time):
+        self.provider = provider
+        self.model = model
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._handle = None
+        self._hash = None
+        self._expires = 0.0
+        self.last_error = None
+        self.prefix_tokens = 0 # Estimated size of the last prefix seen
+        self.usage = {
+            "uploads": 0, "extends": 0, "hits": 0, "inline": 0, "errors": 0,
+            "uploaded_tokens": 0, "tokens_saved": 0, # Estimated from the prefix length
+            "prompt_tokens": 0, "cached_tokens": 0, # As reported by the provider via record()
+        }
+
+    def handle(self, prefix: str):
+        """Returns the handle to reference instead of sending `prefix`, or None to send it inline."""
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        tokens = estimate_tokens(prefix)
+        with self._lock:
+            self.prefix_tokens = tokens
+            if tokens < getattr(self.provider, "min_tokens", 0):
+                self.usage["inline"] += 1
+                return None
+            now = self.clock()
+            if self._handle is not None and self._hash == digest and now < self._expires:
+                if self._expires - now <= self.refresh_margin:
+                    extend = getattr(self.provider, "extend", None)
+                    try:
+                        self._expires = extend(self._handle, self.ttl)
+                        self.usage["extends"] += 1
+                    except Exception: # No extend() or it failed: re-upload below
+                        self._expires = now
+                if self._expires > now:
+                    self.usage["hits"] += 1
+                    self.usage["tokens_saved"] += tokens
+                    return self._handle
+
+            self._drop()
+            with get_tracer().span("prompt_cache.upload", tokens=tokens):
+                try:
+                    self._handle, self._expires = self.provider.create(self.model, prefix, self.ttl)
+                except Exception as e:
+                    self.usage["errors"] += 1
+                    self.last_error = str(e)
+                    return None
+            self._hash = digest
+            self.usage["uploads"] += 1
+            self.usage["uploaded_tokens"] += tokens
+            return self._handle
+
+    def _drop(self):
+        if self._handle is not None:
+            try:
+                self.provider.delete(self._handle)
+            except Exception:
+                pass # Expired handles are already gone
+        self._handle, self._hash, self._expires = None, None, 0.0
+
+    def invalidate(self):
+        """Forgets the handle (e.g. the provider no longer knows it); the next call re-uploads."""
+        with self._lock:
+            self._drop()
+
+    def record(self, prompt_tokens: int, cached_tokens: int):
+        """Adds the provider's reported usage for one request."""
+        with self._lock:
+            self.usage["prompt_tokens"] += prompt_tokens
+            self.usage["cached_tokens"] += cached_tokens
+
+    def hit_rate(self) -> float:
+        total = self.usage["hits"] + self.usage["uploads"]
+        return self.usage["hits"] / total if total else 0.0
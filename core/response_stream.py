@@ -0,0 +1,182 @@
+import re
+import json
+from core.tracing import get_tracer
+
+# Text fields of the agent's reply that are streamed to the UI as they arrive.
+STREAMED_FIELDS = ("thought", "response")
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+def _decode_partial(raw: str, start: int):
+    """
+    Decodes JSON string content raw[start:] up to the last complete escape.
+    Returns (text, position reached).
+    """
+    out = []
+    i, n = start, len(raw)
+    while i < n:
+        j = raw.find('\\', i)
+        if j == -1:
+            out.append(raw[i:])
+            i = n
+            break
+        out.append(raw[i:j])
+        i = j
+        if i + 1 >= n:
+            break
+        esc = raw[i + 1]
+        if esc != 'u':
+            out.append(_ESCAPES.get(esc, esc))
+            i += 2
+            continue
+        if i + 6 > n:
+            break
+        try:
+            code = int(raw[i + 2:i + 6], 16)
+        except ValueError:
+            out.append(raw[i:i + 6])
+            i += 6
+            continue
+        if 0xD800 <= code < 0xDC00: # High surrogate: wait for its pair
+            if i + 12 > n:
+                break
+            if raw[i + 6:i + 8] == '\\u':
+                try:
+                    low = int(raw[i + 8:i + 12], 16)
+                except ValueError:
+                    low = 0
+                if 0xDC00 <= low < 0xE000:
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+        out.append(chr(code))
+        i += 6
+    return "".join(out), i
+
+class ResponseStreamParser:
+    """
+    Incremental parser for the agent's JSON reply
+    ({"thought": ..., "response": ..., "actions": [...]}).
+
+    feed() takes raw text deltas and returns events as soon as they can be
+    known from the partial document:
+      ("field", name, text)   new characters of a streamed text field
+      ("action", index, dict) one element of "actions" is complete
+      ("actions", list)       the whole "actions" array is complete
+    close() returns the full parsed reply.
+    """
+
+    def __init__(self, fields=STREAMED_FIELDS):
+        self.fields = set(fields)
+        self.text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._str_start = 0
+        self._str_role = None # "key", "value" (top-level) or None
+        self._expect_key = False
+        self._key = None
+        self._value_start = None # start of a nested top-level value
+        self._action_start = None
+        self._action_count = 0
+        self._field_pos = None # raw position streamed so far in the current field
+        self.partial = {} # field -> text received so far
+        self.actions = None
+
+    def feed(self, delta: str) -> list:
+        self.text += delta
+        events = []
+        buf = self.text
+        i = self._pos
+        n = len(buf)
+        while i < n:
+            c = buf[i]
+            if not self._started:
+                if c == '{':
+                    self._started = True
+                    self._depth = 1
+                    self._expect_key = True
+                i += 1
+                continue
+
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == '\\':
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._str_role == "key":
+                        self._key = json.loads(buf[self._str_start - 1:i + 1])
+                    elif self._field_pos is not None:
+                        self._emit_field(events, buf[:i])
+                        self._field_pos = None
+                    self._str_role = None
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_str = True
+                self._str_start = i + 1
+                self._str_role = None
+                if self._depth == 1:
+                    self._str_role = "key" if self._expect_key else "value"
+                    if not self._expect_key and self._key in self.fields:
+                        self._field_pos = i + 1
+                        self.partial.setdefault(self._key, "")
+            elif self._depth == 1 and c == ':':
+                self._expect_key = False
+            elif self._depth == 1 and c == ',':
+                self._expect_key = True
+            elif c in '[{':
+                if self._depth == 1:
+                    self._value_start = i
+                elif self._depth == 2 and c == '{' and self._key == "actions" and buf[self._value_start] == '[':
+                    self._action_start = i
+                self._depth += 1
+            elif c in ']}':
+                self._depth -= 1
+                if self._depth == 2 and self._action_start is not None:
+                    try:
+                        events.append(("action", self._action_count, json.loads(buf[self._action_start:i + 1])))
+                    except json.JSONDecodeError:
+                        pass
+                    self._action_count += 1
+                    self._action_start = None
+                elif self._depth == 1 and self._value_start is not None:
+                    if self._key == "actions":
+                        try:
+                            self.actions = json.loads(buf[self._value_start:i + 1])
+                            events.append(("actions", self.actions))
+                        except json.JSONDecodeError:
+                            pass
+                    self._value_start = None
+            i += 1
+        self._pos = i
+
+        # Stream whatever is decodable of an unfinished text field
+        if self._in_str and self._field_pos is not None:
+            self._emit_field(events, buf)
+        return events
+
+    def _emit_field(self, events: list, raw: str):
+        text, self._field_pos = _decode_partial(raw, self._field_pos)
+        if text:
+            self.partial[self._key] += text
+            events.append(("field", self._key, text))
+
+    def close(self) -> dict:
+        """Returns the parsed reply, falling back to what was streamed if the JSON is malformed."""
+        with get_tracer().span("model.parse", bytes_in=len(self.text)):
+            try:
+                data = json.loads(_FENCE_RE.sub("", self.text))
+                if isinstance(data, dict):
+                    return data
+            except json.JSONDecodeError:
+                pass
+        data = dict(self.partial)
+        data["actions"] = self.actions or []
+        return data
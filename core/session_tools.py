@@ -0,0 +1,14 @@
+# Tools bound to the current session: they receive the agent (for its
+# ProjectManager) and the HistoryManager before their own arguments.
+
+def read_file(agent, history, path: str, start_line: int = None, end_line: int = None):
+    return agent.project_manager.read_file(path, start_line=start_line, end_line=end_line)
+
+def tail_file(agent, history, path: str, lines: int = 20):
+    return agent.project_manager.tail_file(path, lines)
+
+def get_system_info(agent, history):
+    return agent.get_system_info()
+
+def expand_output(agent, history, ref: str):
+    return history.expand(ref) or f"Error: Unknown output reference: {ref}"
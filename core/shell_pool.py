@@ -0,0 +1,242 @@
+import os
+import time
+import uuid
+import shutil
+import signal
+import selectors
+import threading
+import subprocess
+from core.command_runner import DEFAULT_TIMEOUT, MAX_RETAINED_LINES, CommandStream, _RingBuffer
+
+IDLE_TIMEOUT = 15 * 60
+# Sessions idle for longer than this are health-checked before being reused.
+HEALTH_CHECK_IDLE = 30
+
+class ShellSession:
+    """
+    One long-lived shell driven over pipes.
+
+    Each command is sent as `eval '<command>' < /dev/null` followed by a
+    sentinel line on stdout (carrying the exit code) and on stderr, so
+    command boundaries are unambiguous while cd, exported variables and
+    activated virtualenvs persist between commands.
+    """
+
+    def __init__(self, cwd: str, max_lines: int = MAX_RETAINED_LINES):
+        self.cwd = cwd
+        self.max_lines = max_lines
+        self.sentinel = f"__AGENT_DONE_{uuid.uuid4().hex}__"
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.commands_run = 0
+        shell = shutil.which("bash") or "/bin/sh"
+        self.proc = subprocess.Popen(
+            [shell],
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+
+    def is_alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def health_check(self, timeout: float = 2) -> bool:
+        """Round-trips a no-op command through the shell; called with self.lock held."""
+        if not self.is_alive():
+            return False
+        result = self._run(":", timeout)
+        return result["returncode"] == 0 and not result["timed_out"]
+
+    def close(self):
+        if self.is_alive():
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.proc.wait()
+        for pipe in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def _script(self, command: str) -> bytes:
+        quoted = command.replace("'", "'\\''")
+        return (
+            f"eval '{quoted}' < /dev/null\n"
+            f"__agent_rc=$?\n"
+            f"printf '\\n%s %d\\n' '{self.sentinel}' \"$__agent_rc\"\n"
+            f"printf '\\n%s\\n' '{self.sentinel}' >&2\n"
+        ).encode("utf-8")
+
+    def run(self, command: str, timeout: float = None, on_line=None, cancel_event: threading.Event = None) -> dict:
+        """
+        Runs a command in this session. If it times out or is cancelled the
+        session is killed (its state is lost) and must be replaced by the pool.
+        """
+        with self.lock:
+            return self._run(command, timeout, on_line, cancel_event)
+
+    def _run(self, command: str, timeout: float = None, on_line=None, cancel_event: threading.Event = None) -> dict:
+        timeout = timeout or DEFAULT_TIMEOUT
+        self.last_used = time.monotonic()
+        self.commands_run += 1
+        buffers = {"stdout": _RingBuffer(self.max_lines), "stderr": _RingBuffer(self.max_lines)}
+        pending = {"stdout": b"", "stderr": b""}
+        # Each stream's latest line is held back one step so the newline
+        # injected before the sentinel never reaches the output.
+        held = {"stdout": "", "stderr": ""}
+
+        def emit(name, line):
+            if line:
+                buffers[name].append(line)
+                if on_line:
+                    on_line(name, line)
+        finished = {"stdout": False, "stderr": False}
+        returncode = None
+        timed_out = cancelled = False
+        marker = self.sentinel.encode("utf-8")
+
+        try:
+            self.proc.stdin.write(self._script(command))
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            return self._result(command, None, "", f"Shell session died: {e}", False, False, timeout)
+
+        selector = selectors.DefaultSelector()
+        selector.register(self.proc.stdout, selectors.EVENT_READ, "stdout")
+        selector.register(self.proc.stderr, selectors.EVENT_READ, "stderr")
+        deadline = time.monotonic() + timeout
+        try:
+            while not all(finished.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+                events = selector.select(timeout=min(remaining, 0.1))
+                for key, _ in events:
+                    name = key.data
+                    chunk = os.read(key.fileobj.fileno(), 64 * 1024)
+                    if not chunk:
+                        # Shell exited (e.g. the command ran `exit`)
+                        finished = {"stdout": True, "stderr": True}
+                        break
+                    pending[name] += chunk
+                    *lines, pending[name] = pending[name].split(b"\n")
+                    for raw in lines:
+                        if raw.startswith(marker):
+                            finished[name] = True
+                            if name == "stdout":
+                                returncode = int(raw[len(marker):].strip() or 0)
+                            # The held line ends with the newline printed before the sentinel
+                            emit(name, held[name][:-1])
+                            held[name] = ""
+                            continue
+                        emit(name, held[name])
+                        held[name] = raw.decode("utf-8", errors="replace") + "\n"
+        finally:
+            selector.close()
+
+        if timed_out or cancelled:
+            self.close()
+        elif returncode is None:
+            try:
+                returncode = self.proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.close()
+
+        for name in ("stdout", "stderr"):
+            if not finished[name]:
+                emit(name, held[name] + pending[name].decode("utf-8", errors="replace"))
+        return self._result(command, returncode, buffers["stdout"].text(), buffers["stderr"].text(),
+                            timed_out, cancelled, timeout)
+
+    @staticmethod
+    def _result(command, returncode, stdout, stderr, timed_out, cancelled, timeout) -> dict:
+        return {
+            "command": command,
+            "returncode": returncode,
+            "stdout": stdout,
+            "stderr": stderr,
+            "timed_out": timed_out,
+            "cancelled": cancelled,
+            "timeout": timeout,
+        }
+
+class ShellPool:
+    """
+    Named, persistent shell sessions for one workspace.
+
+    Sessions are created on demand, replaced when they die, time out or
+    fail the health check run before reusing one idle for over
+    health_check_idle seconds, and closed after sitting idle for idle_timeout.
+    """
+
+    def __init__(self, cwd: str, max_sessions: int = 4, idle_timeout: float = IDLE_TIMEOUT,
+                 health_check_idle: float = HEALTH_CHECK_IDLE):
+        self.cwd = cwd
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.health_check_idle = health_check_idle
+        self.sessions = {}
+        self.restarts = 0
+        self._lock = threading.Lock()
+
+    def session(self, name: str = "default") -> ShellSession:
+        """Returns a live session, starting or replacing it as needed."""
+        with self._lock:
+            self._evict_idle(keep=name)
+            session = self.sessions.get(name)
+            healthy = session is not None and session.is_alive()
+            # Acquiring is the busy check itself, so a command starting meanwhile
+            # waits for the health check instead of racing it.
+            if healthy and time.monotonic() - session.last_used > self.health_check_idle and \
+                    session.lock.acquire(blocking=False):
+                try:
+                    # A shell left alone for a while may be wedged (e.g. a stuck background job)
+                    healthy = session.health_check()
+                finally:
+                    session.lock.release()
+            if session is not None and not healthy:
+                session.close()
+                session = None
+                self.restarts += 1
+            if session is None:
+                if len(self.sessions) >= self.max_sessions:
+                    oldest = min((n for n in self.sessions if n != name), key=lambda n: self.sessions[n].last_used)
+                    self.sessions.pop(oldest).close()
+                session = self.sessions[name] = ShellSession(self.cwd)
+            return session
+
+    def _evict_idle(self, keep: str):
+        now = time.monotonic()
+        for name, session in list(self.sessions.items()):
+            if name != keep and now - session.last_used > self.idle_timeout and session.lock.acquire(blocking=False):
+                try:
+                    self.sessions.pop(name).close()
+                finally:
+                    session.lock.release()
+
+    def run(self, command: str, timeout: float = None, name: str = "default", on_line=None,
+            cancel_event: threading.Event = None) -> dict:
+        session = self.session(name)
+        result = session.run(command, timeout, on_line, cancel_event)
+        if not session.is_alive():
+            note = "[Shell session ended; the next command starts a fresh shell]"
+            result["stderr"] = f"{result['stderr']}\n{note}" if result["stderr"] else note
+        return result
+
+    def stream(self, command: str, timeout: float = None, name: str = "default") -> CommandStream:
+        """Runs a command in a session in the background, yielding its output lines live."""
+        return CommandStream(lambda on_line, cancel: self.run(command, timeout, name, on_line, cancel), command, timeout)
+
+    def close(self):
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
@@ -0,0 +1,66 @@
+import json
+import threading
+from core.action_scheduler import ANY_PATH, footprint, conflicts
+
+class SpeculativeExecutor:
+    """
+    Runs side-effect-free tool actions while the model is still generating.
+
+    Actions are offered one by one as soon as the streamed reply contains
+    them. A tool action is started on the pool if its footprint has no
+    writes and no earlier action in the reply conflicts with it (so a
+    read_file after a write to the same path is never speculated). Once the
+    reply is final, confirm() drops every speculation it does not contain,
+    and take() hands the confirmed futures to execute_actions.
+    """
+
+    def __init__(self, execute, pool, max_pending: int = 8):
+        self.execute = execute
+        self.pool = pool
+        self.max_pending = max_pending
+        self._seen = []
+        self._futures = {} # key -> Future
+        self._lock = threading.Lock()
+        self.stats = {"started": 0, "used": 0, "dropped": 0}
+
+    @staticmethod
+    def key(action: dict) -> str:
+        return json.dumps([action.get("type"), action.get("tool_name"), action.get("args", {})], sort_keys=True, default=str)
+
+    def eligible(self, action: dict) -> bool:
+        if action.get("type") != "tool":
+            return False
+        reads, writes = footprint(action)
+        if writes or ANY_PATH in reads:
+            return False
+        return not any(conflicts(earlier, action) for earlier in self._seen)
+
+    def offer(self, action: dict):
+        """Called for each action as soon as it is complete in the stream."""
+        if not isinstance(action, dict) or "type" not in action:
+            return
+        start = self.eligible(action)
+        self._seen.append(action)
+        key = self.key(action)
+        with self._lock:
+            if not start or key in self._futures or len(self._futures) >= self.max_pending:
+                return
+            self._futures[key] = self.pool.submit(self.execute, action)
+            self.stats["started"] += 1
+
+    def confirm(self, actions: list):
+        """Drops speculations that the final reply does not contain."""
+        keep = {self.key(a) for a in actions if isinstance(a, dict)}
+        with self._lock:
+            for key in list(self._futures):
+                if key not in keep:
+                    self._futures.pop(key).cancel()
+                    self.stats["dropped"] += 1
+
+    def take(self, action: dict):
+        """Returns the speculative future for an action (at most once), or None."""
+        with self._lock:
+            future = self._futures.pop(self.key(action), None)
+            if future is not None:
+                self.stats["used"] += 1
+            return future
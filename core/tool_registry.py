@@ -0,0 +1,406 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import time
+import argparse
+import threading
+import subprocess
+import importlib
+import importlib.util
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+_REQUIRED = object()
+_TYPE_NAMES = {str: "str", int: "int", float: "float", bool: "bool"}
+
+class ToolArgumentError(ValueError):
+    """Raised when a tool call's arguments do not match the tool's parameters."""
+
+def _coerce(kind):
+    """Returns a converter for one parameter type (models often send numbers as strings)."""
+    if kind is bool:
+        def convert(value):
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.lower() in ("true", "false"):
+                return value.lower() == "true"
+            raise ValueError("expected a boolean")
+    elif kind in (int, float):
+        def convert(value):
+            if isinstance(value, bool):
+                raise ValueError(f"expected {_TYPE_NAMES[kind]}")
+            if isinstance(value, (int, float)):
+                if kind is int and value != int(value):
+                    raise ValueError("expected an integer")
+                return kind(value)
+            return kind(value.strip()) # str; anything else raises
+    else:
+        def convert(value):
+            if isinstance(value, (dict, list)):
+                raise ValueError("expected a string")
+            return value if isinstance(value, str) else str(value)
+    return convert
+
+class ToolSpec:
+    """
+    Where a tool lives ("module:function"), which optional packages it needs
+    and its parameters as (name, type) or (name, type, default) tuples.
+    Context tools are called with the session's agent and history first.
+    Tools that run their dependencies in other processes set import_deps=False
+    so loading them only checks that the dependencies are installed.
+    """
+
+    def __init__(self, name: str, target: str, deps=(), params=(), description: str = "",
+                 read_only: bool = False, context: bool = False, import_deps: bool = True):
+        self.name = name
+        self.module, _, self.attr = target.partition(":")
+        self.deps = tuple(deps)
+        self.params = [(p[0], p[1], p[2] if len(p) > 2 else _REQUIRED) for p in params]
+        self.description = description
+        self.read_only = read_only # No side effects outside the process
+        self.context = context
+        self.import_deps = import_deps
+        self.validate = self._compile()
+
+    def _compile(self):
+        """Builds the argument validator once, so each call is a few dict lookups."""
+        checks = [(name, _coerce(kind), _TYPE_NAMES[kind], default) for name, kind, default in self.params]
+        names = [name for name, _, _ in self.params]
+        allowed = frozenset(names)
+        tool = self.name
+
+        def validate(args) -> dict:
+            # One place for the calling conventions models use: object, list, JSON text or a bare value
+            if isinstance(args, str) and args.strip()[:1] in ("{", "["):
+                try:
+                    args = json.loads(args)
+                except json.JSONDecodeError:
+                    pass
+            if args is None or args == "":
+                args = {}
+            elif isinstance(args, list):
+                if len(args) > len(names):
+                    raise ToolArgumentError(f"{tool} takes at most {len(names)} arguments, got {len(args)}")
+                args = dict(zip(names, args))
+            elif not isinstance(args, dict):
+                if not names:
+                    raise ToolArgumentError(f"{tool} takes no arguments")
+                args = {names[0]: args}
+
+            unknown = args.keys() - allowed
+            if unknown:
+                raise ToolArgumentError(f"{tool} got unexpected argument(s): {', '.join(sorted(unknown))}")
+            kwargs = {}
+            for name, convert, type_name, default in checks:
+                value = args.get(name, default)
+                if value is _REQUIRED:
+                    raise ToolArgumentError(f"{tool} is missing required argument '{name}'")
+                if value is not None and value is not default:
+                    try:
+                        value = convert(value)
+                    except (ValueError, TypeError, AttributeError):
+                        raise ToolArgumentError(f"{tool}: '{name}' must be {type_name}, got {value!r}") from None
+                kwargs[name] = value
+            return kwargs
+
+        return validate
+
+    def signature(self) -> str:
+        parts = []
+        for name, kind, default in self.params:
+            part = name if kind is str else f"{name}: {_TYPE_NAMES[kind]}"
+            parts.append(part if default is _REQUIRED else f"{part}={default!r}")
+        return f"{self.name}({', '.join(parts)})"
+
+# Declarative catalogue: nothing listed here is imported until it is called or warmed up.
+TOOLS = [
+    # Session (run against the agent's workspace and history)
+    ToolSpec("read_file", "core.session_tools:read_file", (),
+             [("path", str), ("start_line", int, None), ("end_line", int, None)],
+             "Read a workspace file, optionally only a 1-based line range.", context=True),
+    ToolSpec("tail_file", "core.session_tools:tail_file", (), [("path", str), ("lines", int, 20)],
+             "Last lines of a workspace file.", context=True),
+    ToolSpec("get_system_info", "core.session_tools:get_system_info", (), (),
+             "Operating system and Python version.", read_only=True, context=True),
+    ToolSpec("expand_output", "core.session_tools:expand_output", (), [("ref", str)],
+             "Full text of an earlier output that was summarized (by its ref).", read_only=True, context=True),
+    # Web
+    ToolSpec("get_weather", "core.web_tools:get_weather", ("requests",), [("city", str)],
+             "Current weather for a city.", read_only=True),
+    ToolSpec("web_search", "core.web_tools:web_search", ("requests", "duckduckgo_search"), [("query", str)],
+             "Search the web.", read_only=True),
+    ToolSpec("read_url", "core.web_tools:read_url", ("requests",), [("url", str), ("max_chars", int, 5000)],
+             "Readable text of a web page.", read_only=True),
+    ToolSpec("fetch_page_title", "core.web_tools:fetch_page_title", ("requests",), [("url", str)],
+             "Title of a web page.", read_only=True),
+    ToolSpec("fetch_page_meta", "core.web_tools:fetch_page_meta", ("requests",), [("url", str)],
+             "Title and meta description of a web page.", read_only=True),
+    # Language
+    ToolSpec("translate_text", "core.nlp_tools:translate_text", ("deep_translator",),
+             [("text", str), ("target_lang", str, "en")], "Translate text.", read_only=True),
+    ToolSpec("detect_language", "core.nlp_tools:detect_language", ("langdetect",), [("text", str)],
+             "Detect the language of text.", read_only=True),
+    ToolSpec("sentiment", "core.nlp_tools:sentiment", ("transformers",), [("text", str)],
+             "Sentiment label and score.", read_only=True, import_deps=False),
+    ToolSpec("summarize_text", "core.nlp_tools:summarize_text", ("transformers",),
+             [("text", str), ("max_tokens", int, 130)], "Summarize text.", read_only=True, import_deps=False),
+    # Math, finance, geo
+    ToolSpec("solve_equation", "core.data_tools:solve_equation", ("sympy",),
+             [("equation", str), ("var", str, "x")], "Solve an equation like '2*x + 3 = 7'.", read_only=True),
+    ToolSpec("get_ticker_price", "core.data_tools:get_ticker_price", ("yfinance",), [("symbol", str)],
+             "Latest price of a stock or crypto ticker.", read_only=True),
+    ToolSpec("geocode_address", "core.data_tools:geocode_address", ("geopy",), [("address", str)],
+             "Coordinates of an address.", read_only=True),
+    ToolSpec("reverse_geocode", "core.data_tools:reverse_geocode", ("geopy",), [("lat", float), ("lon", float)],
+             "Address at coordinates.", read_only=True),
+    # Media
+    ToolSpec("image_info", "core.media_tools:image_info", ("PIL",), [("path", str)],
+             "Format, size and mode of an image."),
+    ToolSpec("text_to_speech", "core.media_tools:text_to_speech", ("pyttsx3",),
+             [("text", str), ("out_file", str, "output.wav")], "Save text as speech audio."),
+    # Dev
+    ToolSpec("format_python", "core.dev_tools:format_python", ("black",), [("code", str)],
+             "Format Python code with black.", read_only=True),
+    ToolSpec("lint_python", "core.dev_tools:lint_python", ("flake8",),
+             [("code", str), ("filename", str, "temp_code.py")], "Lint Python code with flake8.", read_only=True),
+]
+
+class ToolRegistry:
+    """
+    Resolves tools by name, importing a tool's module and dependencies on
+    first use. Import costs are recorded per module so the startup profile
+    shows what each tool costs to load; warm_up() pays them ahead of time
+    on a background thread.
+    """
+
+    def __init__(self, specs=()):
+        self._specs = {}
+        self._resolved = {} # name -> callable
+        self._lock = threading.RLock()
+        self._warm_thread = None
+        self.load_times = {} # module -> {"seconds", "modules", "error"}
+        self._prompt = None # (text, sha256), rebuilt when the catalogue changes
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: ToolSpec):
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._resolved.pop(spec.name, None)
+            self._prompt = None
+
+    def __contains__(self, name) -> bool:
+        return name in self._specs
+
+    def names(self) -> list:
+        return list(self._specs)
+
+    def spec(self, name: str) -> ToolSpec:
+        return self._specs[name]
+
+    def read_only(self) -> set:
+        return {name for name, spec in self._specs.items() if spec.read_only}
+
+    def missing_deps(self, name: str) -> list:
+        """Dependencies that are not installed (checked without importing them)."""
+        return [dep for dep in self._specs[name].deps if importlib.util.find_spec(dep) is None]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._resolved
+
+    def loaded_module(self, module: str):
+        """The module if something already imported it, else None (never triggers an import)."""
+        return sys.modules.get(module)
+
+    def _import(self, module: str):
+        if module in sys.modules:
+            return sys.modules[module]
+        before = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            mod = importlib.import_module(module)
+            error = None
+        except ImportError as e:
+            mod, error = None, str(e)
+        self.load_times[module] = {
+            "seconds": time.perf_counter() - start,
+            "modules": len(sys.modules) - before,
+            "error": error,
+        }
+        return mod
+
+    def resolve(self, name: str):
+        """Returns the tool function, importing its dependencies and module on first use."""
+        fn = self._resolved.get(name)
+        if fn is not None:
+            return fn
+        spec = self._specs[name]
+        with self._lock:
+            fn = self._resolved.get(name)
+            if fn is None:
+                # Missing optional deps are left to the tool, which reports them as an error result
+                for dep in spec.deps if spec.import_deps else ():
+                    self._import(dep)
+                module = self._import(spec.module)
+                if module is None:
+                    raise ImportError(f"Tool '{name}': {self.load_times[spec.module]['error']}")
+                fn = self._resolved[name] = getattr(module, spec.attr)
+        return fn
+
+    def call(self, name: str, **args):
+        return self.resolve(name)(**args)
+
+    def invoke(self, name: str, args=None, agent=None, history=None):
+        """
+        Validates `args` against the tool's parameters and calls it.
+        Raises KeyError for unknown tools and ToolArgumentError for bad arguments.
+        """
+        spec = self._specs[name]
+        kwargs = spec.validate(args)
+        fn = self.resolve(name)
+        if spec.context:
+            return fn(agent, history, **kwargs)
+        return fn(**kwargs)
+
+    def prompt_block(self) -> str:
+        """Tool catalogue for the system prompt, generated from the specs."""
+        return self._prompt_entry()[0]
+
+    def prompt_hash(self) -> str:
+        """sha256 of prompt_block(); unchanged between turns unless tools are registered."""
+        return self._prompt_entry()[1]
+
+    def _prompt_entry(self):
+        entry = self._prompt
+        if entry is None:
+            lines = [f"- {spec.signature()}: {spec.description}".rstrip(": ") for spec in self._specs.values()]
+            text = "\n".join(lines)
+            entry = self._prompt = (text, hashlib.sha256(text.encode("utf-8")).hexdigest())
+        return entry
+
+    def warm_up(self, names=None):
+        """
+        Preloads tools (default: all) on a daemon thread. Returns the thread,
+        or None when there is nothing left to load.
+        """
+        pending = [n for n in (names or self._specs) if n in self._specs and n not in self._resolved]
+        if not pending:
+            return None
+        with self._lock:
+            if self._warm_thread is not None and self._warm_thread.is_alive():
+                return self._warm_thread
+
+            def run():
+                for name in pending:
+                    try:
+                        self.resolve(name)
+                    except Exception:
+                        pass # Recorded in load_times; the call itself will report it
+
+            self._warm_thread = threading.Thread(target=run, name="tool-warm-up", daemon=True)
+            self._warm_thread.start()
+            return self._warm_thread
+
+    def profile(self) -> list:
+        """One row per tool: load state and the in-process import cost of its module and dependencies."""
+        rows = []
+        for name, spec in self._specs.items():
+            times = [self.load_times[m] for m in (*spec.deps, spec.module) if m in self.load_times]
+            missing = self.missing_deps(name)
+            if missing:
+                state = "missing " + ", ".join(missing)
+            else:
+                state = "loaded" if name in self._resolved else "lazy"
+            rows.append({
+                "tool": name,
+                "module": spec.module,
+                "deps": ", ".join(spec.deps),
+                "state": state,
+                "load_ms": round(sum(t["seconds"] for t in times) * 1000, 1),
+                "modules": sum(t["modules"] for t in times),
+            })
+        return rows
+
+    def import_profile(self, names=None, python: str = sys.executable) -> list:
+        """
+        Cold import cost of each tool, measured like `python -X importtime`
+        in a fresh interpreter per tool so shared dependencies are not
+        hidden by whichever tool happened to load them first.
+        """
+        baseline, _ = _importtime(python, "pass")
+        rows = []
+        for name in names or self._specs:
+            spec = self._specs[name]
+            stmt = (
+                f"for dep in {spec.deps!r}:\n    try:\n        __import__(dep)\n"
+                f"    except ImportError:\n        pass\nimport {spec.module}"
+            )
+            entries, error = _importtime(python, stmt)
+            top = [e for e in entries if e[2] == 0 and e[3] not in {b[3] for b in baseline}]
+            rows.append({
+                "tool": name,
+                "import_ms": round(sum(e[1] for e in top) / 1000, 1),
+                "modules": len({e[3] for e in entries} - {b[3] for b in baseline}),
+                "heaviest": max(top, key=lambda e: e[1])[3] if top else "",
+                "error": error,
+            })
+        return sorted(rows, key=lambda r: r["import_ms"], reverse=True)
+
+def _importtime(python: str, stmt: str):
+    """
+    Runs `python -X importtime -c stmt`. Returns ([(self us, cumulative us,
+    nesting level, module), ...], last error line or "").
+    """
+    proc = subprocess.run([python, "-X", "importtime", "-c", stmt], cwd=_ROOT, capture_output=True, text=True)
+    entries = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m:
+            entries.append((int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2, m.group(4)))
+    error = proc.stderr.strip().splitlines()[-1] if proc.returncode else ""
+    return entries, error
+
+def format_report(rows: list) -> str:
+    if not rows:
+        return ""
+    keys = list(rows[0])
+    widths = {k: max(len(k), *(len(str(r[k])) for r in rows)) for k in keys}
+    lines = ["  ".join(k.ljust(widths[k]) for k in keys)]
+    lines += ["  ".join(str(r[k]).ljust(widths[k]) for k in keys) for r in rows]
+    return "\n".join(lines)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ToolRegistry:
+    """Process-wide registry of the tools in TOOLS."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ToolRegistry(TOOLS)
+        return _registry
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup import-cost report for the lazy tool registry.")
+    parser.add_argument("tools", nargs="*", help="Tools to profile (default: all)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Load the tools into this process in order instead of one fresh interpreter per tool")
+    args = parser.parse_args()
+
+    registry = get_registry()
+    if args.in_process:
+        for name in args.tools or registry.names():
+            try:
+                registry.resolve(name)
+            except ImportError:
+                pass
+        rows = registry.profile()
+    else:
+        rows = registry.import_profile(args.tools or None)
+    print(format_report(rows))
+
+if __name__ == "__main__":
+    main()
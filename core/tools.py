@@ -1,13 +1,20 @@
+# NOTE: The tools below are being ported to lazily imported modules listed in
+# core/tool_registry.py (TOOLS); register new tools there instead of here.
+
 # import os
 # import json
 # import subprocess
 # import platform
-# import requests
+# from core.http_client import get_client
 # from datetime import datetime
 # import uuid
 # import zipfile
 # import secrets
 # import string
+# from core.file_reader import read_bytes, read_lines, tail_lines
+
+# # Shared, pooled HTTP session (keep-alive, retries, uniform timeouts)
+# http = get_client()
 
 # # ----------------- Optional Dependencies -----------------
 
@@ -149,7 +156,7 @@
 #     """Get current weather for a city."""
 #     try:
 #         url = f"https://wttr.in/{city}?format=%C+%t"
-#         response = requests.get(url, timeout=5)
+#         response = http.get(url)
 #         if response.status_code == 200:
 #             return f"The weather in {city} is {response.text.strip()}."
 #         return f"Error: Could not fetch weather (Status {response.status_code})"
@@ -206,13 +213,14 @@
 #     return "\n".join(info)
 
 
-# def read_file(path: str):
-#     """Read content of a file."""
+# def read_file(path: str, start_line: int = None, end_line: int = None):
+#     """Read content of a file (optionally a 1-based, inclusive line range)."""
 #     try:
 #         if not os.path.exists(path):
 #             return f"Error: File '{path}' does not exist."
-#         with open(path, 'r', encoding='utf-8') as f:
-#             return f.read()
+#         if start_line is not None or end_line is not None:
+#             return read_lines(path, start_line or 1, end_line)
+#         return read_bytes(path).decode('utf-8', errors='replace')
 #     except Exception as e:
 #         return f"Error reading file: {str(e)}"
 
@@ -259,7 +267,7 @@
 #     """Convert currency using exchangerate.host."""
 #     try:
 #         url = f"https://api.exchangerate.host/convert?from={from_cur}&to={to_cur}&amount={amount}"
-#         r = requests.get(url, timeout=5).json()
+#         r = http.get(url).json()
 #         if r.get("result") is None:
 #             return "Error converting currency."
 #         return f"{amount} {from_cur} = {r['result']} {to_cur}"
@@ -272,7 +280,7 @@
 #     """Geolocate an IP using ip-api.com."""
 #     try:
 #         url = f"http://ip-api.com/json/{ip or ''}"
-#         data = requests.get(url, timeout=5).json()
+#         data = http.get(url).json()
 #         if data.get("status") != "success":
 #             return f"Error: {data.get('message', 'lookup failed')}"
 #         return f"{data['query']}: {data['country']}, {data['regionName']}, {data['city']}"
@@ -284,7 +292,7 @@
 # def get_public_ip(_=None):
 #     """Get public IP address."""
 #     try:
-#         return requests.get("https://api64.ipify.org?format=text", timeout=5).text.strip()
+#         return http.get("https://api64.ipify.org?format=text").text.strip()
 #     except Exception as e:
 #         return f"Error getting IP: {e}"
 
@@ -295,7 +303,7 @@
 #     if BeautifulSoup is None:
 #         return "Error: 'beautifulsoup4' library not installed."
 #     try:
-#         r = requests.get(url, timeout=5)
+#         r = http.get(url)
 #         soup = BeautifulSoup(r.text, "html.parser")
 #         title = soup.title.string if soup.title else "No title found"
 #         return title.strip()
@@ -567,16 +575,16 @@
 # def hn_top_stories(limit: int = 5):
 #     """Get top stories from Hacker News."""
 #     try:
-#         top_ids = requests.get(
-#             "https://hacker-news.firebaseio.com/v0/topstories.json",
-#             timeout=5
-#         ).json()[:limit]
+#         top_ids = http.get_json("https://hacker-news.firebaseio.com/v0/topstories.json")[:limit]
+#         # Fetch all items concurrently over the pooled session
+#         items = http.fetch_all(
+#             [f"https://hacker-news.firebaseio.com/v0/item/{sid}.json" for sid in top_ids],
+#             parse=lambda r: r.json(),
+#         )
 #         stories = []
-#         for sid in top_ids:
-#             item = requests.get(
-#                 f"https://hacker-news.firebaseio.com/v0/item/{sid}.json",
-#                 timeout=5
-#             ).json()
+#         for item in items:
+#             if isinstance(item, Exception) or not item:
+#                 continue
 #             stories.append(f"- {item.get('title')} ({item.get('url', 'no url')})")
 #         return "\n".join(stories)
 #     except Exception as e:
@@ -641,7 +649,7 @@
 # def shorten_url(url: str):
 #     """Shorten a URL using TinyURL."""
 #     try:
-#         resp = requests.get("https://tinyurl.com/api-create.php", params={"url": url}, timeout=5)
+#         resp = http.get("https://tinyurl.com/api-create.php", params={"url": url})
 #         if resp.status_code == 200:
 #             return resp.text.strip()
 #         return f"Error shortening URL: status {resp.status_code}"
@@ -829,7 +837,7 @@
 # def programming_joke(_=None):
 #     """Get a random programming joke."""
 #     try:
-#         r = requests.get("https://official-joke-api.appspot.com/jokes/programming/random", timeout=5).json()
+#         r = http.get("https://official-joke-api.appspot.com/jokes/programming/random").json()
 #         if not r:
 #             return "No joke found."
 #         j = r[0]
@@ -844,7 +852,7 @@
 #     if BeautifulSoup is None:
 #         return "Error: 'beautifulsoup4' library not installed."
 #     try:
-#         r = requests.get(url, timeout=5)
+#         r = http.get(url)
 #         soup = BeautifulSoup(r.text, "html.parser")
 #         title = soup.title.string.strip() if soup.title else "No title"
 #         desc_tag = soup.find("meta", attrs={"name": "description"})
@@ -860,10 +868,8 @@
 #     try:
 #         if not os.path.exists(path):
 #             return f"File '{path}' not found."
-#         with open(path, "r", encoding="utf-8", errors="ignore") as f:
-#             data = f.readlines()
-#         tail = data[-lines:]
-#         return "".join(tail)
+#         # Seek from the end instead of readlines() so huge logs stay cheap
+#         return tail_lines(path, lines)
 #     except Exception as e:
 #         return f"Error tailing file: {e}"
 
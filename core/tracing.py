@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from core.config import CACHE_DIR
+
+TRACE_DIR = os.path.join(CACHE_DIR, "traces")
+MAX_SPANS = 20000 # Spans kept in memory for the Performance panel
+FLUSH_EVERY = 64
+# The JSONL file is rotated to <path>.1 once it reaches this size, so at
+# most twice this much is kept on disk per process.
+MAX_TRACE_BYTES = 16 * 1024 * 1024
+
+def _percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class Tracer:
+    """
+    Lightweight span recorder.
+
+    span() times a block and records its name, duration, thread, parent span
+    and attributes (e.g. tokens or bytes in/out). Finished spans are kept in
+    a bounded in-memory buffer for summaries and appended to a JSONL file
+    (rotated at max_bytes); export_chrome() writes the buffer in Chrome trace format (chrome://tracing,
+    Perfetto).
+    """
+
+    def __init__(self, path: str = None, max_spans: int = MAX_SPANS, max_bytes: int = MAX_TRACE_BYTES):
+        self.path = path or os.path.join(TRACE_DIR, f"trace-{os.getpid()}.jsonl")
+        self.max_bytes = max_bytes
+        self.spans = deque(maxlen=max_spans)
+        self.enabled = True
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # Serializes appends and rotation of the file
+        self._local = threading.local()
+        self._ids = 0
+        self._origin = time.perf_counter()
+        self._wall_origin = time.time()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Times the enclosed block. Yields the attrs dict, so counts known only at the end can be added."""
+        if not self.enabled:
+            yield attrs
+            return
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        with self._lock:
+            self._ids += 1
+            span_id = self._ids
+        parent = stack[-1] if stack else None
+        stack.append(span_id)
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            self._record({
+                "id": span_id,
+                "parent": parent,
+                "name": name,
+                "start": self._wall_origin + (start - self._origin),
+                "duration": duration,
+                "thread": threading.get_ident(),
+                "attrs": attrs,
+            })
+
+    def _record(self, span: dict):
+        with self._lock:
+            self.spans.append(span)
+            self._pending.append(span)
+            if len(self._pending) < FLUSH_EVERY:
+                return
+            pending, self._pending = self._pending, []
+        self._write(pending)
+
+    def _write(self, spans: list):
+        with self._write_lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for span in spans:
+                    f.write(json.dumps(span, default=str) + "\n")
+                size = f.tell()
+            if size >= self.max_bytes:
+                os.replace(self.path, self.path + ".1") # Replaces the previous rotation
+
+    def flush(self):
+        """Appends spans not yet written to the JSONL file."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            self._write(pending)
+
+    def summary(self) -> dict:
+        """Per span name: count, p50, p95 and max duration (seconds)."""
+        with self._lock:
+            spans = list(self.spans)
+        durations = defaultdict(list)
+        for span in spans:
+            durations[span["name"]].append(span["duration"])
+        result = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "max": values[-1],
+                "total": sum(values),
+            }
+        return result
+
+    def chrome_trace(self) -> dict:
+        """The in-memory spans as a Chrome trace ("X" complete events, microseconds)."""
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        return {"traceEvents": [
+            {
+                "name": span["name"],
+                "cat": span["name"].split(".")[0],
+                "ph": "X",
+                "ts": int(span["start"] * 1e6),
+                "dur": int(span["duration"] * 1e6),
+                "pid": pid,
+                "tid": span["thread"],
+                "args": span["attrs"],
+            }
+            for span in spans
+        ]}
+
+    def export_chrome(self, path: str) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        return path
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide Tracer."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+def traced(name: str):
+    """Decorator recording each call as a span; string results also record bytes_out."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name) as attrs:
+                result = fn(*args, **kwargs)
+                if isinstance(result, str):
+                    attrs["bytes_out"] = len(result)
+                return result
+        return wrapper
+    return decorator
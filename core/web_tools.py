@@ -0,0 +1,72 @@
+from core.http_cache import get_cache
+from core.http_client import get_client
+from core.html_extract import extract_url
+
+# Optional dependencies, same pattern as core/tools.py
+try:
+    from duckduckgo_search import DDGS
+except ImportError:
+    DDGS = None
+
+# Responses are served from the shared cache (TTL + ETag revalidation); page
+# tools stream and stop early, so their extracted results are cached instead
+cache = get_cache()
+
+def get_weather(city: str):
+    """Get current weather for a city."""
+    try:
+        response = cache.get(f"https://wttr.in/{city}?format=%C+%t", tool="get_weather")
+        if response.status_code == 200:
+            return f"The weather in {city} is {response.text.strip()}."
+        return f"Error: Could not fetch weather (Status {response.status_code})"
+    except Exception as e:
+        return f"Error fetching weather: {str(e)}"
+
+def web_search(query: str):
+    """Search the web using DuckDuckGo."""
+    if not DDGS:
+        return "Error: duckduckgo-search library not installed."
+    return cache.cached_call("web_search", _ddg_search, query)
+
+def _ddg_search(query: str):
+    try:
+        results = DDGS().text(query, max_results=3)
+        if not results:
+            return "No results found."
+        return "\n".join([f"- {r['title']}: {r['href']}\n  {r['body']}" for r in results])
+    except Exception as e:
+        return f"Error searching web: {str(e)}"
+
+def read_url(url: str, max_chars: int = 5000):
+    """Extract the readable text of a web page."""
+    return cache.cached_call("read_url", _read_url, url, max_chars)
+
+def _read_url(url: str, max_chars: int):
+    try:
+        text = extract_url(get_client(), url, want=("text",), max_chars=max_chars)["text"]
+        return text if text else "No readable text found."
+    except Exception as e:
+        return f"Error reading URL: {e}"
+
+def fetch_page_title(url: str):
+    """Fetch the <title> of a URL."""
+    return cache.cached_call("fetch_page_title", _fetch_page_title, url)
+
+def _fetch_page_title(url: str):
+    try:
+        title = extract_url(get_client(), url, want=("title",))["title"]
+        return title or "No title found"
+    except Exception as e:
+        return f"Error fetching title: {e}"
+
+def fetch_page_meta(url: str):
+    """Fetch page title and meta description."""
+    return cache.cached_call("fetch_page_meta", _fetch_page_meta, url)
+
+def _fetch_page_meta(url: str):
+    try:
+        # Both fields live in <head>, so the download stops at <body>
+        page = extract_url(get_client(), url, want=("title", "description"))
+        return f"Title: {page['title'] or 'No title'}\nDescription: {page['description'] or 'No description'}"
+    except Exception as e:
+        return f"Error fetching page meta: {e}"
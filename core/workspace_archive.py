@@ -0,0 +1,400 @@
+import os
+import re
+import json
+import time
+import uuid
+import zlib
+import stat
+import struct
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from core.config import CACHE_DIR
+from core.blob_store import BlobStore
+
+ENTRY_DIR = os.path.join(CACHE_DIR, "archive_entries")
+ENTRY_MAX_BYTES = 2 * 1024 ** 3
+# Entries used this recently are never pruned: the store is shared, and another
+# session's stream may have prepared one it has not emitted yet.
+ENTRY_MIN_AGE = 15 * 60
+# Members up to this size are compressed in memory and not cached.
+SMALL_FILE = 256 * 1024
+CHUNK_SIZE = 1024 * 1024
+# Already compressed formats are stored as-is instead of deflated again.
+STORED_EXTENSIONS = {
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".jar", ".whl",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".mp4", ".mkv", ".mov", ".avi", ".pdf",
+}
+ALWAYS_EXCLUDED = {".git"}
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_FLAG_UTF8 = 0x0800
+
+def _glob_to_regex(pattern: str) -> str:
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                out.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+def parse_gitignore(text: str, base: str = "") -> list:
+    """
+    Compiles .gitignore lines into (regex, negated, dir_only, base) rules.
+    `base` is the workspace-relative directory of the .gitignore ("" for the root).
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        body = _glob_to_regex(line.lstrip("/"))
+        regex = re.compile(f"^{body}$" if anchored else f"^(?:.*/)?{body}$")
+        rules.append((regex, negated, dir_only, base))
+    return rules
+
+def is_ignored(rules: list, rel: str, is_dir: bool) -> bool:
+    """Last matching rule wins, as in git."""
+    ignored = False
+    for regex, negated, dir_only, base in rules:
+        if dir_only and not is_dir:
+            continue
+        if base:
+            if not rel.startswith(base + "/"):
+                continue
+            path = rel[len(base) + 1:]
+        else:
+            path = rel
+        if regex.match(path):
+            ignored = not negated
+    return ignored
+
+def _dos_time(mtime: float):
+    t = time.localtime(max(mtime, 315532800)) # The zip format starts in 1980
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+class _Entry:
+    """One prepared member: header fields plus where its (already compressed) data comes from."""
+
+    def __init__(self, name, st, method=0, crc=0, usize=0, csize=0, data=b"", path=None, is_dir=False):
+        self.name = name
+        self.st = st
+        self.method = method
+        self.crc = crc
+        self.usize = usize
+        self.csize = csize
+        self.data = data # Small members: the bytes to write
+        self.path = path # Large members: cached entry holding exactly the bytes to write
+        self.is_dir = is_dir
+        self.cached = False
+        self.manifest = None # New manifest record for this member, if any
+
+class WorkspaceArchiver:
+    """
+    Builds a zip of a workspace as a stream, compressing members in parallel.
+
+    Members are deflated on a thread pool (zlib releases the GIL) and written
+    in order as they complete, so memory stays bounded by a small window of
+    in-flight members. Large files are compressed (or, for already
+    compressed formats, copied) into a cache keyed by content hash, with the
+    CRC and size taken in the same read, so a file that changes while the
+    archive is built cannot produce a member that fails its CRC. An
+    unchanged file (same size, mtime and inode as last time) or identical
+    content elsewhere reuses its entry without being read again. .git, .gitignore'd paths, `exclude` globs and
+    files above `max_file_size` are skipped.
+    """
+
+    def __init__(self, root: str, cache_dir: str, entry_dir: str = ENTRY_DIR, workers: int = None,
+                 level: int = 6, max_file_size: int = None, exclude=(), entry_max_bytes: int = ENTRY_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.manifest_path = os.path.join(cache_dir, "archive_manifest.json")
+        self.entries = BlobStore(entry_dir, entry_max_bytes)
+        self.workers = workers or min(8, os.cpu_count() or 2)
+        self.level = level
+        self.max_file_size = max_file_size
+        self.exclude = [(re.compile(f"^(?:.*/)?{_glob_to_regex(p.rstrip('/'))}$"), False, False, "") for p in exclude]
+        self.stats = {}
+
+    # ---------- Members ----------
+
+    def _members(self):
+        """Yields (rel path, abs path, stat result, is_dir) for every member, pruning ignored directories."""
+        stack = [("", self.exclude + self._rules(self.root, ""))]
+        while stack:
+            rel_dir, rules = stack.pop()
+            path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            try:
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if entry.name in ALWAYS_EXCLUDED or is_ignored(rules, rel, is_dir):
+                    self.stats["ignored"] += 1
+                    continue
+                if is_dir:
+                    yield rel, entry.path, st, True
+                    subdirs.append((rel, rules + self._rules(entry.path, rel)))
+                elif stat.S_ISREG(st.st_mode):
+                    if self.max_file_size is not None and st.st_size > self.max_file_size:
+                        self.stats["too_large"] += 1
+                        continue
+                    yield rel, entry.path, st, False
+            stack.extend(reversed(subdirs))
+
+    @staticmethod
+    def _rules(path: str, rel: str) -> list:
+        try:
+            with open(os.path.join(path, ".gitignore"), 'r', encoding='utf-8', errors='replace') as f:
+                return parse_gitignore(f.read(), rel)
+        except OSError:
+            return []
+
+    # ---------- Compression ----------
+
+    def _entry_path(self, digest: str, stored: bool = False) -> str:
+        return os.path.join(self.entries.root, digest[:2], f"{digest}-{'stored' if stored else self.level}")
+
+    def _prepare(self, rel, path, st, is_dir, manifest) -> _Entry:
+        if is_dir:
+            return _Entry(rel + "/", st, is_dir=True)
+        stored = os.path.splitext(rel)[1].lower() in STORED_EXTENSIONS
+        if st.st_size <= SMALL_FILE:
+            with open(path, 'rb') as f:
+                data = f.read()
+            entry = _Entry(rel, st, crc=zlib.crc32(data), usize=len(data))
+            packed = None if stored else self._deflate(data)
+            if packed is not None and len(packed) < len(data):
+                entry.method, entry.data = zlib.DEFLATED, packed
+            else:
+                entry.data = data
+            entry.csize = len(entry.data)
+            return entry
+
+        sig = [st.st_size, st.st_mtime_ns, st.st_ino]
+        known = manifest.get(rel)
+        if known is not None and known[:3] == sig:
+            digest, crc, size = known[3], known[4], st.st_size
+        else:
+            digest, crc, size = self._hash(path)
+            sig[0] = size
+        entry = _Entry(rel, st, method=0 if stored else zlib.DEFLATED)
+        entry.path = self._entry_path(digest, stored)
+        try:
+            os.utime(entry.path) # Keep reused entries out of pruning
+            entry.cached = True
+        except OSError:
+            # The file may have changed since it was hashed: use what this read saw
+            digest, crc, size = self._pack_file(path, stored)
+            entry.path = self._entry_path(digest, stored)
+        entry.crc, entry.usize = crc, size
+        entry.csize = os.path.getsize(entry.path)
+        entry.manifest = sig + [digest, crc]
+        return entry
+
+    def _deflate(self, data: bytes) -> bytes:
+        comp = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        return comp.compress(data) + comp.flush()
+
+    @staticmethod
+    def _hash(path: str):
+        sha, crc, size = hashlib.sha256(), 0, 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+        return sha.hexdigest(), crc, size
+
+    def _pack_file(self, src: str, stored: bool):
+        """
+        Deflates (or copies) src into the entry cache in one read. Returns the
+        (digest, crc, size) of exactly the bytes the entry holds.
+        """
+        os.makedirs(self.entries.root, exist_ok=True)
+        tmp = os.path.join(self.entries.root, f"{uuid.uuid4().hex}.tmp") # Outside the pruned prefix folders
+        comp = None if stored else zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        sha, crc, size = hashlib.sha256(), 0, 0
+        try:
+            with open(src, 'rb') as f, open(tmp, 'wb') as out:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    sha.update(chunk)
+                    crc = zlib.crc32(chunk, crc)
+                    size += len(chunk)
+                    out.write(chunk if comp is None else comp.compress(chunk))
+                if comp is not None:
+                    out.write(comp.flush())
+            digest = sha.hexdigest()
+            dest = self._entry_path(digest, stored)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return digest, crc, size
+
+    # ---------- Zip stream ----------
+
+    def stream(self):
+        """Yields the zip file as byte chunks."""
+        self.stats = {"members": 0, "ignored": 0, "too_large": 0, "reused": 0, "bytes_in": 0, "bytes_out": 0}
+        start = time.perf_counter()
+        manifest = self._load_manifest()
+        new_manifest = {}
+        central = []
+        offset = 0
+        window = deque()
+
+        def emit(entry):
+            nonlocal offset
+            header, record = self._headers(entry, offset)
+            central.append(record)
+            yield header
+            if entry.path is not None:
+                with open(entry.path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        yield chunk
+            elif entry.data:
+                yield entry.data
+            offset += len(header) + entry.csize
+            self.stats["members"] += 1
+            self.stats["bytes_in"] += entry.usize
+            self.stats["reused"] += entry.cached
+            if entry.manifest is not None:
+                new_manifest[entry.name] = entry.manifest
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for rel, path, st, is_dir in self._members():
+                window.append(pool.submit(self._prepare, rel, path, st, is_dir, manifest))
+                while len(window) > self.workers * 4:
+                    yield from emit(window.popleft().result())
+            while window:
+                yield from emit(window.popleft().result())
+
+        cd_offset = offset
+        cd = b"".join(central)
+        yield cd
+        yield self._end_records(len(central), len(cd), cd_offset)
+        self.stats["bytes_out"] = cd_offset + len(cd)
+        self.stats["seconds"] = time.perf_counter() - start
+        self._save_manifest(new_manifest)
+        self.entries.prune(min_age=ENTRY_MIN_AGE)
+
+    def write(self, dest: str) -> dict:
+        """Writes the zip to dest (atomically) and returns the stats."""
+        tmp = f"{dest}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                for chunk in self.stream():
+                    f.write(chunk)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return self.stats
+
+    @staticmethod
+    def _headers(entry: _Entry, offset: int):
+        """Returns (local file header, central directory record) for an entry."""
+        name = entry.name.encode("utf-8")
+        mtime, mdate = _dos_time(entry.st.st_mtime)
+        zip64 = entry.usize >= _ZIP64_LIMIT or entry.csize >= _ZIP64_LIMIT
+        version = 45 if zip64 or offset >= _ZIP64_LIMIT else 20
+
+        local_extra = struct.pack("<HHQQ", 1, 16, entry.usize, entry.csize) if zip64 else b""
+        local = struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, version, _FLAG_UTF8, entry.method, mtime, mdate, entry.crc,
+            _ZIP64_LIMIT if zip64 else entry.csize, _ZIP64_LIMIT if zip64 else entry.usize,
+            len(name), len(local_extra),
+        ) + name + local_extra
+
+        fields = []
+        usize, csize, rel_offset = entry.usize, entry.csize, offset
+        if usize >= _ZIP64_LIMIT:
+            fields.append(usize)
+            usize = _ZIP64_LIMIT
+        if csize >= _ZIP64_LIMIT:
+            fields.append(csize)
+            csize = _ZIP64_LIMIT
+        if rel_offset >= _ZIP64_LIMIT:
+            fields.append(rel_offset)
+            rel_offset = _ZIP64_LIMIT
+        extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+        mode = entry.st.st_mode & 0xFFFF
+        external = (mode << 16) | (0x10 if entry.is_dir else 0)
+        record = struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | 45, version, _FLAG_UTF8, entry.method, mtime, mdate,
+            entry.crc, csize, usize, len(name), len(extra), 0, 0, 0, external, rel_offset,
+        ) + name + extra
+        return local, record
+
+    @staticmethod
+    def _end_records(count: int, cd_size: int, cd_offset: int) -> bytes:
+        out = b""
+        if count >= 0xFFFF or cd_size >= _ZIP64_LIMIT or cd_offset >= _ZIP64_LIMIT:
+            zip64_offset = cd_offset + cd_size
+            out += struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, cd_size, cd_offset)
+            out += struct.pack("<IIQI", 0x07064B50, 0, zip64_offset, 1)
+        out += struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(cd_size, _ZIP64_LIMIT), min(cd_offset, _ZIP64_LIMIT), 0,
+        )
+        return out
+
+    # ---------- Manifest ----------
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get("files", {}) if data.get("root") == self.root else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, files: dict):
+        tmp = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"root": self.root, "files": files}, f, separators=(",", ":"))
+            os.replace(tmp, self.manifest_path)
+        except OSError:
+            pass # The manifest is only a cache
@@ -0,0 +1,191 @@
+import os
+import json
+import fnmatch
+import threading
+
+INDEX_VERSION = 1
+
+class WorkspaceIndex:
+    """
+    In-memory tree index of a workspace.
+
+    Every directory is stored with its (mtime_ns, inode) signature and its
+    direct children. A refresh only re-lists directories whose signature
+    changed, so an unchanged tree costs one stat per directory instead of a
+    full os.walk. The index can be saved to disk to warm-start a new session.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        # rel_dir -> {"sig": [mtime_ns, ino], "dirs": [...], "files": [...]}
+        self.nodes = {}
+        self.dirty = False
+        self.pending = set() # Directories reported changed by a watcher
+        self._lock = threading.RLock()
+
+    # ---------- Persistence ----------
+
+    def load(self, path: str) -> bool:
+        """Loads a previously saved index. Returns False if it is missing or stale."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+                return False
+            with self._lock:
+                self.nodes = data["nodes"]
+                self.dirty = False
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def save(self, path: str):
+        """Writes the index to disk (atomically) if it changed since the last save."""
+        with self._lock:
+            if not self.dirty:
+                return
+            data = {"version": INDEX_VERSION, "root": self.root, "nodes": self.nodes}
+            self.dirty = False
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    # ---------- Refresh ----------
+
+    def _abs(self, rel_dir: str) -> str:
+        return self.root if rel_dir == "." else os.path.join(self.root, rel_dir)
+
+    def invalidate(self, rel_dir: str = "."):
+        """Forces the given directory to be re-listed on the next refresh."""
+        with self._lock:
+            node = self.nodes.get(rel_dir)
+            if node is not None:
+                node["sig"] = None
+
+    def mark_changed(self, rel_path: str):
+        """Records that the directory containing rel_path changed (fed by a watcher)."""
+        parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else "."
+        with self._lock:
+            self.pending.add(parent)
+
+    def refresh_pending(self):
+        """Re-lists only the directories passed to mark_changed, without walking the tree."""
+        with self._lock:
+            pending, self.pending = self.pending, set()
+            for rel_dir in sorted(pending):
+                old = self.nodes.get(rel_dir)
+                old_dirs = set(old["dirs"]) if old else set()
+                self.invalidate(rel_dir)
+                node = self._refresh_dir(rel_dir)
+                if node is None:
+                    if old is not None:
+                        self._drop_subtree(rel_dir)
+                    continue
+                prefix = "" if rel_dir == "." else rel_dir + "/"
+                for d in old_dirs - set(node["dirs"]):
+                    self._drop_subtree(prefix + d)
+                for d in set(node["dirs"]) - old_dirs:
+                    self.refresh(prefix + d)
+
+    def _drop_subtree(self, rel_dir: str):
+        prefix = rel_dir + "/"
+        for key in list(self.nodes):
+            if key == rel_dir or key.startswith(prefix):
+                del self.nodes[key]
+                self.dirty = True
+
+    def refresh(self, rel_dir: str = "."):
+        """Brings the subtree rooted at rel_dir up to date, re-listing only changed directories."""
+        with self._lock:
+            stack = [rel_dir]
+            seen = set()
+            while stack:
+                current = stack.pop()
+                seen.add(current)
+                node = self._refresh_dir(current)
+                if node is None:
+                    continue
+                for d in node["dirs"]:
+                    stack.append(d if current == "." else f"{current}/{d}")
+
+            # Drop directories that disappeared from this subtree
+            prefix = "" if rel_dir == "." else rel_dir + "/"
+            for key in list(self.nodes):
+                if key not in seen and (rel_dir == "." or key == rel_dir or key.startswith(prefix)):
+                    del self.nodes[key]
+                    self.dirty = True
+
+    def _refresh_dir(self, rel_dir: str):
+        path = self._abs(rel_dir)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        sig = [st.st_mtime_ns, st.st_ino]
+        node = self.nodes.get(rel_dir)
+        if node is not None and node["sig"] == sig:
+            return node
+
+        dirs, files = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                        else:
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        node = {"sig": sig, "dirs": sorted(dirs), "files": sorted(files)}
+        self.nodes[rel_dir] = node
+        self.dirty = True
+        return node
+
+    # ---------- Queries ----------
+
+    def iter_files(self, rel_dir: str = "."):
+        """Yields workspace-relative paths of all files under rel_dir."""
+        with self._lock:
+            stack = [rel_dir]
+            while stack:
+                current = stack.pop()
+                node = self.nodes.get(current)
+                if node is None:
+                    continue
+                for f in node["files"]:
+                    yield f if current == "." else f"{current}/{f}"
+                for d in reversed(node["dirs"]):
+                    stack.append(d if current == "." else f"{current}/{d}")
+
+    def find(self, rel_dir: str = ".", pattern: str = "*") -> list:
+        """Returns files under rel_dir whose relative path or name matches a glob pattern."""
+        matches = []
+        for path in self.iter_files(rel_dir):
+            name = path.rsplit("/", 1)[-1]
+            if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(name, pattern):
+                matches.append(path)
+        return matches
+
+    def render_tree(self, rel_dir: str = ".", max_depth: int = 2) -> str:
+        """Renders the indexed subtree in the same format as ProjectManager.list_files."""
+        tree = []
+        with self._lock:
+            stack = [(rel_dir, 0)]
+            while stack:
+                current, depth = stack.pop()
+                node = self.nodes.get(current)
+                if node is None or depth >= max_depth:
+                    continue
+                name = os.path.basename(self._abs(current))
+                tree.append(f"{'  ' * depth}{name}/")
+                sub_indent = "  " * (depth + 1)
+                for f in node["files"]:
+                    if not f.startswith('.'): # Ignore hidden files
+                        tree.append(f"{sub_indent}{f}")
+                for d in reversed(node["dirs"]):
+                    stack.append((d if current == "." else f"{current}/{d}", depth + 1))
+        return "\n".join(tree)
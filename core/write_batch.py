@@ -0,0 +1,135 @@
+import os
+import uuid
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+class WriteBatch:
+    """
+    All-or-nothing multi-file write.
+
+    Contents are staged into temp files next to their targets in parallel
+    (each fsynced), then renamed over the targets. Each touched directory is
+    fsynced once after the renames. If anything fails, every target is
+    restored to its previous state and directories created by the batch are
+    removed again.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+
+    @staticmethod
+    def _temp_path(target: str, tag: str) -> str:
+        directory, name = os.path.split(target)
+        return os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.{tag}")
+
+    def _make_dirs(self, targets: list) -> list:
+        """Creates missing parent directories. Returns the ones created, deepest first."""
+        created = []
+        for target in targets:
+            directory = os.path.dirname(target)
+            missing = []
+            while directory and not os.path.isdir(directory):
+                missing.append(directory)
+                directory = os.path.dirname(directory)
+            for d in reversed(missing):
+                os.mkdir(d)
+                created.append(d)
+        created.reverse()
+        return created
+
+    def _stage(self, item) -> str:
+        target, content = item
+        tmp_path = self._temp_path(target, "tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(target):
+                shutil.copymode(target, tmp_path)
+        except BaseException:
+            # e.g. ENOSPC or a lone surrogate in the content; commit() never sees this path
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    @staticmethod
+    def _fsync_dir(directory: str):
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return # Not supported on this platform (e.g. Windows)
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def commit(self, items: list):
+        """
+        Writes [(absolute_target, content), ...] atomically as a group.
+        Raises the first error after rolling the whole batch back.
+        """
+        targets = [target for target, _ in items]
+        created_dirs, staged, backups, committed = [], [], {}, []
+        try:
+            created_dirs = self._make_dirs(targets)
+
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(items)))) as pool:
+                futures = [pool.submit(self._stage, item) for item in items]
+                errors = []
+                for future in futures:
+                    try:
+                        staged.append(future.result())
+                    except Exception as e:
+                        errors.append(e)
+                if errors:
+                    raise errors[0]
+
+            # Keep the previous version of each existing target for rollback
+            for target in targets:
+                if os.path.exists(target) and target not in backups:
+                    backup = self._temp_path(target, "bak")
+                    try:
+                        os.link(target, backup)
+                    except OSError:
+                        shutil.copy2(target, backup)
+                    backups[target] = backup
+
+            for tmp_path, target in zip(staged, targets):
+                os.replace(tmp_path, target)
+                committed.append(target)
+
+            for directory in {os.path.dirname(t) for t in targets}:
+                self._fsync_dir(directory)
+        except Exception:
+            # Temp files go first, or the directories holding them could not be removed
+            self._remove(staged)
+            self._rollback(committed, backups, created_dirs)
+            raise
+        finally:
+            self._remove(staged)
+            self._remove(backups.values())
+
+    @staticmethod
+    def _remove(paths):
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _rollback(self, committed: list, backups: dict, created_dirs: list):
+        for target in reversed(committed):
+            try:
+                if target in backups:
+                    os.replace(backups[target], target)
+                elif os.path.exists(target):
+                    os.remove(target)
+            except OSError:
+                pass
+        for directory in created_dirs:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
@@ -0,0 +1,116 @@
+import os
+import re
+import sys
+import random
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.diff_engine import DiffEngine, DIFF_BACKENDS
+
+HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+def apply_diff(old: str, diff: str) -> str:
+    """Applies a unified diff to old, checking every context and removed line."""
+    if not diff:
+        return old
+    old_lines = old.splitlines(keepends=True)
+    lines = diff.splitlines(keepends=True)
+    assert lines[0].startswith("--- ") and lines[1].startswith("+++ ")
+    out, pos, i = [], 0, 2
+    while i < len(lines):
+        match = HUNK.match(lines[i])
+        assert match, lines[i]
+        start, length = int(match.group(1)), int(match.group(2) or 1)
+        start = start - 1 if length else start
+        assert start >= pos
+        out.extend(old_lines[pos:start])
+        pos = start
+        i += 1
+        body = []
+        while i < len(lines) and not lines[i].startswith("@@"):
+            if lines[i].startswith("\\"): # "\ No newline at end of file" applies to the previous line
+                body[-1] = (body[-1][0], body[-1][1][:-1])
+            else:
+                body.append((lines[i][0], lines[i][1:]))
+            i += 1
+        for tag, text in body:
+            if tag in " -":
+                assert old_lines[pos] == text
+                pos += 1
+            if tag in " +":
+                out.append(text)
+    out.extend(old_lines[pos:])
+    return "".join(out)
+
+def random_edit(rng: random.Random, lines: list) -> list:
+    lines = list(lines)
+    for _ in range(rng.randint(1, 8)):
+        op = rng.choice(("insert", "delete", "replace", "move"))
+        i = rng.randrange(len(lines) + 1)
+        if op == "insert" or not lines:
+            lines[i:i] = [f"new {rng.random()}\n" for _ in range(rng.randint(1, 4))]
+        elif op == "delete":
+            del lines[i:i + rng.randint(1, 4)]
+        elif op == "replace":
+            lines[i:i + 1] = [f"changed {rng.random()}\n"]
+        else:
+            block = lines[i:i + 3]
+            del lines[i:i + 3]
+            j = rng.randrange(len(lines) + 1)
+            lines[j:j] = block
+    return lines
+
+BACKENDS = sorted(DIFF_BACKENDS)
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_random_edits_round_trip(backend):
+    rng = random.Random(backend)
+    engine = DiffEngine(backend)
+    for _ in range(200):
+        # Few distinct lines, so the backends have to deal with repeats
+        old_lines = [f"line {rng.randint(0, 15)}\n" for _ in range(rng.randint(0, 60))]
+        old = "".join(old_lines)
+        new = "".join(random_edit(rng, old_lines))
+        assert apply_diff(old, engine.unified_diff(old, new)) == new
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("old, new", [
+    ("", "a\nb\n"),
+    ("a\nb\n", ""),
+    ("a\nb", "a\nc"), # Neither side ends with a newline
+    ("a\nb\n", "a\nb"), # Only the final newline is removed
+    ("a\nb", "a\nb\n"),
+    ("x", "y\nx"),
+    ("same\n" * 5, "same\n" * 7),
+])
+def test_edge_cases_round_trip(backend, old, new):
+    diff = DiffEngine(backend).unified_diff(old, new)
+    assert apply_diff(old, diff) == new
+
+def test_identical_texts_give_no_diff():
+    assert DiffEngine().unified_diff("a\nb\n", "a\nb\n") == ""
+
+def test_common_prefix_and_suffix_are_trimmed():
+    old = "".join(f"line {i}\n" for i in range(1000))
+    new = old.replace("line 500\n", "line five hundred\n")
+    diff = DiffEngine().unified_diff(old, new, "old.py", "new.py")
+    assert diff.splitlines()[:3] == ["--- old.py", "+++ new.py", "@@ -498,7 +498,7 @@"]
+    assert apply_diff(old, diff) == new
+
+def test_oversized_inputs_fall_back_to_a_summary():
+    old = "".join(f"old {i}\n" for i in range(50))
+    new = "".join(f"new {i}\n" for i in range(60))
+    diff = DiffEngine(max_lines=20).unified_diff(old, new)
+    assert "# Summary diff: change too large to display (50 -> 60 lines)." in diff
+    assert "Approximately 50 lines removed and 60 lines added after line 0." in diff
+
+def test_too_many_changed_lines_fall_back_to_a_summary():
+    old = "keep\n" + "".join(f"old {i}\n" for i in range(30))
+    new = "keep\n" + "".join(f"new {i}\n" for i in range(30))
+    assert "# Summary diff" in DiffEngine(max_changed_lines=40).unified_diff(old, new)
+    assert "# Summary diff" not in DiffEngine(max_changed_lines=60).unified_diff(old, new)
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        DiffEngine("nope")
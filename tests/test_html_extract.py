@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.html_extract import extract
+
+def test_page_wrapped_in_a_form_keeps_its_text():
+    # ASP.NET WebForms and many CMS templates put the whole page in one <form>
+    html = b"<html><body><form><p>all content</p></form></body></html>"
+    assert extract([html])["text"] == "all content"
+
+def test_form_controls_are_skipped():
+    html = (b"<html><body><form><p>Search the docs</p>"
+            b"<input type='text' value='query'><select><option>First</option><option>Second</option></select>"
+            b"<textarea>draft</textarea><button>Go</button></form><p>Results</p></body></html>")
+    assert extract([html])["text"] == "Search the docs\nResults"
+
+def test_text_split_across_chunks():
+    html = "<html><head><title>Über</title></head><body><p>naïve café</p><script>x()</script></body></html>".encode()
+    chunks = [html[i:i + 7] for i in range(0, len(html), 7)]
+    result = extract(chunks)
+    assert result["title"] == "Über"
+    assert result["text"] == "naïve café"
@@ -0,0 +1,86 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import line_index
+from core.line_index import LineIndex, get_line_index
+
+LINES = [f"line {i} {'x' * (i % 7)}\n".encode() for i in range(5000)]
+
+def small_limits(tmp_path, monkeypatch, cache_max_bytes):
+    monkeypatch.setattr(line_index, "SIDECAR_DIR", str(tmp_path / "sidecars"))
+    monkeypatch.setattr(line_index, "SIDECAR_MIN_SIZE", 1024)
+    monkeypatch.setattr(line_index, "CACHE_MAX_BYTES", cache_max_bytes)
+    monkeypatch.setattr(line_index, "_indexes", line_index.OrderedDict())
+
+def check(index, lines):
+    data = b"".join(lines)
+    assert index.line_count == len(lines)
+    assert index.read_lines(1, 3) == b"".join(lines[:3])
+    assert index.read_lines(len(lines) - 9) == b"".join(lines[-10:])
+    assert index.tail(5) == b"".join(lines[-5:])
+    assert index.byte_range(2, 2) == (len(lines[0]), len(lines[0]) + len(lines[1]))
+    assert index.line_at(len(data) - 1) == len(lines)
+
+def test_in_memory_index_and_append(tmp_path, monkeypatch):
+    small_limits(tmp_path, monkeypatch, 64 * 1024 * 1024)
+    path = tmp_path / "app.log"
+    path.write_bytes(b"".join(LINES))
+    index = LineIndex(str(path)).refresh()
+    assert index._map is None and index.nbytes > 0
+    check(index, LINES)
+
+    with open(path, 'ab') as f:
+        f.write(b"appended\n")
+    check(index.refresh(), LINES + [b"appended\n"])
+    check(LineIndex(str(path)).refresh(), LINES + [b"appended\n"]) # From the sidecar
+
+def test_over_cap_index_is_read_from_the_mapped_sidecar(tmp_path, monkeypatch):
+    small_limits(tmp_path, monkeypatch, 1024) # Far below the 5001 offsets of the file
+    path = tmp_path / "app.log"
+    path.write_bytes(b"".join(LINES))
+    index = get_line_index(str(path))
+    assert index._map is not None and index.nbytes == 0
+    check(index, LINES)
+
+    # Appends extend the sidecar and remap it
+    with open(path, 'ab') as f:
+        f.write(b"one\ntwo\n")
+    lines = LINES + [b"one\n", b"two\n"]
+    check(get_line_index(str(path)), lines)
+    assert index._map is not None
+
+    # A fresh process maps the sidecar instead of loading it
+    warm = LineIndex(str(path)).refresh()
+    assert warm._map is not None
+    check(warm, lines)
+
+    # A rewritten file is re-indexed from scratch
+    path.write_bytes(b"".join(LINES[:10]))
+    check(index.refresh(), LINES[:10])
+    assert index._map is None
+
+def test_queries_during_appends_see_a_consistent_index(tmp_path, monkeypatch):
+    small_limits(tmp_path, monkeypatch, 1024)
+    path = tmp_path / "app.log"
+    path.write_bytes(b"".join(LINES))
+    index = LineIndex(str(path)).refresh()
+    done = threading.Event()
+
+    def append():
+        with open(path, 'ab') as f:
+            for i in range(200):
+                f.write(b"more\n")
+                f.flush()
+                index.refresh()
+        done.set()
+
+    writer = threading.Thread(target=append)
+    writer.start()
+    while not done.is_set():
+        assert index.read_lines(1, 2) == b"".join(LINES[:2])
+        assert index.tail(1) in (LINES[-1], b"more\n")
+    writer.join()
+    assert index.line_count == len(LINES) + 200
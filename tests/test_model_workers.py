@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import pytest
+
+os.environ.setdefault("AGENT_CACHE_DIR", tempfile.mkdtemp(prefix="test_cache_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.model_workers import ModelWorkerPool
+
+def load_crashing(task: str):
+    """Stand-in model that echoes texts and kills its worker process on "crash"."""
+    def run(texts, **kwargs):
+        if "crash" in texts:
+            os._exit(3)
+        return [text.upper() for text in texts]
+    return run
+
+@pytest.fixture
+def pool():
+    pool = ModelWorkerPool(workers=1, loader=f"{__name__}:load_crashing").start()
+    yield pool
+    pool.close()
+
+def test_results_are_returned(pool):
+    assert pool.map("echo", ["a", "b"], timeout=60) == ["A", "B"]
+
+def test_worker_death_fails_its_batch_and_is_replaced(pool):
+    pool.map("echo", ["warm"], timeout=60) # The worker is up and serving
+
+    with pytest.raises(RuntimeError, match="exit code 3"):
+        pool.submit("echo", "crash").result(timeout=30)
+    assert pool._pending == {}
+    assert pool.stats["errors"] == 1
+
+    # A replacement serves later requests instead of them hanging behind the lost batch
+    assert pool.map("echo", ["after", "more"], timeout=60) == ["AFTER", "MORE"]
+
+def test_idle_worker_killed_does_not_block_the_others():
+    pool = ModelWorkerPool(workers=2, loader=f"{__name__}:load_crashing").start()
+    try:
+        assert pool.map("echo", ["warm"], timeout=60) == ["WARM"]
+        victim = next(iter(pool._workers.values()))
+        victim.kill()
+        victim.join()
+        assert pool.map("echo", [f"t{i}" for i in range(8)], timeout=60) == [f"T{i}" for i in range(8)]
+    finally:
+        pool.close()
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("AGENT_CACHE_DIR", tempfile.mkdtemp(prefix="test_cache_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prompt_cache import PromptPrefixCache, GeminiCacheProvider, gemini_min_tokens
+from core.context_assembler import estimate_tokens
+
+class FakeProvider:
+    """In-memory provider with Gemini's minimum prefix size."""
+
+    min_tokens = 4096
+
+    def __init__(self):
+        self.created = []
+        self.deleted = []
+
+    def create(self, model: str, content: str, ttl: int):
+        self.created.append(content)
+        return f"caches/{len(self.created)}", 1000.0 + ttl
+
+    def extend(self, name: str, ttl: int) -> float:
+        return 1000.0 + 2 * ttl
+
+    def delete(self, name: str):
+        self.deleted.append(name)
+
+def make_cache(now):
+    return PromptPrefixCache(FakeProvider(), "gemini", ttl=600, refresh_margin=60, clock=lambda: now[0])
+
+def test_prefix_below_minimum_is_sent_inline():
+    now = [1000.0]
+    cache = make_cache(now)
+    prefix = "short instructions " * 100
+    assert estimate_tokens(prefix) < FakeProvider.min_tokens
+    assert cache.handle(prefix) is None
+    assert cache.usage["inline"] == 1 and cache.usage["uploads"] == 0
+    assert cache.prefix_tokens == estimate_tokens(prefix)
+    assert cache.provider.created == []
+
+def test_large_prefix_is_uploaded_once_and_reused():
+    now = [1000.0]
+    cache = make_cache(now)
+    prefix = "tool catalogue line\n" * 1000
+    assert estimate_tokens(prefix) >= FakeProvider.min_tokens
+    handle = cache.handle(prefix)
+    assert handle == "caches/1"
+    now[0] += 10
+    assert cache.handle(prefix) == handle
+    assert cache.usage["uploads"] == 1 and cache.usage["hits"] == 1
+    assert cache.usage["tokens_saved"] == estimate_tokens(prefix)
+
+def test_handle_is_extended_near_expiry_and_replaced_on_change():
+    now = [1000.0]
+    cache = make_cache(now)
+    prefix = "tool catalogue line\n" * 1000
+    handle = cache.handle(prefix)
+    now[0] = 1000.0 + 600 - 30 # Inside the refresh margin
+    assert cache.handle(prefix) == handle
+    assert cache.usage["extends"] == 1
+
+    changed = prefix + "- new_tool(arg): Added later.\n"
+    assert cache.handle(changed) == "caches/2"
+    assert cache.provider.deleted == [handle]
+
+def test_minimum_is_looked_up_per_model():
+    assert gemini_min_tokens("gemini-2.5-flash") == 1024
+    assert gemini_min_tokens("models/gemini-2.5-flash-lite") == 1024
+    assert gemini_min_tokens("gemini-2.5-pro") == 4096
+    assert gemini_min_tokens("some-future-model") == 4096
+    assert GeminiCacheProvider(model="gemini-2.5-flash", min_tokens=0).min_tokens == 1024
+    assert GeminiCacheProvider(model="gemini-2.5-flash", min_tokens=500).min_tokens == 500
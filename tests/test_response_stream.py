@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import random
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.response_stream import ResponseStreamParser
+
+REPLY = {
+    "thought": "Quotes \" and backslashes \\ and\nnew lines, tabs\t, café, 日本語 and 😀.",
+    "response": "Done: wrote {braces} and [brackets] in \"main.py\" ✓",
+    "actions": [
+        {"action": "write_file", "path": "main.py", "content": "print(\"}\")\n# ]\n"},
+        {"action": "command", "command": "echo '{\"a\": [1]}'", "parallel": True},
+    ],
+}
+
+REPLIES = {
+    "plain": json.dumps(REPLY, ensure_ascii=False, indent=2),
+    "ascii_escapes": json.dumps(REPLY), # Non-ASCII as \\uXXXX, emoji as a surrogate pair
+    "fenced": "```json\n" + json.dumps(REPLY, ensure_ascii=False) + "\n```",
+}
+
+def random_chunks(rng: random.Random, text: str) -> list:
+    cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, min(40, len(text) - 1))))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+def parse(chunks) -> tuple:
+    parser = ResponseStreamParser()
+    events = [event for chunk in chunks for event in parser.feed(chunk)]
+    return events, parser.close()
+
+def summarize(events) -> dict:
+    """Joins the streamed field text and collects the action events."""
+    fields, actions, arrays = {}, [], []
+    for event in events:
+        if event[0] == "field":
+            fields[event[1]] = fields.get(event[1], "") + event[2]
+        elif event[0] == "action":
+            actions.append((event[1], event[2]))
+        else:
+            arrays.append(event[1])
+    return {"fields": fields, "actions": actions, "arrays": arrays}
+
+@pytest.mark.parametrize("name", sorted(REPLIES))
+def test_random_chunk_splits_match_the_one_shot_parse(name):
+    text = REPLIES[name]
+    whole_events, whole = parse([text])
+    expected = summarize(whole_events)
+    assert whole == REPLY
+    assert expected["fields"] == {"thought": REPLY["thought"], "response": REPLY["response"]}
+    assert expected["actions"] == list(enumerate(REPLY["actions"]))
+    assert expected["arrays"] == [REPLY["actions"]]
+
+    rng = random.Random(name)
+    for _ in range(300):
+        events, reply = parse(random_chunks(rng, text))
+        assert reply == whole
+        assert summarize(events) == expected
+
+@pytest.mark.parametrize("name", sorted(REPLIES))
+def test_every_single_split_point(name):
+    text = REPLIES[name]
+    expected = summarize(parse([text])[0])
+    for cut in range(1, len(text)):
+        events, reply = parse([text[:cut], text[cut:]])
+        assert reply == REPLY
+        assert summarize(events) == expected, cut
+
+def test_surrogate_pair_escape_is_held_until_complete():
+    parser = ResponseStreamParser()
+    assert parser.feed('{"response": "smile \\ud83d') == [("field", "response", "smile ")]
+    assert parser.feed('\\ude00 ok"') == [("field", "response", "😀 ok")]
+
+def test_one_character_at_a_time():
+    text = REPLIES["ascii_escapes"]
+    events, reply = parse(list(text))
+    assert reply == REPLY
+    assert summarize(events) == summarize(parse([text])[0])
+
+def test_malformed_reply_falls_back_to_what_was_streamed():
+    text = json.dumps(REPLY)
+    events, reply = parse([text[:text.index('"actions"') + 20]])
+    assert reply == {"thought": REPLY["thought"], "response": REPLY["response"], "actions": []}
@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.shell_pool import ShellPool, ShellSession
+
+def make_pool(tmp_path, **kwargs):
+    return ShellPool(str(tmp_path), **kwargs)
+
+def test_script_evals_the_quoted_command_and_prints_both_markers(tmp_path):
+    session = ShellSession(str(tmp_path))
+    try:
+        script = session._script("echo 'it''s'").decode()
+        assert script.startswith("eval 'echo '\\''it'\\'''\\''s'\\''' < /dev/null\n")
+        assert f"'{session.sentinel}' \"$__agent_rc\"" in script
+        assert f"'{session.sentinel}' >&2" in script
+    finally:
+        session.close()
+
+def test_quotes_and_output_are_passed_through(tmp_path):
+    pool = make_pool(tmp_path)
+    try:
+        result = pool.run("""echo "double" 'single' "it's"; echo err >&2""")
+        assert result["stdout"] == "double single it's\n"
+        assert result["stderr"] == "err\n"
+        assert result["returncode"] == 0
+        # Output without a final newline is kept as is
+        assert pool.run("printf 'no newline'")["stdout"] == "no newline"
+    finally:
+        pool.close()
+
+def test_printing_a_fake_marker_does_not_end_the_command(tmp_path):
+    pool = make_pool(tmp_path)
+    try:
+        result = pool.run("echo __AGENT_DONE_deadbeef__ 0; echo __AGENT_DONE_x__ >&2; echo after")
+        assert result["stdout"] == "__AGENT_DONE_deadbeef__ 0\nafter\n"
+        assert result["stderr"] == "__AGENT_DONE_x__\n"
+    finally:
+        pool.close()
+
+def test_exit_codes_and_stdin(tmp_path):
+    pool = make_pool(tmp_path)
+    try:
+        assert pool.run("false")["returncode"] == 1
+        assert pool.run("sh -c 'exit 7'")["returncode"] == 7
+        # stdin is /dev/null, so a command reading it does not swallow the markers
+        result = pool.run("cat; echo done")
+        assert result["stdout"] == "done\n" and result["returncode"] == 0
+    finally:
+        pool.close()
+
+def test_cwd_and_environment_persist_between_calls(tmp_path):
+    (tmp_path / "sub").mkdir()
+    pool = make_pool(tmp_path)
+    try:
+        pool.run("cd sub && export AGENT_TEST_VAR=kept")
+        assert pool.run("pwd")["stdout"].strip() == str(tmp_path / "sub")
+        assert pool.run("echo $AGENT_TEST_VAR")["stdout"] == "kept\n"
+        # Other sessions have their own state
+        assert pool.run("pwd", name="other")["stdout"].strip() == str(tmp_path)
+    finally:
+        pool.close()
+
+def test_exit_ends_the_session_and_the_next_call_starts_a_fresh_one(tmp_path):
+    pool = make_pool(tmp_path)
+    try:
+        pool.run("export AGENT_TEST_VAR=lost")
+        result = pool.run("exit 3")
+        assert result["returncode"] == 3
+        assert "Shell session ended" in result["stderr"]
+        assert pool.run("echo ${AGENT_TEST_VAR:-fresh}")["stdout"] == "fresh\n"
+        assert pool.restarts == 1
+    finally:
+        pool.close()
+
+def test_timeout_kills_the_session(tmp_path):
+    pool = make_pool(tmp_path)
+    try:
+        result = pool.run("sleep 5", timeout=0.5)
+        assert result["timed_out"]
+        assert pool.run("echo ok")["stdout"] == "ok\n"
+    finally:
+        pool.close()
+
+def test_idle_session_is_health_checked_and_replaced_when_wedged(tmp_path, monkeypatch):
+    pool = make_pool(tmp_path, health_check_idle=0)
+    try:
+        first = pool.session()
+        pool.run("true")
+        assert pool.session() is first and pool.restarts == 0
+        monkeypatch.setattr(ShellSession, "health_check", lambda self, timeout=2: False)
+        assert pool.session() is not first
+        assert pool.restarts == 1 and not first.is_alive()
+    finally:
+        pool.close()
+
+def test_busy_session_is_not_health_checked(tmp_path, monkeypatch):
+    pool = make_pool(tmp_path, health_check_idle=0)
+    try:
+        session = pool.session()
+        started = threading.Event()
+        runner = threading.Thread(target=lambda: pool.run("echo go; sleep 0.5", on_line=lambda *_: started.set()))
+        runner.start()
+        assert started.wait(5)
+        checked = []
+        monkeypatch.setattr(ShellSession, "health_check", lambda self, timeout=2: checked.append(self) or False)
+        assert pool.session() is session
+        runner.join()
+        assert checked == []
+    finally:
+        pool.close()
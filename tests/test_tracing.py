@@ -0,0 +1,20 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tracing import Tracer
+
+def test_trace_file_is_rotated_at_the_size_cap(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(str(path), max_bytes=4096)
+    for i in range(200):
+        with tracer.span("step", index=i):
+            pass
+        tracer.flush()
+    rotated = tmp_path / "trace.jsonl.1"
+    assert rotated.exists()
+    assert path.stat().st_size < 4096 + 1024 and rotated.stat().st_size < 4096 + 1024
+    indexes = [json.loads(line)["attrs"]["index"] for f in (rotated, path) for line in f.read_text().splitlines()]
+    assert indexes == list(range(indexes[0], 200)) # The newest spans, in order
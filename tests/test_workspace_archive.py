@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import zipfile
+import tempfile
+
+os.environ.setdefault("AGENT_CACHE_DIR", tempfile.mkdtemp(prefix="test_cache_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.workspace_archive import WorkspaceArchiver, SMALL_FILE, ENTRY_MIN_AGE
+
+def make_archiver(tmp_path):
+    root = tmp_path / "ws"
+    root.mkdir()
+    (root / "small.txt").write_text("hello\n")
+    (root / "large.log").write_bytes(b"line of log output\n" * (SMALL_FILE // 10))
+    (root / "media.png").write_bytes(os.urandom(SMALL_FILE + 1))
+    archiver = WorkspaceArchiver(str(root), str(tmp_path / "cache"), entry_dir=str(tmp_path / "entries"), workers=2)
+    return root, archiver
+
+def read_back(dest) -> dict:
+    with zipfile.ZipFile(dest) as zf:
+        assert zf.testzip() is None # Every member matches its CRC
+        return {name: zf.read(name) for name in zf.namelist()}
+
+def test_files_growing_while_archived_give_valid_members(tmp_path, monkeypatch):
+    root, archiver = make_archiver(tmp_path)
+    hash_file = WorkspaceArchiver._hash
+
+    def hash_then_append(path):
+        result = hash_file(path)
+        with open(path, 'ab') as f: # Appended between hashing and compressing/copying
+            f.write(b"appended\n")
+        return result
+    monkeypatch.setattr(WorkspaceArchiver, "_hash", staticmethod(hash_then_append))
+
+    dest = tmp_path / "out.zip"
+    archiver.write(str(dest))
+    members = read_back(dest)
+    assert members["large.log"] == (root / "large.log").read_bytes()
+    assert members["media.png"] == (root / "media.png").read_bytes()
+
+def test_cached_entries_are_reused(tmp_path):
+    root, archiver = make_archiver(tmp_path)
+    first, second = tmp_path / "a.zip", tmp_path / "b.zip"
+    archiver.write(str(first))
+    assert archiver.write(str(second))["reused"] == 2
+    assert read_back(first) == read_back(second)
+
+def test_recently_used_entries_survive_pruning(tmp_path):
+    root = tmp_path / "ws"
+    root.mkdir()
+    for name in ("a.log", "b.log"):
+        (root / name).write_bytes(name.encode() * SMALL_FILE)
+    archiver = WorkspaceArchiver(str(root), str(tmp_path / "cache"), entry_dir=str(tmp_path / "entries"),
+                                 entry_max_bytes=0)
+    archiver.write(str(tmp_path / "out.zip"))
+    entries = [os.path.join(d, f) for d, _, files in os.walk(archiver.entries.root) for f in files]
+    assert len(entries) == 2 # Over the limit, but possibly about to be emitted by another stream
+
+    old = time.time() - ENTRY_MIN_AGE - 60
+    os.utime(entries[0], (old, old))
+    assert archiver.entries.prune(min_age=ENTRY_MIN_AGE) == 1
+    assert not os.path.exists(entries[0]) and os.path.exists(entries[1])
@@ -0,0 +1,52 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.write_batch import WriteBatch
+
+def snapshot(root) -> dict:
+    """Every file under root (hidden temp files included) with its content."""
+    files = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            with open(path, encoding='utf-8') as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+def test_commit_writes_every_file(tmp_path):
+    WriteBatch().commit([(str(tmp_path / "a.txt"), "one"), (str(tmp_path / "sub" / "b.txt"), "two")])
+    assert snapshot(tmp_path) == {"a.txt": "one", os.path.join("sub", "b.txt"): "two"}
+
+def test_failed_stage_restores_targets_and_leaves_no_temp_files(tmp_path):
+    (tmp_path / "a.txt").write_text("old")
+    before = snapshot(tmp_path)
+    items = [
+        (str(tmp_path / "a.txt"), "new"),
+        (str(tmp_path / "sub" / "b.txt"), "created"),
+        (str(tmp_path / "sub" / "c.txt"), "lone surrogate \ud800"), # UnicodeEncodeError while staging
+    ]
+    with pytest.raises(UnicodeEncodeError):
+        WriteBatch().commit(items)
+    assert snapshot(tmp_path) == before
+    assert not (tmp_path / "sub").exists() # The directory the batch created is removed again
+
+def test_failed_rename_rolls_back_committed_targets(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("old a")
+    (tmp_path / "b.txt").write_text("old b")
+    before = snapshot(tmp_path)
+    replace, calls = os.replace, []
+
+    def failing_replace(src, dst):
+        calls.append(dst)
+        if len(calls) == 2: # a.txt is already committed when b.txt fails
+            raise OSError("disk went away")
+        return replace(src, dst)
+    monkeypatch.setattr(os, "replace", failing_replace)
+
+    with pytest.raises(OSError, match="disk went away"):
+        WriteBatch().commit([(str(tmp_path / "a.txt"), "new a"), (str(tmp_path / "b.txt"), "new b")])
+    monkeypatch.undo()
+    assert snapshot(tmp_path) == before
@@ -1,6 +1,28 @@
 import streamlit as st
-import shutil
 import os
+import tempfile
+import json
+import time
+import weakref
+from collections import deque
+from core.response_stream import ResponseStreamParser
+from core.config import ARCHIVE_MAX_FILE_MB, ARCHIVE_DOWNLOAD_MAX_MB
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class _SessionFile:
+    """A temp file that is deleted with the session state holding it (or at exit)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    def remove(self):
+        self._finalizer()
 
 def render_sidebar():
     with st.sidebar:
@@ -17,12 +39,57 @@ def render_sidebar():
         
         return model_name, working_dir, safe_mode
 
-def render_chat_message(role, content, output=None):
+def render_chat_message(role, content, output=None, output_ref=None, blobs=None, key=None):
     with st.chat_message(role):
         st.markdown(content)
         if output:
             with st.expander("View Output"):
                 st.code(output, language="bash")
+        elif output_ref and blobs is not None:
+            # Expanders render their body on every rerun, so the blob is only
+            # read once the user asks for it.
+            with st.expander("View Output"):
+                if st.toggle("Load full output", key=f"load_{key}_{output_ref[:12]}"):
+                    full = blobs.get(output_ref)
+                    st.code(full if full is not None else "Output no longer available.", language="bash")
+
+def render_command_stream(command, stream, max_lines=40, min_interval=0.1):
+    """Shows the tail of a running command's output live. Returns once the command finishes."""
+    placeholder = st.empty()
+    tail = deque(maxlen=max_lines)
+    last_render = 0.0
+    for line in stream:
+        tail.append(line)
+        now = time.monotonic()
+        if now - last_render >= min_interval:
+            placeholder.code(f"$ {command}\n{''.join(tail)}", language="bash")
+            last_render = now
+    placeholder.empty()
+
+def render_agent_stream(deltas, on_action=None, on_actions=None, min_interval=0.05):
+    """
+    Renders an agent reply in an assistant bubble while it streams.
+    on_action(action) is called for each action, and on_actions(actions) for
+    the whole array, as soon as they are complete in the stream.
+    Returns the parsed reply.
+    """
+    parser = ResponseStreamParser()
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        last_render = 0.0
+        for delta in deltas:
+            for event in parser.feed(delta):
+                if event[0] == "action" and on_action is not None:
+                    on_action(event[2])
+                elif event[0] == "actions" and on_actions is not None:
+                    on_actions(event[1])
+            now = time.monotonic()
+            if now - last_render >= min_interval:
+                placeholder.markdown(f"_{parser.partial.get('thought', '')}_\n\n{parser.partial.get('response', '')}")
+                last_render = now
+        data = parser.close()
+        placeholder.markdown(f"_{data.get('thought', '')}_\n\n{data.get('response', '')}")
+    return data
 
 def render_action_approval(actions):
     """
@@ -57,32 +124,110 @@ def render_action_approval(actions):
             
     return None
 
+def render_cache_stats(cache):
+    """Shows web cache hit/miss counters in the sidebar."""
+    stats = cache.stats
+    with st.sidebar.expander("🗄️ Web Cache"):
+        st.caption(
+            f"Hit rate: {cache.hit_rate():.0%} · hits {stats['hits']} · revalidated {stats['revalidated']} · "
+            f"misses {stats['misses']} · evictions {stats['evictions']}"
+        )
+
+def render_prompt_cache(cache):
+    """Shows how much of the prompt prefix is served from the provider-side cache."""
+    usage = cache.usage
+    with st.sidebar.expander("🧊 Prompt Cache"):
+        st.caption(
+            f"Hit rate: {cache.hit_rate():.0%} · uploads {usage['uploads']} · extends {usage['extends']} · "
+            f"~{usage['tokens_saved']} prompt tokens not re-sent"
+        )
+        min_tokens = getattr(cache.provider, "min_tokens", 0)
+        if usage["inline"] and cache.prefix_tokens < min_tokens:
+            st.caption(f"Inactive: the prefix (~{cache.prefix_tokens} tokens) is below the provider minimum "
+                       f"of {min_tokens}, so it is sent inline")
+        if usage["prompt_tokens"]:
+            st.caption(f"Provider: {usage['cached_tokens']} of {usage['prompt_tokens']} prompt tokens cached")
+        if cache.last_error:
+            st.caption(f"Last error: {cache.last_error}")
+
+def render_tool_registry(registry):
+    """Sidebar panel showing which tools are loaded and what loading them cost."""
+    with st.sidebar.expander("🧰 Tools"):
+        st.dataframe(registry.profile(), hide_index=True)
+        st.caption("Tools load on first use. Cold import costs: `python -m core.tool_registry`")
+
+def render_performance(tracer):
+    """Sidebar panel with p50/p95 latency per span type and a Chrome trace export."""
+    with st.sidebar.expander("⏱️ Performance"):
+        summary = tracer.summary()
+        if not summary:
+            st.caption("No spans recorded yet.")
+            return
+        st.dataframe(
+            [
+                {"span": name, "count": s["count"], "p50 ms": round(s["p50"] * 1000, 1),
+                 "p95 ms": round(s["p95"] * 1000, 1), "max ms": round(s["max"] * 1000, 1)}
+                for name, s in summary.items()
+            ],
+            hide_index=True,
+        )
+        st.caption(f"JSONL: `{tracer.path}`")
+        # Serializing up to MAX_SPANS spans is only worth it when someone asks for the file
+        if st.button("Export trace", key="export_trace"):
+            tracer.flush()
+            st.download_button(
+                label="⬇️ Chrome trace",
+                data=json.dumps(tracer.chrome_trace(), default=str),
+                file_name="trace.json",
+                mime="application/json",
+            )
+
 def render_file_explorer(project_manager, pinned_files):
     st.sidebar.divider()
     st.sidebar.subheader("📂 Project Files")
     
-    # Simple file tree view
-    file_tree = project_manager.list_files()
-    st.sidebar.code(file_tree, language="text")
+    # Simple file tree view; with a watcher it is only rebuilt after a real change
+    cached = st.session_state.get("file_tree")
+    key = None
+    if project_manager.watcher is not None:
+        project_manager.poll_changes()
+        key = (project_manager.working_dir, id(project_manager), project_manager.change_version)
+    if key is None or cached is None or cached[0] != key:
+        cached = st.session_state.file_tree = (key, project_manager.list_files())
+    st.sidebar.code(cached[1], language="text")
     
     # Download Button logic
     if st.sidebar.button("📦 Zip & Download Workspace"):
-        # Create a zip file of the working directory
         try:
-            # Check if workspace exists
             if not os.path.exists(project_manager.working_dir):
                 st.sidebar.error("Workspace directory not found!")
             else:
-                # Create zip in a temp location or current dir
-                shutil.make_archive("workspace_archive", 'zip', project_manager.working_dir)
-                
-                with open("workspace_archive.zip", "rb") as f:
-                    st.sidebar.download_button(
-                        label="⬇️ Download Zip",
-                        data=f,
-                        file_name="workspace.zip",
-                        mime="application/zip"
-                    )
+                # One archive file per session, outside the CWD so sessions never clobber each other
+                previous = st.session_state.get("archive_file")
+                if previous is not None:
+                    previous.remove()
+                fd, path = tempfile.mkstemp(prefix="workspace_", suffix=".zip")
+                os.close(fd)
+                st.session_state.archive_file = _SessionFile(path)
+                max_file = ARCHIVE_MAX_FILE_MB * 1024 * 1024 or None
+                with st.sidebar, st.spinner("Compressing workspace..."):
+                    stats = project_manager.archive_workspace(path, max_file_size=max_file)
+                st.sidebar.caption(
+                    f"{stats['members']} entries · {stats['bytes_out'] / 1e6:.1f} MB in {stats['seconds']:.1f}s · "
+                    f"{stats['reused']} reused · {stats['ignored']} ignored"
+                    + (f" · {stats['too_large']} over {ARCHIVE_MAX_FILE_MB} MB" if stats["too_large"] else "")
+                )
+                if stats["bytes_out"] > ARCHIVE_DOWNLOAD_MAX_MB * 1024 * 1024:
+                    # The download button holds the whole file in memory
+                    st.sidebar.warning(f"Archive too large to download through the browser; saved to `{path}` until this session ends")
+                else:
+                    with open(path, "rb") as f:
+                        st.sidebar.download_button(
+                            label="⬇️ Download Zip",
+                            data=f,
+                            file_name="workspace.zip",
+                            mime="application/zip"
+                        )
         except Exception as e:
             st.sidebar.error(f"Error creating zip: {e}")
 